@@ -0,0 +1,141 @@
+"""Compare database size, WAL volume and read cost with and without
+article body compression.
+
+    python -m benchmarks.bench_compression [--articles N] [--source-db PATH]
+
+With --source-db the corpus is copied from an existing myfeeds.db (summary and
+content exactly as stored there); otherwise a synthetic corpus of feed-shaped
+HTML is generated.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from src.app.compression import compress_text, decompress_text
+from src.app.database import SCHEMA
+from src.app.models import Article
+
+
+WORDS = (
+    "the of and to in is for on that with as by at from this are be it an has was "
+    "new release update security team data model report market season users open "
+    "source project city council research study climate energy policy court game "
+    "player launch device network cloud browser feature support version results "
+    "analysis million percent company government election weather review guide"
+).split()
+
+
+def _paragraph(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(30, 90))]
+    words[0] = words[0].capitalize()
+    if rng.random() < 0.3:
+        i = rng.randrange(len(words))
+        words[i] = f'<a href="https://example.com/{rng.randint(1, 10**6)}">{words[i]}</a>'
+    return "<p>" + " ".join(words) + ".</p>"
+
+
+def synthetic_corpus(count: int, seed: int = 1) -> list[tuple[str, str, str]]:
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 12))).capitalize()
+        img = f'<img src="https://cdn.example.com/{rng.randint(1, 10**8)}.jpg" alt="">'
+        summary = img + "".join(_paragraph(rng) for _ in range(rng.randint(1, 3)))
+        content = img + "".join(_paragraph(rng) for _ in range(rng.randint(4, 25)))
+        corpus.append((title, summary, content))
+    return corpus
+
+
+def source_corpus(path: str, count: int) -> list[tuple[str, str, str]]:
+    conn = sqlite3.connect(path)
+    rows = conn.execute(
+        "SELECT title, summary, content FROM articles ORDER BY id DESC LIMIT ?", (count,)
+    ).fetchall()
+    conn.close()
+    return [(t, decompress_text(s), decompress_text(c)) for t, s, c in rows]
+
+
+def _file_size(path: str) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def run(corpus, compress: bool) -> dict:
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA wal_autocheckpoint = 0")
+    conn.executescript(SCHEMA)
+    conn.execute("INSERT INTO feeds (url, title) VALUES ('https://example.com/feed', 'Bench')")
+    conn.commit()
+
+    start = time.perf_counter()
+    for i, (title, summary, content) in enumerate(corpus):
+        if compress:
+            summary, content = compress_text(summary), compress_text(content)
+        conn.execute(
+            "INSERT INTO articles (feed_id, guid, title, summary, content) VALUES (1, ?, ?, ?, ?)",
+            (f"guid-{i}", title, summary, content)
+        )
+        if i % 50 == 49:
+            conn.commit()
+    conn.commit()
+    write_seconds = time.perf_counter() - start
+    wal_bytes = _file_size(path + "-wal")
+
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    db_bytes = _file_size(path)
+    pages = conn.execute("PRAGMA page_count").fetchone()[0]
+
+    start = time.perf_counter()
+    rows = conn.execute(
+        "SELECT a.*, 'Bench' AS feed_title FROM articles a ORDER BY id DESC"
+    ).fetchall()
+    articles = Article.from_rows(rows)
+    for article in articles:
+        article.summary, article.content
+    read_seconds = time.perf_counter() - start
+    assert len(articles) == len(corpus)
+
+    conn.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+
+    return {
+        "db_bytes": db_bytes,
+        "wal_bytes": wal_bytes,
+        "pages": pages,
+        "write_s": write_seconds,
+        "read_s": read_seconds,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=5000)
+    parser.add_argument("--source-db")
+    args = parser.parse_args()
+
+    corpus = (source_corpus(args.source_db, args.articles) if args.source_db
+              else synthetic_corpus(args.articles))
+    raw_bytes = sum(len((s or "").encode()) + len((c or "").encode()) for _, s, c in corpus)
+    print(f"{len(corpus)} articles, {raw_bytes / 1e6:.1f} MB of summary+content")
+
+    plain = run(corpus, compress=False)
+    packed = run(corpus, compress=True)
+
+    print(f"{'':12}{'plain':>14}{'compressed':>14}{'ratio':>8}")
+    for key in ("db_bytes", "wal_bytes", "pages", "write_s", "read_s"):
+        a, b = plain[key], packed[key]
+        fmt = "{:>14.3f}" if key.endswith("_s") else "{:>14,}"
+        ratio = a / b if b else float("inf")
+        print(f"{key:12}" + fmt.format(a) + fmt.format(b) + f"{ratio:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Break down what stored match text and the two FTS5 indexes add to the
+database, and what re-deriving the text on every pass would cost instead.
+
+    python -m benchmarks.bench_db_size [--articles N] [--source-db PATH]
+
+Builds a throwaway database with the columns ingest stores (match_title,
+match_summary, search_content) and reports per-object sizes from dbstat.
+The match text columns are sized by their byte length, since they share
+pages with the rest of the row. The corpus is bench_compression's: synthetic
+unless --source-db names an existing myfeeds.db. The synthetic corpus draws
+on a small vocabulary, which flatters the trigram index; real feeds give a
+truer ratio.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_compression import source_corpus, synthetic_corpus
+from src.app import create_app
+from src.app.database import get_db
+from src.app.services import search_service
+from src.app.textnorm import match_text
+
+
+def _populate(corpus) -> None:
+    db = get_db()
+    db.execute("INSERT INTO feeds (url, title) VALUES ('https://example.com/feed', 'Bench')")
+    rows = []
+    for i, (title, summary, content) in enumerate(corpus):
+        match_summary = match_text(summary)
+        rows.append((f"guid-{i}", title, summary, content, match_text(title), match_summary,
+                     search_service.search_content(match_summary, content)))
+    db.executemany(
+        "INSERT INTO articles (feed_id, guid, title, summary, content, "
+        "match_title, match_summary, search_content) VALUES (1, ?, ?, ?, ?, ?, ?, ?)",
+        rows
+    )
+    db.commit()
+
+
+def _object_sizes() -> dict[str, int]:
+    return dict(get_db().execute(
+        "SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"
+    ).fetchall())
+
+
+def _sum_prefixed(sizes: dict[str, int], prefix: str) -> int:
+    return sum(size for name, size in sizes.items() if name.startswith(prefix))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--source-db")
+    args = parser.parse_args()
+
+    corpus = (source_corpus(args.source_db, args.articles) if args.source_db
+              else synthetic_corpus(args.articles))
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        app = create_app({"DATABASE": path, "SCHEDULER_ENABLED": False})
+        with app.app_context():
+            _populate(corpus)
+            db = get_db()
+            db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            sizes = _object_sizes()
+            total = sum(sizes.values())
+            text = db.execute(
+                "SELECT SUM(LENGTH(CAST(summary AS BLOB))), SUM(LENGTH(CAST(content AS BLOB))), "
+                "SUM(LENGTH(CAST(match_title AS BLOB))), "
+                "SUM(LENGTH(CAST(match_summary AS BLOB))), "
+                "SUM(LENGTH(CAST(search_content AS BLOB))) FROM articles"
+            ).fetchone()
+            summary_bytes, content_bytes, title_bytes, match_bytes, search_bytes = (
+                value or 0 for value in text
+            )
+            filter_fts = _sum_prefixed(sizes, "filter_fts")
+            articles_fts = _sum_prefixed(sizes, "articles_fts")
+
+            rows = db.execute("SELECT summary FROM articles").fetchall()
+            start = time.perf_counter()
+            for row in rows:
+                match_text(row["summary"])
+            derive_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            db.execute("SELECT match_title, match_summary FROM articles").fetchall()
+            read_seconds = time.perf_counter() - start
+
+        def line(label: str, size: int) -> None:
+            print(f"{label:34}{size / 1e6:9.1f} MB  {size * 100 / total:5.1f}%")
+
+        print(f"{len(corpus)} articles, {total / 1e6:.1f} MB of pages")
+        line("articles table", sizes.get("articles", 0))
+        line("  summary + content (raw HTML)", summary_bytes + content_bytes)
+        line("  match_title + match_summary", title_bytes + match_bytes)
+        line("  search_content", search_bytes)
+        line("filter_fts (trigram)", filter_fts)
+        line("articles_fts (unicode61)", articles_fts)
+        line("everything else", total - sizes.get("articles", 0) - filter_fts - articles_fts)
+        print(f"trigram index / match text       {filter_fts / (title_bytes + match_bytes):9.1f}x")
+        print(f"deriving match text per pass     {derive_seconds:9.3f}s")
+        print(f"reading stored match text        {read_seconds:9.3f}s")
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
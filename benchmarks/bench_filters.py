@@ -0,0 +1,110 @@
+"""Compare FilterEngine with checking every filter against every article.
+
+    python -m benchmarks.bench_filters [--articles N] [--filters M] [--workers W]
+
+Uses the synthetic corpus from bench_compression with topical terms
+sprinkled into a few percent of articles, and filters built from those terms
+in keyword, alternation and literal-free shapes. Both paths must produce the
+same (article, filter) pairs. With --workers, the engine batches are also
+run across that many spawned processes, as bulk reapply does.
+"""
+import argparse
+import random
+import re
+import time
+
+from benchmarks.bench_compression import WORDS, synthetic_corpus
+from src.app.filter_engine import FilterEngine
+from src.app.filter_worker import iter_pool_matches
+from src.app.models import Filter
+from src.app.services.filter_service import article_matches_filter
+
+
+TOPICS = (
+    "bitcoin crypto blockchain nft celebrity gossip horoscope sponsored giveaway "
+    "coupon webinar podcast kardashian royals lottery casino betting influencer "
+    "skincare diet recipe unboxing trailer spoiler rumor leak esports streamer"
+).split()
+TOPIC_RATE = 0.03
+
+
+def articles_with_topics(count: int, seed: int = 3) -> list[tuple[int, str, str]]:
+    rng = random.Random(seed)
+    articles = []
+    for i, (title, summary, _) in enumerate(synthetic_corpus(count)):
+        if rng.random() < TOPIC_RATE:
+            title += " " + rng.choice(TOPICS).capitalize()
+        if rng.random() < TOPIC_RATE:
+            summary += f"<p>More on {rng.choice(TOPICS)} {rng.choice(WORDS)}.</p>"
+        articles.append((i, title, summary))
+    return articles
+
+
+def synthetic_filters(count: int, seed: int = 2) -> list[tuple[Filter, re.Pattern]]:
+    rng = random.Random(seed)
+    shapes = [
+        lambda: rf"\b{rng.choice(TOPICS)}\b",
+        lambda: r"\b(" + "|".join(rng.sample(TOPICS, 3)) + r")s?\b",
+        lambda: rf"{rng.choice(TOPICS)} {rng.choice(WORDS)}",
+        lambda: rf"{rng.choice(TOPICS)}\w*",
+        lambda: r"^\d+\s",
+    ]
+    filters = []
+    for i in range(count):
+        pattern = rng.choice(shapes)()
+        target = rng.choice(("title", "summary", "both"))
+        filters.append((Filter(id=i, name=pattern, pattern=pattern, target=target),
+                        re.compile(pattern, re.IGNORECASE)))
+    return filters
+
+
+def brute_force(filters, articles):
+    return [
+        (article_id, f.id)
+        for article_id, title, summary in articles
+        for f, compiled in filters
+        if article_matches_filter(title, summary, compiled, f.target)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--filters", type=int, default=80)
+    parser.add_argument("--workers", type=int, default=0,
+                        help="also time the batches across this many processes")
+    args = parser.parse_args()
+
+    articles = articles_with_topics(args.articles)
+    filters = synthetic_filters(args.filters)
+
+    start = time.perf_counter()
+    expected = brute_force(filters, articles)
+    brute_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine = FilterEngine(filters)
+    got = []
+    for i in range(0, len(articles), 2000):
+        got.extend(engine.match(articles[i:i + 2000]))
+    engine_seconds = time.perf_counter() - start
+
+    assert sorted(got) == sorted(expected), "engine and brute force disagree"
+    prefiltered = sum(1 for rule in engine.rules if rule.literals is not None)
+    print(f"{len(articles)} articles x {len(filters)} filters "
+          f"({prefiltered} with literal prefilter), {len(expected)} matches")
+    print(f"brute force  {brute_seconds:8.3f}s")
+    print(f"engine       {engine_seconds:8.3f}s  ({brute_seconds / engine_seconds:.1f}x)")
+
+    if args.workers:
+        jobs = [(engine, articles[i:i + 2000]) for i in range(0, len(articles), 2000)]
+        start = time.perf_counter()
+        pooled = [pair for pairs, _ in iter_pool_matches(jobs, args.workers, 60) for pair in pairs]
+        pool_seconds = time.perf_counter() - start
+        assert sorted(pooled) == sorted(expected), "pool and brute force disagree"
+        print(f"{args.workers} workers    {pool_seconds:8.3f}s  ({brute_seconds / pool_seconds:.1f}x, "
+              f"includes process start-up)")
+
+
+if __name__ == "__main__":
+    main()
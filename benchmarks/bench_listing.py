@@ -0,0 +1,101 @@
+"""Compare the cost of listing articles through models versus the tuple
+projection used by the JSON APIs.
+
+    python -m benchmarks.bench_listing [--articles N] [--compress]
+
+Builds a throwaway database with a synthetic corpus, then times and counts
+allocations for one /api/articles-shaped listing of every row, both ways.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.bench_compression import synthetic_corpus
+from src.app import create_app
+from src.app.compression import compress_text
+from src.app.database import get_db
+from src.app.services import article_service
+
+
+FIELDS = ("id", "title", "summary", "url", "feed_title", "published_at", "is_read", "is_saved")
+
+
+def _populate(count: int, compress: bool) -> None:
+    db = get_db()
+    db.execute("INSERT INTO feeds (url, title) VALUES ('https://example.com/feed', 'Bench')")
+    now = int(time.time())
+    for i, (title, summary, content) in enumerate(synthetic_corpus(count)):
+        if compress:
+            summary, content = compress_text(summary), compress_text(content)
+        db.execute(
+            "INSERT INTO articles (feed_id, guid, title, summary, content, url, published_at) "
+            "VALUES (1, ?, ?, ?, ?, ?, ?)",
+            (f"guid-{i}", title, summary, content, f"https://example.com/{i}", now - i)
+        )
+    db.commit()
+
+
+def via_models(count: int) -> list[dict]:
+    return [{
+        "id": a.id,
+        "title": a.title,
+        "summary": a.summary,
+        "url": a.url,
+        "feed_title": a.feed_title,
+        "published_at": a.published_at.isoformat() if a.published_ts is not None else None,
+        "is_read": a.is_read,
+        "is_saved": a.is_saved,
+    } for a in article_service.get_articles(limit=count)]
+
+
+def via_projection(count: int) -> list[dict]:
+    return [dict(zip(FIELDS, row))
+            for row in article_service.get_article_values(FIELDS, limit=count)]
+
+
+def measure(fn, count: int) -> dict:
+    fn(count)  # warm the page cache and statement cache
+    start = time.perf_counter()
+    fn(count)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    result = fn(count)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(result) == count
+    return {"seconds": seconds, "peak_bytes": peak, "bytes_per_article": peak / count}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=5000)
+    parser.add_argument("--compress", action="store_true",
+                        help="store summary/content compressed, as with COMPRESS_ARTICLE_BODIES")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        app = create_app({"DATABASE": path, "SCHEDULER_ENABLED": False})
+        with app.app_context():
+            _populate(args.articles, args.compress)
+            models = measure(via_models, args.articles)
+            tuples = measure(via_projection, args.articles)
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+
+    print(f"{args.articles} articles{' (compressed)' if args.compress else ''}")
+    print(f"{'':20}{'models':>14}{'projection':>14}{'ratio':>8}")
+    for key in ("seconds", "peak_bytes", "bytes_per_article"):
+        a, b = models[key], tuples[key]
+        fmt = "{:>14.3f}" if key == "seconds" else "{:>14,.1f}"
+        print(f"{key:20}" + fmt.format(a) + fmt.format(b) + f"{a / b if b else float('inf'):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
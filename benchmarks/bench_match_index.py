@@ -0,0 +1,102 @@
+"""Time bulk filter passes with and without the trigram match index.
+
+    python -m benchmarks.bench_match_index [--articles N] [--filters M]
+
+Builds a throwaway database from the bench_filters corpus with stored match
+text, then runs the same work twice: a new filter scanning every article
+for each pattern, and a full reapply of all synthetic filters. The second
+run drops filter_fts first, so every article is read and checked. Both runs
+must file the same matches.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_filters import articles_with_topics, synthetic_filters
+from src.app import create_app
+from src.app.database import get_db
+from src.app.filter_engine import compile_pattern, fts_query
+from src.app.services import filter_service
+from src.app.textnorm import match_text
+
+
+def _populate(count: int, filters) -> None:
+    db = get_db()
+    db.execute("INSERT INTO feeds (url, title) VALUES ('https://example.com/feed', 'Bench')")
+    db.executemany(
+        "INSERT INTO articles (feed_id, guid, title, summary, match_title, match_summary) "
+        "VALUES (1, ?, ?, ?, ?, ?)",
+        [(f"guid-{i}", title, summary, match_text(title), match_text(summary))
+         for i, title, summary in articles_with_topics(count)]
+    )
+    db.executemany(
+        "INSERT INTO filters (name, pattern, target, evaluated_through) VALUES (?, ?, ?, 0)",
+        [(f.name, f.pattern, f.target) for f, _ in filters]
+    )
+    db.commit()
+
+
+def _run(filters) -> tuple[float, float, set]:
+    db = get_db()
+    db.execute("DELETE FROM filter_matches")
+    db.execute("UPDATE filters SET evaluated_through = 0")
+    db.execute("UPDATE articles SET is_read = 0")
+    db.commit()
+
+    start = time.perf_counter()
+    for f in filter_service.get_active_filters():
+        filter_service.apply_filter_to_existing_articles(f)
+    single_seconds = time.perf_counter() - start
+
+    db.execute("DELETE FROM filter_matches")
+    db.execute("UPDATE filters SET evaluated_through = 0")
+    db.commit()
+    start = time.perf_counter()
+    filter_service.reapply_all_filters()
+    reapply_seconds = time.perf_counter() - start
+
+    matches = set(db.execute("SELECT article_id, filter_id FROM filter_matches").fetchall())
+    return single_seconds, reapply_seconds, matches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=50000)
+    parser.add_argument("--filters", type=int, default=80)
+    args = parser.parse_args()
+
+    filters = synthetic_filters(args.filters)
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        app = create_app({"DATABASE": path, "SCHEDULER_ENABLED": False,
+                          "FILTER_TIME_BUDGET_SECONDS": 0, "FILTER_WORKERS": 1})
+        with app.app_context():
+            _populate(args.articles, filters)
+            indexed = sum(1 for f, _ in filters
+                          if fts_query(compile_pattern(f.pattern), f.target) is not None)
+            print(f"{args.articles} articles x {len(filters)} filters "
+                  f"({indexed} with a match index query)")
+
+            single, reapply, with_index = _run(filters)
+            db = get_db()
+            db.executescript("DROP TRIGGER filter_fts_insert; DROP TRIGGER filter_fts_update; "
+                             "DROP TRIGGER filter_fts_delete; DROP TABLE filter_fts;")
+            scan_single, scan_reapply, without_index = _run(filters)
+
+            assert with_index == without_index, "index and full scan disagree"
+            print(f"{'':14}{'index':>10}{'full scan':>12}")
+            print(f"{'each filter':14}{single:>9.3f}s{scan_single:>11.3f}s"
+                  f"  ({scan_single / single:.1f}x)")
+            print(f"{'reapply':14}{reapply:>9.3f}s{scan_reapply:>11.3f}s"
+                  f"  ({scan_reapply / reapply:.1f}x)")
+            print(f"{len(with_index)} matches")
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
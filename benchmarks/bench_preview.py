@@ -0,0 +1,76 @@
+"""Time filter match-count previews against the unread corpus snapshot.
+
+    python -m benchmarks.bench_preview [--articles N]
+
+Builds a throwaway database of unread articles from the bench_filters
+corpus, then reports the one-off snapshot build, the latency of budgeted
+previews next to their exact counts, and the refresh after one article is
+marked read.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_filters import articles_with_topics
+from src.app import create_app
+from src.app.database import get_db
+from src.app.services import filter_service
+
+
+PATTERNS = (r"\bbitcoin\b", r"\b(crypto|nft|casino)s?\b", r"gossip \w+", r"^\d+\s", r"\w+ing\b")
+
+
+def _populate(count: int) -> None:
+    db = get_db()
+    db.execute("INSERT INTO feeds (url, title) VALUES ('https://example.com/feed', 'Bench')")
+    db.executemany(
+        "INSERT INTO articles (feed_id, guid, title, summary) VALUES (1, ?, ?, ?)",
+        [(f"guid-{i}", title, summary) for i, title, summary in articles_with_topics(count)]
+    )
+    db.commit()
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=50000)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        app = create_app({"DATABASE": path, "SCHEDULER_ENABLED": False})
+        with app.app_context():
+            _populate(args.articles)
+            _, build_seconds = _timed(filter_service._unread_corpus.get)
+            print(f"{args.articles} unread articles, snapshot built in {build_seconds:.3f}s")
+            print(f"{'pattern':28}{'preview':>10}{'ms':>8}{'exact':>8}{'ms':>8}")
+            for pattern in PATTERNS:
+                (count, approximate), seconds = _timed(
+                    lambda: filter_service.preview_unread_matches(pattern, "both"))
+                exact, exact_seconds = _timed(
+                    lambda: filter_service.count_unread_matches(pattern, "both"))
+                shown = f"~{count}" if approximate else str(count)
+                print(f"{pattern:28}{shown:>10}{seconds * 1000:>8.1f}"
+                      f"{exact:>8}{exact_seconds * 1000:>8.1f}")
+
+            db = get_db()
+            db.execute("UPDATE articles SET is_read = 1 WHERE id = 1")
+            db.commit()
+            _, refresh_seconds = _timed(filter_service._unread_corpus.get)
+            print(f"refresh after marking one article read: {refresh_seconds * 1000:.1f}ms")
+    finally:
+        filter_service._unread_corpus.clear()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
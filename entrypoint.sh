@@ -5,10 +5,12 @@ MODE=${1:-web}
 
 if [ "$MODE" = "web" ]; then
     mkdir -p /tmp/gunicorn && chown appuser:appuser /tmp/gunicorn
-    exec su -s /bin/sh appuser -c 'gunicorn --bind 0.0.0.0:5000 --workers 4 --timeout 30 --graceful-timeout 10 --max-requests 1000 --max-requests-jitter 100 --worker-tmp-dir /dev/shm --control-socket /tmp/gunicorn/control.sock --access-logfile - run:app'
+    exec su -s /bin/sh appuser -c 'gunicorn --config gunicorn.conf.py --bind 0.0.0.0:5000 --workers 4 --worker-class gthread --threads 8 --timeout 30 --graceful-timeout 10 --max-requests 1000 --max-requests-jitter 100 --worker-tmp-dir /dev/shm --control-socket /tmp/gunicorn/control.sock --access-logfile - run:app'
 elif [ "$MODE" = "scheduler" ]; then
     exec su -s /bin/sh appuser -c 'python -m src.scheduler_runner'
+elif [ "$MODE" = "convert-auto-vacuum" ]; then
+    exec su -s /bin/sh appuser -c 'python -m src.maintenance_runner convert-auto-vacuum'
 else
-    echo "Unknown mode: $MODE (expected 'web' or 'scheduler')" >&2
+    echo "Unknown mode: $MODE (expected 'web', 'scheduler' or 'convert-auto-vacuum')" >&2
     exit 1
 fi
@@ -0,0 +1,9 @@
+"""gunicorn settings for the web container; flags stay in entrypoint.sh."""
+
+
+def worker_exit(server, worker):
+    # Runs in the worker after its last request, on shutdown and when
+    # --max-requests recycles it: write read-state changes still buffered
+    # (src/app/write_behind.py) before the process goes.
+    from src.app import write_behind
+    write_behind.flush_all()
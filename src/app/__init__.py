@@ -43,12 +43,26 @@ def create_app(config: dict | None = None) -> Flask:
     app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "dev-secret-key-change-in-production")
     app.config["SCHEDULER_ENABLED"] = os.environ.get("SCHEDULER_ENABLED", "true").lower() == "true"
     app.config["APP_PASSWORD"] = os.environ.get("APP_PASSWORD")
+    app.config["DB_MAINTENANCE_BUDGET_SECONDS"] = float(os.environ.get("DB_MAINTENANCE_BUDGET_SECONDS", "2.0"))
+    app.config["FILTER_TIME_BUDGET_SECONDS"] = float(os.environ.get("FILTER_TIME_BUDGET_SECONDS", "2.0"))
+    app.config["FILTER_WORKERS"] = int(os.environ.get("FILTER_WORKERS", min(os.cpu_count() or 1, 4)))
+    app.config["FILTER_CONTENT_SCAN_CHARS"] = int(os.environ.get("FILTER_CONTENT_SCAN_CHARS", "20000"))
+    app.config["READ_STATE_FLUSH_SECONDS"] = float(os.environ.get("READ_STATE_FLUSH_SECONDS", "2.0"))
+    app.config["READ_STATE_MAX_PENDING"] = int(os.environ.get("READ_STATE_MAX_PENDING", "500"))
+    app.config["SSE_POLL_SECONDS"] = float(os.environ.get("SSE_POLL_SECONDS", "2.0"))
+    app.config["SSE_MAX_STREAMS"] = int(os.environ.get("SSE_MAX_STREAMS", "4"))
+    app.config["SSE_STREAM_SECONDS"] = float(os.environ.get("SSE_STREAM_SECONDS", "300"))
+    app.config["COMPRESS_ARTICLE_BODIES"] = os.environ.get("COMPRESS_ARTICLE_BODIES", "false").lower() == "true"
     app.config["PERMANENT_SESSION_LIFETIME"] = timedelta(days=365)
     app.config["SESSION_COOKIE_HTTPONLY"] = True
     app.config["SESSION_COOKIE_SAMESITE"] = "Lax"
 
     if config:
         app.config.update(config)
+    # On the shared data volume, so the web and scheduler containers both see it.
+    app.config.setdefault("REFRESH_SOCKET_PATH", os.environ.get(
+        "REFRESH_SOCKET_PATH", app.config["DATABASE"] + ".refresh.sock"
+    ))
 
     if app.config.get("APP_PASSWORD") and app.config["SECRET_KEY"] in WEAK_SECRET_KEYS:
         logging.getLogger(__name__).critical(
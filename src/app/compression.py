@@ -0,0 +1,57 @@
+"""Optional compression for the large article text columns.
+
+Compressed values are stored as BLOBs whose first byte names the codec, so
+rows written as plain TEXT (before compression was enabled, or too short to be
+worth compressing) keep reading back unchanged.
+"""
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+ZLIB_MARKER = b"z"
+ZSTD_MARKER = b"s"
+MIN_COMPRESS_LENGTH = 256
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 6
+
+
+def default_codec() -> str:
+    return "zstd" if zstandard is not None else "zlib"
+
+
+def compress_text(value: str | None, codec: str | None = None) -> str | bytes | None:
+    """Return value as a marked BLOB, or unchanged if compression doesn't pay."""
+    if not value or len(value) < MIN_COMPRESS_LENGTH:
+        return value
+
+    raw = value.encode("utf-8")
+    if (codec or default_codec()) == "zstd" and zstandard is not None:
+        packed = ZSTD_MARKER + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    else:
+        packed = ZLIB_MARKER + zlib.compress(raw, ZLIB_LEVEL)
+
+    return packed if len(packed) < len(raw) else value
+
+
+def decompress_text(value: str | bytes | None) -> str | None:
+    if not isinstance(value, bytes):
+        return value
+    if not value:
+        return ""
+
+    marker, payload = value[:1], value[1:]
+    if marker == ZLIB_MARKER:
+        return zlib.decompress(payload).decode("utf-8")
+    if marker == ZSTD_MARKER:
+        if zstandard is None:
+            raise RuntimeError("zstd-compressed article found but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload).decode("utf-8")
+    return value.decode("utf-8", errors="replace")
+
+
+def is_compressed(value) -> bool:
+    return isinstance(value, bytes)
@@ -0,0 +1,74 @@
+"""Change counters kept by triggers, and a per-process cache validated
+against them.
+
+Each counter is a row in the ``counters`` table that triggers bump on every
+write to the table it tracks, so any process (web workers, the scheduler)
+can tell whether data it derived earlier is still current with one
+primary-key lookup instead of re-reading the source rows.
+"""
+import sqlite3
+import threading
+from typing import Callable, Generic, TypeVar
+
+from flask import current_app
+
+from src.app.database import get_db
+
+
+T = TypeVar("T")
+
+
+def read_counter(name: str, db: sqlite3.Connection | None = None) -> int:
+    row = (db or get_db()).execute(
+        "SELECT value FROM counters WHERE name = ?", (name,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def read_counters(names: tuple[str, ...], db: sqlite3.Connection | None = None) -> tuple[int, ...]:
+    if len(names) == 1:
+        return (read_counter(names[0], db),)
+    placeholders = ",".join("?" for _ in names)
+    values = dict((db or get_db()).execute(
+        f"SELECT name, value FROM counters WHERE name IN ({placeholders})", names
+    ).fetchall())
+    return tuple(values.get(name, 0) for name in names)
+
+
+class VersionedCache(Generic[T]):
+    """A value derived from the database, rebuilt only when one of its
+    counters changes.
+
+    build receives the previous value for the same database (or None), so
+    it can update incrementally instead of starting over.
+
+    Entries are keyed by database path so one process serving several
+    databases (tests, scripts) never mixes them up. Counters start at a
+    random value, so a database file replaced at the same path doesn't
+    collide with the cached version either.
+    """
+
+    def __init__(self, counters: str | tuple[str, ...], build: Callable[[T | None], T]):
+        self.counters = (counters,) if isinstance(counters, str) else tuple(counters)
+        self.build = build
+        self._entries: dict[str, tuple[int, T]] = {}
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        key = current_app.config["DATABASE"]
+        # Read the version before building: a write landing in between makes
+        # the entry look stale next time rather than hiding the change.
+        version = read_counters(self.counters)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+            value = self.build(entry[1] if entry is not None else None)
+            self._entries[key] = (version, value)
+            return value
+
+    def clear(self) -> None:
+        self._entries.clear()
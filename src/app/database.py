@@ -1,8 +1,11 @@
 import re
 import sqlite3
 from contextlib import contextmanager
+from typing import Callable, Iterator, Sequence
 from flask import Flask, g, current_app
 
+from src.app.compression import decompress_text
+
 
 def get_db() -> sqlite3.Connection:
     if "db" not in g:
@@ -15,6 +18,25 @@ def get_db() -> sqlite3.Connection:
     return g.db
 
 
+def iter_projection(query: str, params: Sequence,
+                    converters: Sequence[Callable | None]) -> Iterator[tuple]:
+    """Run query and yield its rows as plain tuples, passing each column
+    through the matching converter (None leaves it as stored).
+
+    Skips sqlite3.Row and model construction for callers that only
+    serialise the values.
+    """
+    cursor = get_db().cursor()
+    cursor.row_factory = None
+    cursor.execute(query, params)
+    if not any(converters):
+        yield from cursor
+        return
+    for row in cursor:
+        yield tuple(value if convert is None or value is None else convert(value)
+                    for value, convert in zip(row, converters))
+
+
 def close_db(e=None) -> None:
     db = g.pop("db", None)
     if db is not None:
@@ -38,6 +60,9 @@ def init_db(app: Flask) -> None:
 
     with app.app_context():
         db = get_db()
+        # Only takes effect on a brand-new file; existing databases are
+        # converted by the maintenance job.
+        db.execute("PRAGMA auto_vacuum = INCREMENTAL")
         db.execute("PRAGMA journal_mode = WAL")
         db.executescript(SCHEMA)
         db.commit()
@@ -63,18 +88,209 @@ def _run_migrations(db: sqlite3.Connection) -> None:
     _add_column_if_missing(db, "feeds", "last_modified", "TEXT")
     _add_column_if_missing(db, "feeds", "hidden", "INTEGER NOT NULL DEFAULT 0")
     _add_column_if_missing(db, "feeds", "unsubscribed", "INTEGER NOT NULL DEFAULT 0")
+    _add_column_if_missing(db, "feeds", "last_parsed_at", "INTEGER")
+    _add_column_if_missing(db, "seen_guids", "last_seen_at", "INTEGER")
+    _add_column_if_missing(db, "filters", "evaluated_through", "INTEGER NOT NULL DEFAULT 0")
+    _add_column_if_missing(db, "filters", "disabled_reason", "TEXT")
+    _add_column_if_missing(db, "articles", "match_title", "TEXT")
+    _add_column_if_missing(db, "articles", "match_summary", "TEXT")
+    # Rows still waiting for filter_service.backfill_match_text; empty once
+    # it has run, since ingest fills both columns.
+    db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_articles_match_text_pending "
+        "ON articles(id) WHERE match_title IS NULL OR match_summary IS NULL"
+    )
+    _add_column_if_missing(db, "articles", "search_content", "TEXT")
+    # Rows waiting for search_service.backfill_search_content.
+    db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_articles_search_content_pending "
+        "ON articles(id) WHERE match_summary = '' AND search_content IS NULL"
+    )
+    _widen_filter_targets(db)
     _backfill_seen_guids(db)
+    _migrate_timestamps_to_epoch(db)
+    _create_counters(db)
+    _migrate_filter_recheck(db)
+    db.executescript(FILTER_TRACKING_SCHEMA)
+    db.executescript(SYNC_SCHEMA)
+    db.commit()
+    _create_search_index(db)
+    _create_match_index(db)
+
+
+def _migrate_filter_recheck(db: sqlite3.Connection) -> None:
+    """Give filter_recheck its filter_id column, keeping queued articles as
+    rechecks against every filter, and drop the trigger that used to rewind
+    a filter's evaluated_through whenever one of its matches was deleted.
+    The unsave trigger is recreated by FILTER_TRACKING_SCHEMA."""
+    db.execute("DROP TRIGGER IF EXISTS filter_matches_removed_rewind")
+    columns = [row[1] for row in db.execute("PRAGMA table_info(filter_recheck)")]
+    if not columns or "filter_id" in columns:
+        db.commit()
+        return
+    db.commit()
+    try:
+        db.executescript("""
+            BEGIN;
+            DROP TRIGGER IF EXISTS articles_unsaved_recheck;
+            ALTER TABLE filter_recheck RENAME TO filter_recheck_old;
+        """ + FILTER_RECHECK_TABLE + """
+            INSERT INTO filter_recheck (article_id) SELECT article_id FROM filter_recheck_old;
+            DROP TABLE filter_recheck_old;
+            COMMIT;
+        """)
+    except sqlite3.Error:
+        db.rollback()
+        raise
+
+
+FILTER_TARGETS = ("title", "summary", "both", "content", "any")
+_TARGET_CHECK_RE = re.compile(r"CHECK\s*\(\s*target\s+IN\s*\([^)]*\)\s*\)", re.IGNORECASE)
+
+
+def _widen_filter_targets(db: sqlite3.Connection) -> None:
+    """Rebuild filters so its CHECK constraint accepts every FILTER_TARGETS
+    value; SQLite can't alter a constraint in place.
+
+    The table is copied under its stored definition with only the CHECK
+    replaced. Foreign keys are off while the old table is dropped so
+    filter_matches and filter_stats rows survive, and the AUTOINCREMENT
+    sequence is carried over. Triggers on filters go with the old table
+    and are recreated by _create_counters.
+    """
+    sql = db.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'filters'"
+    ).fetchone()[0]
+    targets = ", ".join(f"'{t}'" for t in FILTER_TARGETS)
+    widened = _TARGET_CHECK_RE.sub(f"CHECK(target IN ({targets}))", sql, count=1)
+    if widened == sql:
+        return
+
+    columns = ", ".join(row[1] for row in db.execute("PRAGMA table_info(filters)"))
+    sequence = db.execute("SELECT seq FROM sqlite_sequence WHERE name = 'filters'").fetchone()
+    db.commit()
+    db.execute("PRAGMA foreign_keys = OFF")
+    # Keeps the rename from re-checking triggers on other tables that
+    # mention filters while it's briefly missing.
+    db.execute("PRAGMA legacy_alter_table = ON")
+    try:
+        db.execute("BEGIN")
+        db.execute(re.sub(r"^CREATE TABLE\s+\"?filters\"?", "CREATE TABLE filters_rebuild", widened))
+        db.execute(f"INSERT INTO filters_rebuild ({columns}) SELECT {columns} FROM filters")
+        db.execute("DROP TABLE filters")
+        db.execute("ALTER TABLE filters_rebuild RENAME TO filters")
+        if sequence is not None:
+            db.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'filters'",
+                       (sequence[0],))
+        db.commit()
+    except sqlite3.Error:
+        db.rollback()
+        raise
+    finally:
+        db.execute("PRAGMA legacy_alter_table = OFF")
+        db.execute("PRAGMA foreign_keys = ON")
+
+
+def _create_counters(db: sqlite3.Connection) -> None:
+    """Change counters bumped by triggers; see src/app/counters.py."""
+    db.executescript(COUNTER_SCHEMA)
+    for name in COUNTER_NAMES:
+        db.execute(
+            "INSERT OR IGNORE INTO counters (name, value) VALUES (?, abs(random() % 1000000000))",
+            (name,)
+        )
+    db.commit()
+
+
+def _create_search_index(db: sqlite3.Connection) -> None:
+    """Build articles_fts once, over the articles table's own title,
+    match_summary and search_content, so the index holds no second copy of
+    the text. Replaces earlier versions: a standalone table storing its own
+    tag-stripped title, summary and body, then one without search_content.
+    FTS5 is a compile-time option; without it search falls back to LIKE."""
+    row = db.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'articles_fts'"
+    ).fetchone()
+    if row is not None and "search_content" in row[0]:
+        return
+    try:
+        db.executescript(
+            "BEGIN;"
+            "DROP TRIGGER IF EXISTS articles_fts_insert;"
+            "DROP TRIGGER IF EXISTS articles_fts_update;"
+            "DROP TRIGGER IF EXISTS articles_fts_delete;"
+            "DROP TABLE IF EXISTS articles_fts;"
+            + SEARCH_SCHEMA + "COMMIT;"
+        )
+    except sqlite3.OperationalError:
+        db.rollback()
+
+
+def _create_match_index(db: sqlite3.Connection) -> None:
+    """Build filter_fts once, indexing existing articles. Replaces the
+    earlier index that kept trigram positions (detail=full). Without FTS5 or
+    its trigram tokenizer (SQLite 3.34), bulk filter passes read every row."""
+    row = db.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'filter_fts'"
+    ).fetchone()
+    if row is not None and "detail = none" in row[0]:
+        return
+    try:
+        db.executescript(
+            "BEGIN;"
+            "DROP TRIGGER IF EXISTS filter_fts_insert;"
+            "DROP TRIGGER IF EXISTS filter_fts_update;"
+            "DROP TRIGGER IF EXISTS filter_fts_delete;"
+            "DROP TABLE IF EXISTS filter_fts;"
+            + MATCH_INDEX_SCHEMA + "COMMIT;"
+        )
+    except sqlite3.OperationalError:
+        db.rollback()
 
 
 def _backfill_seen_guids(db: sqlite3.Connection) -> None:
     """Seed tombstones from existing undated articles so they can't resurrect."""
     db.execute(
-        "INSERT OR IGNORE INTO seen_guids (feed_id, guid) "
-        "SELECT feed_id, guid FROM articles WHERE published_at IS NULL"
+        "INSERT OR IGNORE INTO seen_guids (feed_id, guid, last_seen_at) "
+        "SELECT feed_id, guid, CAST(strftime('%s', 'now') AS INTEGER) "
+        "FROM articles WHERE published_at IS NULL"
+    )
+    # Tombstones from before last_seen_at existed count as seen now, so they
+    # get a full retention window before they can be pruned.
+    db.execute(
+        "UPDATE seen_guids SET last_seen_at = CAST(strftime('%s', 'now') AS INTEGER) "
+        "WHERE last_seen_at IS NULL"
     )
     db.commit()
 
 
+# (table, column) pairs stored as integer Unix seconds. Older databases hold
+# isoformat() strings or CURRENT_TIMESTAMP text in the same columns.
+EPOCH_COLUMNS = (
+    ("articles", "published_at"),
+    ("articles", "created_at"),
+    ("feeds", "last_fetched"),
+    ("feeds", "created_at"),
+    ("filters", "created_at"),
+)
+
+
+def _migrate_timestamps_to_epoch(db: sqlite3.Connection) -> None:
+    """Rewrite text timestamps as epoch seconds.
+
+    strftime('%s') understands both isoformat() output (including UTC
+    offsets) and CURRENT_TIMESTAMP's naive UTC text, so every row lands on
+    one comparable scale. Values it can't parse become NULL. Only text rows
+    are touched, so this is a no-op once a database has been converted.
+    """
+    for table, column in EPOCH_COLUMNS:
+        db.execute(
+            f"UPDATE {table} SET {column} = CAST(strftime('%s', {column}) AS INTEGER) "
+            f"WHERE typeof({column}) = 'text'"
+        )
+    db.commit()
+
+
 def _backfill_article_images(db: sqlite3.Connection) -> None:
     """Extract images from content/summary for articles missing image_url."""
     articles = db.execute("""
@@ -83,7 +299,7 @@ def _backfill_article_images(db: sqlite3.Connection) -> None:
     """).fetchall()
 
     for article in articles:
-        html_content = article["content"] or article["summary"] or ""
+        html_content = decompress_text(article["content"]) or decompress_text(article["summary"]) or ""
         if html_content:
             img_match = re.search(r'<img[^>]+src=["\']([^"\']+)["\']', html_content)
             if img_match:
@@ -101,10 +317,10 @@ CREATE TABLE IF NOT EXISTS feeds (
     url TEXT NOT NULL UNIQUE,
     title TEXT,
     site_url TEXT,
-    last_fetched DATETIME,
+    last_fetched INTEGER,
     fetch_error_count INTEGER DEFAULT 0,
     last_error TEXT,
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    created_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
 );
 
 CREATE TABLE IF NOT EXISTS articles (
@@ -116,10 +332,13 @@ CREATE TABLE IF NOT EXISTS articles (
     content TEXT,
     url TEXT,
     image_url TEXT,
-    published_at DATETIME,
+    published_at INTEGER,
     is_read BOOLEAN DEFAULT 0,
     is_saved BOOLEAN DEFAULT 0,
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    created_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+    match_title TEXT,
+    match_summary TEXT,
+    search_content TEXT,
     FOREIGN KEY (feed_id) REFERENCES feeds(id) ON DELETE CASCADE,
     UNIQUE(feed_id, guid)
 );
@@ -135,9 +354,11 @@ CREATE TABLE IF NOT EXISTS filters (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     name TEXT NOT NULL,
     pattern TEXT NOT NULL,
-    target TEXT NOT NULL CHECK(target IN ('title', 'summary', 'both')),
+    target TEXT NOT NULL CHECK(target IN ('title', 'summary', 'both', 'content', 'any')),
     is_active BOOLEAN DEFAULT 1,
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    created_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+    evaluated_through INTEGER NOT NULL DEFAULT 0,
+    disabled_reason TEXT
 );
 
 CREATE TABLE IF NOT EXISTS filter_matches (
@@ -150,6 +371,18 @@ CREATE TABLE IF NOT EXISTS filter_matches (
     UNIQUE(article_id, filter_id)
 );
 
+-- Cumulative evaluation cost per filter, written by
+-- filter_service.flush_filter_stats. Kept out of filters so recording it
+-- doesn't bump the filters counter and recompile every engine.
+CREATE TABLE IF NOT EXISTS filter_stats (
+    filter_id INTEGER PRIMARY KEY,
+    evaluations INTEGER NOT NULL DEFAULT 0,
+    matches INTEGER NOT NULL DEFAULT 0,
+    seconds REAL NOT NULL DEFAULT 0,
+    updated_at INTEGER,
+    FOREIGN KEY (filter_id) REFERENCES filters(id) ON DELETE CASCADE
+);
+
 CREATE TABLE IF NOT EXISTS settings (
     key TEXT PRIMARY KEY,
     value TEXT NOT NULL
@@ -159,6 +392,207 @@ CREATE INDEX IF NOT EXISTS idx_articles_feed_id ON articles(feed_id);
 CREATE INDEX IF NOT EXISTS idx_articles_is_read ON articles(is_read);
 CREATE INDEX IF NOT EXISTS idx_articles_published_at ON articles(published_at);
 CREATE INDEX IF NOT EXISTS idx_articles_is_saved ON articles(is_saved);
+CREATE INDEX IF NOT EXISTS idx_articles_cleanup ON articles(is_read, is_saved, created_at);
 CREATE INDEX IF NOT EXISTS idx_filter_matches_article_id ON filter_matches(article_id);
 CREATE INDEX IF NOT EXISTS idx_filter_matches_filter_id ON filter_matches(filter_id);
 """
+
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE articles_fts USING fts5(
+    title, match_summary, search_content,
+    content = 'articles', content_rowid = 'id',
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER articles_fts_insert AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title, match_summary, search_content)
+    VALUES (new.id, new.title, new.match_summary, new.search_content);
+END;
+
+CREATE TRIGGER articles_fts_update
+AFTER UPDATE OF title, match_summary, search_content ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, match_summary, search_content)
+    VALUES ('delete', old.id, old.title, old.match_summary, old.search_content);
+    INSERT INTO articles_fts (rowid, title, match_summary, search_content)
+    VALUES (new.id, new.title, new.match_summary, new.search_content);
+END;
+
+CREATE TRIGGER articles_fts_delete AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, match_summary, search_content)
+    VALUES ('delete', old.id, old.title, old.match_summary, old.search_content);
+END;
+
+INSERT INTO articles_fts (articles_fts) VALUES ('rebuild');
+"""
+
+# Trigram index over the stored match text, for narrowing bulk filter
+# passes to articles holding a pattern's literals (filter_engine.fts_query).
+# External content, so the text isn't stored twice. Match text is already
+# case-folded, and matching it case-sensitively keeps lookups exact.
+# detail=none keeps only which rows hold each trigram, about a third of the
+# full index; the regex re-checks every hit anyway.
+MATCH_INDEX_SCHEMA = """
+CREATE VIRTUAL TABLE filter_fts USING fts5(
+    match_title, match_summary,
+    content = 'articles', content_rowid = 'id',
+    tokenize = 'trigram case_sensitive 1', detail = none
+);
+
+CREATE TRIGGER IF NOT EXISTS filter_fts_insert AFTER INSERT ON articles BEGIN
+    INSERT INTO filter_fts (rowid, match_title, match_summary)
+    VALUES (new.id, new.match_title, new.match_summary);
+END;
+
+CREATE TRIGGER IF NOT EXISTS filter_fts_update
+AFTER UPDATE OF match_title, match_summary ON articles BEGIN
+    INSERT INTO filter_fts (filter_fts, rowid, match_title, match_summary)
+    VALUES ('delete', old.id, old.match_title, old.match_summary);
+    INSERT INTO filter_fts (rowid, match_title, match_summary)
+    VALUES (new.id, new.match_title, new.match_summary);
+END;
+
+CREATE TRIGGER IF NOT EXISTS filter_fts_delete AFTER DELETE ON articles BEGIN
+    INSERT INTO filter_fts (filter_fts, rowid, match_title, match_summary)
+    VALUES ('delete', old.id, old.match_title, old.match_summary);
+END;
+
+INSERT INTO filter_fts (filter_fts) VALUES ('rebuild');
+"""
+
+COUNTER_NAMES = ("filters", "articles", "filter_matches", "feeds", "feed_status")
+
+COUNTER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS filters_counter_insert AFTER INSERT ON filters BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'filters';
+END;
+
+-- Only rule edits count; bookkeeping such as evaluated_through doesn't
+-- invalidate compiled filters.
+DROP TRIGGER IF EXISTS filters_counter_update;
+CREATE TRIGGER IF NOT EXISTS filters_counter_rule_update
+AFTER UPDATE OF name, pattern, target, is_active ON filters BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'filters';
+END;
+
+CREATE TRIGGER IF NOT EXISTS filters_counter_delete AFTER DELETE ON filters BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'filters';
+END;
+
+-- Membership of the unread set: new and deleted articles, read and saved
+-- state. Title and summary text never change after insert.
+CREATE TRIGGER IF NOT EXISTS articles_counter_insert AFTER INSERT ON articles BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'articles';
+END;
+
+CREATE TRIGGER IF NOT EXISTS articles_counter_delete AFTER DELETE ON articles BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'articles';
+END;
+
+CREATE TRIGGER IF NOT EXISTS articles_counter_state
+AFTER UPDATE OF is_read, is_saved ON articles
+WHEN old.is_read IS NOT new.is_read OR old.is_saved IS NOT new.is_saved BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'articles';
+END;
+
+-- Match rows, including those removed by cascades from articles and feeds.
+CREATE TRIGGER IF NOT EXISTS filter_matches_counter_insert AFTER INSERT ON filter_matches BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'filter_matches';
+END;
+
+CREATE TRIGGER IF NOT EXISTS filter_matches_counter_delete AFTER DELETE ON filter_matches BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'filter_matches';
+END;
+
+-- Feed membership and visibility; fetch bookkeeping doesn't count.
+CREATE TRIGGER IF NOT EXISTS feeds_counter_insert AFTER INSERT ON feeds BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'feeds';
+END;
+
+CREATE TRIGGER IF NOT EXISTS feeds_counter_delete AFTER DELETE ON feeds BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'feeds';
+END;
+
+CREATE TRIGGER IF NOT EXISTS feeds_counter_hidden
+AFTER UPDATE OF hidden ON feeds WHEN old.hidden IS NOT new.hidden BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'feeds';
+END;
+
+-- What the sidebar and /api/feeds show about a feed besides visibility.
+-- Kept apart from 'feeds' so fetch errors don't rebuild the filtered badge.
+CREATE TRIGGER IF NOT EXISTS feeds_counter_status
+AFTER UPDATE OF title, url, site_url, fetch_error_count, last_error, unsubscribed ON feeds
+WHEN old.title IS NOT new.title OR old.url IS NOT new.url
+    OR old.site_url IS NOT new.site_url
+    OR old.fetch_error_count IS NOT new.fetch_error_count
+    OR old.last_error IS NOT new.last_error
+    OR old.unsubscribed IS NOT new.unsubscribed BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'feed_status';
+END;
+"""
+
+# Keeps filters.evaluated_through honest (see filter_service.reapply_all_filters);
+# created after migrations since it depends on that column.
+# Articles reapply must evaluate although they sit below a filter's
+# evaluated_through: unsaved since a pass skipped them while saved
+# (filter_id 0, every filter), or taken out of one filter's matches by
+# filter_service.remove_filter_match (that filter only).
+FILTER_RECHECK_TABLE = """
+CREATE TABLE IF NOT EXISTS filter_recheck (
+    article_id INTEGER NOT NULL,
+    filter_id INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (article_id, filter_id),
+    FOREIGN KEY (article_id) REFERENCES articles(id) ON DELETE CASCADE
+);
+"""
+
+FILTER_TRACKING_SCHEMA = FILTER_RECHECK_TABLE + """
+CREATE TRIGGER IF NOT EXISTS articles_unsaved_recheck
+AFTER UPDATE OF is_saved ON articles
+WHEN old.is_saved = 1 AND new.is_saved = 0 BEGIN
+    INSERT OR IGNORE INTO filter_recheck (article_id) VALUES (new.id);
+END;
+"""
+
+# Article change log behind /api/sync; see src/app/services/sync_service.py.
+# AUTOINCREMENT keeps seq monotonic across compaction, and rolled-back
+# inserts roll back sqlite_sequence too, so retained seqs are contiguous.
+SYNC_SCHEMA = """
+CREATE TABLE IF NOT EXISTS article_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    article_id INTEGER NOT NULL,
+    kind TEXT NOT NULL CHECK (kind IN ('insert', 'update', 'delete')),
+    changed_at INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_article_changes_time ON article_changes(changed_at);
+
+CREATE TRIGGER IF NOT EXISTS articles_change_insert AFTER INSERT ON articles BEGIN
+    INSERT INTO article_changes (article_id, kind, changed_at)
+    VALUES (new.id, 'insert', CAST(strftime('%s', 'now') AS INTEGER));
+END;
+
+CREATE TRIGGER IF NOT EXISTS articles_change_delete AFTER DELETE ON articles BEGIN
+    INSERT INTO article_changes (article_id, kind, changed_at)
+    VALUES (old.id, 'delete', CAST(strftime('%s', 'now') AS INTEGER));
+END;
+
+CREATE TRIGGER IF NOT EXISTS articles_change_state
+AFTER UPDATE OF is_read, is_saved ON articles
+WHEN old.is_read IS NOT new.is_read OR old.is_saved IS NOT new.is_saved BEGIN
+    INSERT INTO article_changes (article_id, kind, changed_at)
+    VALUES (new.id, 'update', CAST(strftime('%s', 'now') AS INTEGER));
+END;
+
+-- Last seq each sync client confirmed it holds; compaction keeps what the
+-- slowest recently seen client still needs.
+CREATE TABLE IF NOT EXISTS sync_cursors (
+    client_id TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    seen_at INTEGER NOT NULL
+);
+"""
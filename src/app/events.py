@@ -0,0 +1,116 @@
+"""Change notifications for /api/events (Server-Sent Events).
+
+Every open stream in a process shares one ChangeFeed per database. While at
+least one stream is subscribed, a background thread reads the head of the
+article change log (sqlite_sequence for article_changes, see SYNC_SCHEMA)
+every SSE_POLL_SECONDS. That is one indexed lookup per process however many
+clients are connected, and it moves whenever the scheduler ingests articles
+or any worker writes read or saved state. Only when it moves does the
+thread count unread articles and new articles per feed, once, and wake the
+streams. With no subscribers the thread exits.
+
+Streams hold a request thread, not a process: gunicorn runs gthread
+workers (entrypoint.sh) and each process accepts at most SSE_MAX_STREAMS of
+them, leaving the remaining threads for ordinary requests.
+"""
+import logging
+import sqlite3
+import threading
+from collections import Counter
+
+from flask import Flask, current_app
+
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeFeed:
+    def __init__(self, app: Flask, interval: float, max_streams: int):
+        self.app = app
+        self.interval = interval
+        self.max_streams = max_streams
+        self._cond = threading.Condition()
+        self._subscribers = 0
+        self._thread: threading.Thread | None = None
+        self._version = 0
+        self._snapshot: dict | None = None
+
+    def subscribe(self) -> bool:
+        """Register a stream; False once max_streams are open."""
+        with self._cond:
+            if self._subscribers >= self.max_streams:
+                return False
+            self._subscribers += 1
+            if self._thread is None:
+                # A fresh thread starts counting from scratch, so no
+                # snapshot from an earlier run may leak into it.
+                self._version = 0
+                self._snapshot = None
+                self._thread = threading.Thread(target=self._run, daemon=True,
+                                                name="change-feed")
+                self._thread.start()
+            return True
+
+    def unsubscribe(self) -> None:
+        with self._cond:
+            self._subscribers -= 1
+            self._cond.notify_all()
+
+    def wait(self, after_version: int, timeout: float) -> tuple[int, dict] | None:
+        """Block until a snapshot newer than after_version is published, or
+        timeout passes (None).
+
+        A snapshot is {"seq", "counts", "inserted"}: the change-log head,
+        sync_service.get_counts(), and articles inserted per feed since the
+        thread started, which streams difference to report what's new.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._version > after_version, timeout):
+                return None
+            return self._version, self._snapshot
+
+    def _run(self) -> None:
+        from src.app.services import sync_service
+
+        seq = None
+        inserted: Counter = Counter()
+        with self.app.app_context():
+            while True:
+                with self._cond:
+                    if self._subscribers <= 0:
+                        self._thread = None
+                        return
+                try:
+                    head = sync_service.current_seq()
+                    if head != seq:
+                        if seq is not None:
+                            inserted.update(sync_service.count_inserted_since(seq, head))
+                        snapshot = {"seq": head, "counts": sync_service.get_counts(),
+                                    "inserted": dict(inserted)}
+                        seq = head
+                        with self._cond:
+                            self._version += 1
+                            self._snapshot = snapshot
+                            self._cond.notify_all()
+                except sqlite3.Error:
+                    logger.exception("Change feed poll failed")
+                with self._cond:
+                    self._cond.wait_for(lambda: self._subscribers <= 0, self.interval)
+
+
+_feeds: dict[str, ChangeFeed] = {}
+_feeds_lock = threading.Lock()
+
+
+def get_feed() -> ChangeFeed:
+    """This process's change feed for the app's database."""
+    path = current_app.config["DATABASE"]
+    with _feeds_lock:
+        feed = _feeds.get(path)
+        if feed is None:
+            feed = _feeds[path] = ChangeFeed(
+                current_app._get_current_object(),
+                current_app.config["SSE_POLL_SECONDS"],
+                current_app.config["SSE_MAX_STREAMS"],
+            )
+        return feed
@@ -0,0 +1,541 @@
+"""Evaluate many filters over many articles without running every regex on
+every article.
+
+Each filter's pattern is parsed for literals that any match must contain
+(for ``\\b(deal|sale)s?\\b`` that is {"deal", "sale"}). A batch of articles is
+case-folded and joined into one string per field, every literal is located
+there with str.find, and the full regex runs only on articles that contain
+one of its filter's literals. Filters with no usable literal (``^\\d+$``)
+still run on every article. Because a match can never occur without one of
+its required literals, results are identical to searching each article
+with each pattern.
+
+match() can also report what each filter cost: articles evaluated, matches
+and seconds, accumulated into a FilterCosts dict by filter id.
+"""
+import copy
+import re
+import time
+from bisect import bisect_right
+from math import gcd
+from typing import Callable, Iterable, Sequence
+
+from src.app.models import Filter
+from src.app.textnorm import fold_case
+
+try:
+    from re import _parser as _sre_parse
+    from re import _constants as _sre
+except ImportError:  # Python < 3.11
+    import sre_parse as _sre_parse
+    import sre_constants as _sre
+
+
+_SEPARATOR = "\x00"
+_REPEATS = {_sre.MAX_REPEAT, _sre.MIN_REPEAT, getattr(_sre, "POSSESSIVE_REPEAT", _sre.MAX_REPEAT)}
+_ATOMIC_GROUP = getattr(_sre, "ATOMIC_GROUP", None)
+
+
+def required_literals(pattern: re.Pattern) -> frozenset[str] | None:
+    """Case-folded strings of which every match of pattern contains at least
+    one, or None if no such set can be derived."""
+    try:
+        parsed = _sre_parse.parse(pattern.pattern, pattern.flags)
+    except Exception:
+        return None
+    literals = _sequence_literals(list(parsed))
+    if literals is None or any(not s or _SEPARATOR in s for s in literals):
+        return None
+    return literals
+
+
+def _selectivity(literals: frozenset[str]) -> tuple[int, int]:
+    return min(len(s) for s in literals), -len(literals)
+
+
+def _sequence_literals(items) -> frozenset[str] | None:
+    """Best requirement of a concatenation: every element must match, so any
+    one element's requirement holds for the whole; pick the most selective."""
+    best = None
+    run = []
+
+    def consider(literals):
+        nonlocal best
+        if literals and (best is None or _selectivity(literals) > _selectivity(best)):
+            best = literals
+
+    for op, av in items:
+        if op is _sre.LITERAL:
+            run.append(chr(av))
+            continue
+        if op is _sre.AT:
+            # Zero-width: text on either side is still contiguous.
+            continue
+        if run:
+            consider(frozenset([fold_case("".join(run))]))
+            run = []
+        consider(_element_literals(op, av))
+    if run:
+        consider(frozenset([fold_case("".join(run))]))
+    return best
+
+
+def _element_literals(op, av) -> frozenset[str] | None:
+    if op is _sre.SUBPATTERN:
+        return _sequence_literals(list(av[-1]))
+    if _ATOMIC_GROUP is not None and op is _ATOMIC_GROUP:
+        return _sequence_literals(list(av))
+    if op in _REPEATS:
+        low, _, item = av
+        return _sequence_literals(list(item)) if low >= 1 else None
+    if op is _sre.BRANCH:
+        alternatives = [_sequence_literals(list(alt)) for alt in av[1]]
+        if any(a is None for a in alternatives):
+            return None
+        return frozenset().union(*alternatives)
+    if op is _sre.IN and all(item_op is _sre.LITERAL for item_op, _ in av):
+        # A class of plain characters, e.g. (a|b) compiled down to [ab].
+        return frozenset(fold_case(chr(c)) for _, c in av)
+    return None
+
+
+_POSSESSIVE_REPEAT = getattr(_sre, "POSSESSIVE_REPEAT", None)
+# Widest character range checked member by member for compile_pattern.
+_MAX_CHECKED_RANGE = 256
+
+
+def compile_pattern(pattern: str) -> re.Pattern:
+    """Compile a filter pattern for matching against textnorm.match_text.
+
+    Match text is already case-folded, so IGNORECASE only matters when the
+    pattern has characters folding would change (``Python``, ``[A-Z]``) or
+    sets case flags itself. Otherwise the pattern is compiled without it,
+    which lets re compare characters directly and use its literal-prefix
+    search.
+    """
+    try:
+        parsed = _sre_parse.parse(pattern)
+    except Exception:
+        return re.compile(pattern, re.IGNORECASE)
+    if _is_folded(list(parsed)):
+        return re.compile(pattern)
+    return re.compile(pattern, re.IGNORECASE)
+
+
+def _is_folded_char(code: int) -> bool:
+    return fold_case(chr(code)) == chr(code)
+
+
+def _is_folded(items) -> bool:
+    for op, av in items:
+        if op in (_sre.LITERAL, _sre.NOT_LITERAL):
+            if not _is_folded_char(av):
+                return False
+        elif op is _sre.IN:
+            for item_op, item_av in av:
+                if item_op is _sre.LITERAL and not _is_folded_char(item_av):
+                    return False
+                if item_op is _sre.RANGE:
+                    low, high = item_av
+                    if high - low > _MAX_CHECKED_RANGE or not all(
+                        _is_folded_char(c) for c in range(low, high + 1)
+                    ):
+                        return False
+        elif op is _sre.SUBPATTERN:
+            _, add_flags, del_flags, sub = av
+            if (add_flags | del_flags) & re.IGNORECASE or not _is_folded(list(sub)):
+                return False
+        elif op in _REPEATS:
+            if not _is_folded(list(av[2])):
+                return False
+        elif op is _sre.BRANCH:
+            if not all(_is_folded(list(alt)) for alt in av[1]):
+                return False
+        elif op in (_sre.ASSERT, _sre.ASSERT_NOT):
+            if not _is_folded(list(av[1])):
+                return False
+        elif _ATOMIC_GROUP is not None and op is _ATOMIC_GROUP:
+            if not _is_folded(list(av)):
+                return False
+        elif op is _sre.GROUPREF_EXISTS:
+            if not all(branch is None or _is_folded(list(branch)) for branch in av[1:]):
+                return False
+    return True
+
+
+# Targets the match index covers; content isn't in it.
+_FTS_TARGETS = frozenset({"title", "summary", "both"})
+# The trigram tokenizer can't look up anything shorter.
+_FTS_MIN_LITERAL = 3
+
+
+def fts_query(pattern: re.Pattern, target: str) -> str | None:
+    """An FTS5 query for database.MATCH_INDEX_SCHEMA whose hits include
+    every article pattern matches in target, or None if there's no such
+    query.
+
+    The index records only which articles hold each trigram of their
+    match text (detail=none: no positions, no columns), so a literal is
+    looked up as all of its trigrams, in either column. The query asks for
+    any of the pattern's required_literals, which is the prefilter
+    FilterEngine applies in Python, so hits still need the regex.
+    ``\\b(deal|promo)\\b`` becomes ``(("dea" AND "eal") OR ("omo" AND "pro"
+    AND "rom"))``; ``^\\d+$`` and literals under three characters have no
+    query.
+    """
+    literals = required_literals(pattern)
+    if (target not in _FTS_TARGETS or not literals
+            or any(len(s) < _FTS_MIN_LITERAL for s in literals)):
+        return None
+    terms = []
+    for literal in sorted(literals):
+        trigrams = sorted({literal[i:i + 3] for i in range(len(literal) - 2)})
+        quoted = ['"' + t.replace('"', '""') + '"' for t in trigrams]
+        terms.append(quoted[0] if len(quoted) == 1 else "(" + " AND ".join(quoted) + ")")
+    return "(" + " OR ".join(terms) + ")"
+
+
+def has_nested_quantifier(pattern: str) -> bool:
+    """Whether pattern repeats a group that itself contains an unbounded
+    quantifier, e.g. ``(a+)+`` or ``(\\w+\\s?)*``, or repeats without bound
+    alternatives that can match the same text, where one branch matches a
+    prefix of another's match, e.g. ``(a|aa)+`` or ``(\\d|\\d\\d)+``. Such
+    patterns can backtrack exponentially on a near-miss. Possessive
+    quantifiers and atomic groups don't backtrack and are allowed."""
+    try:
+        parsed = _sre_parse.parse(pattern)
+    except Exception:
+        return False
+    return _nests_quantifier(list(parsed), inside_repeat=False, unbounded=False)
+
+
+def _nests_quantifier(items, inside_repeat: bool, unbounded: bool) -> bool:
+    for op, av in items:
+        if op in (_sre.MAX_REPEAT, _sre.MIN_REPEAT):
+            low, high, item = av
+            if inside_repeat and high == _sre.MAXREPEAT:
+                return True
+            if _nests_quantifier(list(item), inside_repeat or high > 1,
+                                 unbounded or high == _sre.MAXREPEAT):
+                return True
+        elif op is _sre.SUBPATTERN:
+            if _nests_quantifier(list(av[-1]), inside_repeat, unbounded):
+                return True
+        elif op is _sre.BRANCH:
+            if unbounded and _has_overlapping_branches(av[1]):
+                return True
+            if any(_nests_quantifier(list(alt), inside_repeat, unbounded) for alt in av[1]):
+                return True
+        elif op in (_sre.ASSERT, _sre.ASSERT_NOT):
+            if _nests_quantifier(list(av[1]), inside_repeat, unbounded):
+                return True
+        elif op is _sre.GROUPREF_EXISTS:
+            if any(branch is not None and _nests_quantifier(list(branch), inside_repeat, unbounded)
+                   for branch in av[1:]):
+                return True
+    return False
+
+
+# Longest fixed repeat ({n}) spelled out when comparing alternatives.
+_MAX_UNROLLED_REPEAT = 16
+_CATEGORIES = {
+    _sre.CATEGORY_DIGIT: str.isdecimal,
+    _sre.CATEGORY_SPACE: str.isspace,
+    _sre.CATEGORY_WORD: lambda ch: ch.isalnum() or ch == "_",
+}
+_NEGATED_CATEGORIES = {
+    _sre.CATEGORY_NOT_DIGIT: _sre.CATEGORY_DIGIT,
+    _sre.CATEGORY_NOT_SPACE: _sre.CATEGORY_SPACE,
+    _sre.CATEGORY_NOT_WORD: _sre.CATEGORY_WORD,
+}
+
+
+def _has_overlapping_branches(alternatives) -> bool:
+    """Whether two alternatives agree character by character for as long as
+    both are known, so the shorter one can match a prefix of the other's
+    match. sre_parse factors out a shared prefix first, which turns
+    ``a|aa`` into ``a(?:|a)``: an empty alternative overlaps everything."""
+    sequences = []
+    for alt in alternatives:
+        chars: list = []
+        _leading_chars(list(alt), chars)
+        sequences.append(chars)
+    # Latin-1 plus every literal the alternatives name stands in for the
+    # characters two sets could share.
+    probes = {chr(code) for code in range(256)}
+    for chars in sequences:
+        for op, av in chars:
+            if op is _sre.LITERAL:
+                probes.add(chr(av))
+            elif op is _sre.IN:
+                probes.update(chr(v) for o, v in av if o is _sre.LITERAL)
+    for i, first in enumerate(sequences):
+        for second in sequences[i + 1:]:
+            if all(any(_char_matches(a, ch) and _char_matches(b, ch) for ch in probes)
+                   for a, b in zip(first, second)):
+                return True
+    return False
+
+
+def _leading_chars(items, into: list) -> bool:
+    """Append the single-character matchers items consume one after another
+    to into. Zero-width items are skipped. Returns False where items stop
+    being such a fixed sequence (a variable repeat, a nested branch, a
+    backreference); what follows is unknown."""
+    for op, av in items:
+        if op in (_sre.LITERAL, _sre.NOT_LITERAL, _sre.ANY, _sre.IN):
+            into.append((op, av))
+        elif op in (_sre.AT, _sre.ASSERT, _sre.ASSERT_NOT):
+            continue
+        elif op is _sre.SUBPATTERN:
+            if not _leading_chars(list(av[-1]), into):
+                return False
+        elif op in _REPEATS and av[0] == av[1] and av[0] <= _MAX_UNROLLED_REPEAT:
+            for _ in range(av[0]):
+                if not _leading_chars(list(av[2]), into):
+                    return False
+        else:
+            return False
+    return True
+
+
+def _char_matches(matcher, ch: str) -> bool:
+    # Filters may run with IGNORECASE, so either case of ch counts.
+    return any(_char_in(matcher, variant) for variant in (ch, ch.lower(), ch.upper())
+               if len(variant) == 1)
+
+
+def _char_in(matcher, ch: str) -> bool:
+    op, av = matcher
+    code = ord(ch)
+    if op is _sre.LITERAL:
+        return code == av
+    if op is _sre.NOT_LITERAL:
+        return code != av
+    if op is _sre.ANY:
+        return True
+    negate = bool(av) and av[0][0] is _sre.NEGATE
+    for item_op, item_av in av:
+        if item_op is _sre.LITERAL:
+            hit = code == item_av
+        elif item_op is _sre.RANGE:
+            hit = item_av[0] <= code <= item_av[1]
+        elif item_op is _sre.CATEGORY:
+            if item_av in _NEGATED_CATEGORIES:
+                hit = not _CATEGORIES[_NEGATED_CATEGORIES[item_av]](ch)
+            else:
+                hit = _CATEGORIES.get(item_av, lambda _: True)(ch)
+        else:
+            continue
+        if hit:
+            return not negate
+    return negate
+
+
+# filter_id -> [articles evaluated, matches, seconds]
+FilterCosts = dict[int, list]
+
+
+def add_costs(into: FilterCosts, costs: FilterCosts) -> None:
+    for filter_id, (evaluations, matches, seconds) in costs.items():
+        entry = into.setdefault(filter_id, [0, 0, 0.0])
+        entry[0] += evaluations
+        entry[1] += matches
+        entry[2] += seconds
+
+
+_TARGET_FIELDS = {"both": ("title", "summary"), "any": ("title", "summary", "content")}
+# Targets that need the article's content text.
+CONTENT_TARGETS = frozenset({"content", "any"})
+
+
+def _field_names(target: str) -> tuple[str, ...]:
+    return _TARGET_FIELDS.get(target, (target,))
+
+
+class _Rule:
+    __slots__ = ("filter_id", "target", "compiled", "literals")
+
+    def __init__(self, filter_id: int, target: str, compiled: re.Pattern):
+        self.filter_id = filter_id
+        self.target = target
+        self.compiled = compiled
+        self.literals = required_literals(compiled)
+
+
+class _FoldedField:
+    """One field of a batch, folded and joined so each literal is located in
+    a single pass over the batch."""
+
+    def __init__(self, values: Sequence[str]):
+        self.starts = []
+        offset = 0
+        parts = []
+        for value in values:
+            folded = fold_case(value)
+            self.starts.append(offset)
+            parts.append(folded)
+            offset += len(folded) + 1
+        self.text = _SEPARATOR.join(parts)
+
+    def articles_containing(self, literal: str, into: set[int]) -> None:
+        starts = self.starts
+        count = len(starts)
+        pos = self.text.find(literal)
+        while pos != -1:
+            index = bisect_right(starts, pos) - 1
+            into.add(index)
+            if index + 1 >= count:
+                break
+            pos = self.text.find(literal, starts[index + 1])
+
+
+class ArticleBatch:
+    """(id, title, summary[, content]) articles prepared for FilterEngine.
+    Folded fields are built on first use and kept, so a batch matched
+    repeatedly (the unread preview corpus) is folded once. Articles given
+    without content have empty content."""
+
+    def __init__(self, articles: Sequence[tuple]):
+        self.ids = [a[0] for a in articles]
+        self.titles = [a[1] or "" for a in articles]
+        self.summaries = [a[2] or "" for a in articles]
+        self.contents = [(a[3] if len(a) > 3 else None) or "" for a in articles]
+        self._fields: dict[str, _FoldedField] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def with_contents(self, contents: Sequence[str]) -> "ArticleBatch":
+        """A copy with contents added, reusing this batch's folded title and
+        summary. The copy's own folding isn't kept here."""
+        batch = copy.copy(self)
+        batch.contents = list(contents)
+        batch._fields = {name: f for name, f in self._fields.items() if name != "content"}
+        return batch
+
+    def texts(self, name: str) -> list[str]:
+        return {"title": self.titles, "summary": self.summaries, "content": self.contents}[name]
+
+    def field(self, name: str) -> _FoldedField:
+        if name not in self._fields:
+            self._fields[name] = _FoldedField(self.texts(name))
+        return self._fields[name]
+
+
+# Batches are visited in a stride permutation when counting under a
+# deadline, so a partial count samples the whole corpus, not just its start.
+_SAMPLE_STRIDES = (7919, 7907, 7901)
+
+
+class FilterEngine:
+    """Compiled set of active filters, evaluated filter by filter over a
+    batch of (id, title, summary) articles."""
+
+    def __init__(self, compiled_filters: list[tuple[Filter, re.Pattern]]):
+        self.compiled_filters = tuple(compiled_filters)
+        self.rules = [_Rule(f.id, f.target, compiled) for f, compiled in compiled_filters]
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    @property
+    def needs_content(self) -> bool:
+        return any(rule.target in CONTENT_TARGETS for rule in self.rules)
+
+    def subset(self, filter_ids: Iterable[int]) -> "FilterEngine":
+        """An engine over some of these filters, reusing their parsed rules."""
+        wanted = set(filter_ids)
+        engine = copy.copy(self)
+        engine.compiled_filters = tuple(cf for cf in self.compiled_filters if cf[0].id in wanted)
+        engine.rules = [rule for rule in self.rules if rule.filter_id in wanted]
+        return engine
+
+    def match(self, articles: Sequence[tuple[int, str | None, str | None]] | ArticleBatch,
+              costs: FilterCosts | None = None) -> list[tuple[int, int]]:
+        """Return (article_id, filter_id) for every article each filter
+        matches, with the same semantics as article_matches_filter.
+
+        If costs is given, each filter's evaluations, matches and time are
+        added to it. Folding the batch is shared by every filter and is
+        done up front, so it isn't charged to whichever filter ran first.
+        """
+        if not self.rules or not articles:
+            return []
+        batch = articles if isinstance(articles, ArticleBatch) else ArticleBatch(articles)
+        if costs is not None:
+            for name in {name for rule in self.rules if rule.literals is not None
+                         for name in _field_names(rule.target)}:
+                batch.field(name)
+
+        pairs = []
+        for rule in self.rules:
+            started = time.perf_counter()
+            before = len(pairs)
+            for i in sorted(self._candidates(rule, batch)):
+                if self._matches(rule, batch, i):
+                    pairs.append((batch.ids[i], rule.filter_id))
+            if costs is not None:
+                entry = costs.setdefault(rule.filter_id, [0, 0, 0.0])
+                entry[0] += len(batch)
+                entry[1] += len(pairs) - before
+                entry[2] += time.perf_counter() - started
+        return pairs
+
+    def count_matches(self, batches: Sequence[ArticleBatch],
+                      deadline: float | None = None,
+                      prepare: Callable[[ArticleBatch], ArticleBatch] | None = None,
+                      match: Callable[[ArticleBatch], list[tuple[int, int]]] | None = None
+                      ) -> tuple[int, bool]:
+        """Count articles in batches matched by any filter.
+
+        With a time.monotonic() deadline, batches are counted in a spread
+        order until it passes; the count is then extrapolated from the
+        articles covered and returned with approximate=True. prepare, if
+        given, is applied to each batch as it's reached (to load content).
+        match, if given, stands in for self.match on each batch (to run it
+        in another process).
+        """
+        total = sum(len(batch) for batch in batches)
+        stride = next((s for s in _SAMPLE_STRIDES if gcd(s, len(batches)) == 1), 1)
+        matched = covered = 0
+        for n in range(len(batches)):
+            if deadline is not None and covered and time.monotonic() > deadline:
+                return round(matched * total / covered), True
+            batch = batches[n * stride % len(batches)]
+            if prepare is not None:
+                batch = prepare(batch)
+            if match is not None:
+                matched += len({article_id for article_id, _ in match(batch)})
+                covered += len(batch)
+                continue
+            candidates = set()
+            for rule in self.rules:
+                candidates |= self._candidates(rule, batch)
+            matched += sum(
+                1 for i in candidates
+                if any(self._matches(rule, batch, i) for rule in self.rules)
+            )
+            covered += len(batch)
+        return matched, False
+
+    def _candidates(self, rule: _Rule, batch: ArticleBatch) -> set[int]:
+        if rule.literals is None:
+            return set(range(len(batch)))
+        hits = set()
+        for name in _field_names(rule.target):
+            folded = batch.field(name)
+            for literal in rule.literals:
+                folded.articles_containing(literal, hits)
+        return hits
+
+    @staticmethod
+    def _matches(rule: _Rule, batch: ArticleBatch, i: int) -> bool:
+        search = rule.compiled.search
+        if rule.target == "title":
+            return bool(search(batch.titles[i]))
+        if rule.target == "summary":
+            return bool(search(batch.summaries[i]))
+        if rule.target == "both":
+            return bool(search(batch.titles[i]) or search(batch.summaries[i]))
+        return any(search(batch.texts(name)[i]) for name in _field_names(rule.target))
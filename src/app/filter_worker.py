@@ -0,0 +1,132 @@
+"""Run filter matching in child processes that can be killed.
+
+A regex stuck backtracking can't be interrupted from Python, so saved
+filters are evaluated in a long-lived worker process spawned on first use.
+If a call overruns its timeout the worker is killed and replaced on the
+next call; the caller gets FilterTimeout. Bulk evaluations can also be
+spread over a short-lived pool of such processes (iter_pool_matches).
+"""
+import multiprocessing
+import os
+import threading
+import time
+from typing import Iterator, Sequence
+
+from src.app.filter_engine import FilterCosts, FilterEngine, compile_pattern
+from src.app.models import Filter
+
+
+# Seconds to wait for a freshly spawned worker to import and report ready.
+STARTUP_TIMEOUT_SECONDS = 30
+# Engines kept compiled in the worker, keyed by their filters.
+_ENGINE_CACHE_SIZE = 8
+
+
+class FilterTimeout(Exception):
+    """Matching didn't finish in time (or the worker died trying)."""
+
+
+def _engine_key(engine: FilterEngine) -> tuple:
+    return tuple((f.id, f.pattern, f.target) for f, _ in engine.compiled_filters)
+
+
+_engines: dict[tuple, FilterEngine] = {}
+
+
+def _match(key: tuple, articles) -> tuple[list[tuple[int, int]], FilterCosts]:
+    engine = _engines.get(key)
+    if engine is None:
+        if len(_engines) >= _ENGINE_CACHE_SIZE:
+            _engines.pop(next(iter(_engines)))
+        engine = _engines[key] = FilterEngine([
+            (Filter(id=filter_id, name="", pattern=pattern, target=target),
+             compile_pattern(pattern))
+            for filter_id, pattern, target in key
+        ])
+    costs = {}
+    return engine.match(articles, costs), costs
+
+
+def _serve(conn) -> None:
+    conn.send("ready")
+    while True:
+        try:
+            key, articles = conn.recv()
+        except EOFError:
+            return
+        conn.send(_match(key, articles))
+
+
+def iter_pool_matches(jobs: Sequence[tuple[FilterEngine, list]], processes: int,
+                      timeout: float) -> Iterator[tuple[list[tuple[int, int]], FilterCosts]]:
+    """(engine.match(batch), costs) for each (engine, batch) job, yielded in
+    order, using a pool of processes spawned for this call.
+
+    timeout bounds each job once its turn in the pool comes up. The first
+    job to overrun raises FilterTimeout and the pool is killed; results
+    already yielded stay valid.
+    """
+    processes = max(1, min(processes, len(jobs)))
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes) as pool:
+        pending = [pool.apply_async(_match, (_engine_key(engine), batch)) for engine, batch in jobs]
+        start = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+        for i, result in enumerate(pending):
+            deadline = start + timeout * (i // processes + 1)
+            try:
+                yield result.get(max(0.0, deadline - time.monotonic()))
+            except multiprocessing.TimeoutError:
+                raise FilterTimeout(f"job {i} not done within {timeout:g}s") from None
+
+
+class FilterWorker:
+    def __init__(self):
+        self._process = None
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def match(self, engine: FilterEngine,
+              articles: Sequence[tuple[int, str | None, str | None]],
+              timeout: float) -> tuple[list[tuple[int, int]], FilterCosts]:
+        """(engine.match(articles), costs), evaluated in the worker process."""
+        with self._lock:
+            conn = self._ensure_started()
+            try:
+                conn.send((_engine_key(engine), list(articles)))
+                if conn.poll(timeout):
+                    return conn.recv()
+            except (EOFError, OSError):
+                pass
+            self._stop()
+            raise FilterTimeout(f"no result within {timeout:g}s")
+
+    def _ensure_started(self):
+        # A worker inherited through fork belongs to the parent; start our own.
+        if self._process is not None and self._pid == os.getpid() and self._process.is_alive():
+            return self._conn
+        self._stop()
+        context = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = context.Pipe()
+        process = context.Process(target=_serve, args=(child_conn,), daemon=True,
+                                  name="filter-worker")
+        process.start()
+        child_conn.close()
+        try:
+            ready = parent_conn.poll(STARTUP_TIMEOUT_SECONDS) and parent_conn.recv() == "ready"
+        except EOFError:
+            ready = False
+        if not ready:
+            process.kill()
+            process.join()
+            parent_conn.close()
+            raise FilterTimeout("filter worker didn't start")
+        self._process, self._conn, self._pid = process, parent_conn, os.getpid()
+        return parent_conn
+
+    def _stop(self) -> None:
+        if self._process is not None and self._pid == os.getpid():
+            self._process.kill()
+            self._process.join()
+            self._conn.close()
+        self._process = self._conn = self._pid = None
@@ -1,26 +1,45 @@
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
 
+from src.app.compression import decompress_text
 
-def parse_datetime(value: str | None) -> datetime | None:
-    if not value:
+
+def parse_datetime(value: int | str | None) -> datetime | None:
+    """Epoch seconds (or legacy ISO text) to an aware UTC datetime."""
+    if value is None or value == "":
         return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc)
     try:
         return datetime.fromisoformat(value)
     except (ValueError, TypeError):
         return None
 
 
-@dataclass
+def epoch_to_iso(value: int | None) -> str | None:
+    """JSON form of a stored timestamp."""
+    dt = parse_datetime(value)
+    return dt.isoformat() if dt else None
+
+
+def _optional(keys, name: str):
+    """Row getter for a column only some queries select, resolved once per
+    result set rather than once per row."""
+    if name in keys:
+        return lambda row: row[name]
+    return lambda row: None
+
+
+@dataclass(slots=True)
 class Feed:
     id: int | None
     url: str
     title: str | None = None
     site_url: str | None = None
-    last_fetched: datetime | None = None
+    last_fetched_ts: int | None = None
     fetch_error_count: int = 0
     last_error: str | None = None
-    created_at: datetime | None = None
+    created_ts: int | None = None
     unread_count: int = 0
     etag: str | None = None
     last_modified: str | None = None
@@ -29,67 +48,107 @@ class Feed:
 
     @classmethod
     def from_row(cls, row) -> "Feed":
-        keys = row.keys()
-        return cls(
-            id=row["id"],
-            url=row["url"],
-            title=row["title"],
-            site_url=row["site_url"],
-            last_fetched=parse_datetime(row["last_fetched"]),
-            fetch_error_count=row["fetch_error_count"],
-            last_error=row["last_error"],
-            created_at=parse_datetime(row["created_at"]),
-            unread_count=row["unread_count"] if "unread_count" in keys else 0,
-            etag=row["etag"] if "etag" in keys else None,
-            last_modified=row["last_modified"] if "last_modified" in keys else None,
-            hidden=bool(row["hidden"]) if "hidden" in keys else False,
-            unsubscribed=bool(row["unsubscribed"]) if "unsubscribed" in keys else False,
-        )
+        return cls.from_rows([row])[0]
+
+    @classmethod
+    def from_rows(cls, rows) -> list["Feed"]:
+        if not rows:
+            return []
+        keys = rows[0].keys()
+        unread = _optional(keys, "unread_count")
+        etag = _optional(keys, "etag")
+        last_modified = _optional(keys, "last_modified")
+        hidden = _optional(keys, "hidden")
+        unsubscribed = _optional(keys, "unsubscribed")
+        return [
+            cls(
+                row["id"], row["url"], row["title"], row["site_url"],
+                row["last_fetched"], row["fetch_error_count"], row["last_error"],
+                row["created_at"], unread(row) or 0, etag(row), last_modified(row),
+                bool(hidden(row)), bool(unsubscribed(row)),
+            )
+            for row in rows
+        ]
 
+    @property
+    def last_fetched(self) -> datetime | None:
+        return parse_datetime(self.last_fetched_ts)
 
-@dataclass
+    @property
+    def created_at(self) -> datetime | None:
+        return parse_datetime(self.created_ts)
+
+
+@dataclass(slots=True)
 class Article:
+    """An article row. summary and content are kept as stored (possibly
+    compressed) and decoded on first access; dates stay epoch seconds until a
+    view formats them."""
     id: int | None
     feed_id: int
     guid: str
     title: str | None = None
-    summary: str | None = None
-    content: str | None = None
+    _summary: str | bytes | None = None
+    _content: str | bytes | None = None
     url: str | None = None
     image_url: str | None = None
-    published_at: datetime | None = None
+    published_ts: int | None = None
     is_read: bool = False
     is_saved: bool = False
-    created_at: datetime | None = None
+    created_ts: int | None = None
     feed_title: str | None = None
 
     @classmethod
     def from_row(cls, row) -> "Article":
-        return cls(
-            id=row["id"],
-            feed_id=row["feed_id"],
-            guid=row["guid"],
-            title=row["title"],
-            summary=row["summary"],
-            content=row["content"],
-            url=row["url"],
-            image_url=row["image_url"] if "image_url" in row.keys() else None,
-            published_at=parse_datetime(row["published_at"]),
-            is_read=bool(row["is_read"]),
-            is_saved=bool(row["is_saved"]),
-            created_at=parse_datetime(row["created_at"]),
-            feed_title=row["feed_title"] if "feed_title" in row.keys() else None
-        )
+        return cls.from_rows([row])[0]
+
+    @classmethod
+    def from_rows(cls, rows) -> list["Article"]:
+        if not rows:
+            return []
+        keys = rows[0].keys()
+        image_url = _optional(keys, "image_url")
+        feed_title = _optional(keys, "feed_title")
+        return [
+            cls(
+                row["id"], row["feed_id"], row["guid"], row["title"],
+                row["summary"], row["content"], row["url"], image_url(row),
+                row["published_at"], bool(row["is_read"]), bool(row["is_saved"]),
+                row["created_at"], feed_title(row),
+            )
+            for row in rows
+        ]
+
+    @property
+    def summary(self) -> str | None:
+        if isinstance(self._summary, bytes):
+            self._summary = decompress_text(self._summary)
+        return self._summary
+
+    @property
+    def content(self) -> str | None:
+        if isinstance(self._content, bytes):
+            self._content = decompress_text(self._content)
+        return self._content
 
+    @property
+    def published_at(self) -> datetime | None:
+        return parse_datetime(self.published_ts)
 
-@dataclass
+    @property
+    def created_at(self) -> datetime | None:
+        return parse_datetime(self.created_ts)
+
+
+@dataclass(slots=True)
 class Filter:
     id: int | None
     name: str
     pattern: str
     target: str
     is_active: bool = True
-    created_at: datetime | None = None
+    created_ts: int | None = None
+    disabled_reason: str | None = None
 
     @classmethod
     def from_row(cls, row) -> "Filter":
@@ -99,5 +158,25 @@ class Filter:
             pattern=row["pattern"],
             target=row["target"],
             is_active=bool(row["is_active"]),
-            created_at=parse_datetime(row["created_at"])
+            created_ts=row["created_at"],
+            disabled_reason=row["disabled_reason"]
         )
+
+    @property
+    def created_at(self) -> datetime | None:
+        return parse_datetime(self.created_ts)
+
+
+@dataclass(slots=True)
+class FilterStats:
+    filter_id: int
+    evaluations: int = 0
+    matches: int = 0
+    seconds: float = 0.0
+    # Fraction of all filters' recorded evaluation time.
+    share: float = 0.0
+    hot: bool = False
+
+    @property
+    def micros_per_article(self) -> float:
+        return self.seconds * 1e6 / self.evaluations if self.evaluations else 0.0
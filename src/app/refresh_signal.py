@@ -0,0 +1,130 @@
+"""On-demand requests from the web container to the scheduler.
+
+Page loads ask for a refresh through /api/refresh-if-stale. Rather than a
+settings write per page load, the web side sends one datagram to a unix
+socket on the shared data volume (REFRESH_SOCKET_PATH, next to the database)
+and the scheduler's listener wakes check_on_demand_refresh_job at once.
+Each worker process sends at most one request per
+REFRESH_SIGNAL_DEDUPE_SECONDS; the scheduler still applies its cooldown.
+"Re-apply filters" sends a reapply datagram the same way, so the bulk pass
+runs in the scheduler rather than in a web request.
+
+When nothing is listening (the scheduler is down, or the volume can't hold
+sockets) the request falls back to a setting (refresh_requested or
+reapply_requested), which the job also polls.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Callable
+
+from flask import current_app
+
+
+logger = logging.getLogger(__name__)
+
+REFRESH_SIGNAL_DEDUPE_SECONDS = 60
+REFRESH_MESSAGE = b"refresh"
+REAPPLY_MESSAGE = b"reapply"
+LISTENER_POLL_SECONDS = 1.0
+
+_last_sent: dict[str, float] = {}
+_last_sent_lock = threading.Lock()
+
+
+def request_refresh() -> bool:
+    """Ask the scheduler for an on-demand refresh. Returns False when an
+    earlier request from this process within REFRESH_SIGNAL_DEDUPE_SECONDS
+    already covers it."""
+    path = current_app.config["REFRESH_SOCKET_PATH"]
+    now = time.monotonic()
+    with _last_sent_lock:
+        last = _last_sent.get(path)
+        if last is not None and now - last < REFRESH_SIGNAL_DEDUPE_SECONDS:
+            return False
+        _last_sent[path] = now
+
+    _send(REFRESH_MESSAGE, "refresh_requested")
+    return True
+
+
+def request_reapply() -> None:
+    """Ask the scheduler to re-apply every filter. Not deduplicated: the
+    scheduler runs one pass at a time and coalesces requests queued
+    behind it."""
+    _send(REAPPLY_MESSAGE, "reapply_requested")
+
+
+def _send(message: bytes, fallback_setting: str) -> None:
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.setblocking(False)
+            sock.sendto(message, current_app.config["REFRESH_SOCKET_PATH"])
+    except OSError:
+        # Nothing bound, or its queue is full: leave the flag for the poll.
+        from src.app.services import settings_service
+        settings_service.set_setting(fallback_setting, "1")
+
+
+class RefreshListener:
+    """Receives request datagrams on path and calls on_request(message)
+    once per distinct message in a burst: requests that queued up
+    meanwhile are drained with it."""
+
+    def __init__(self, path: str, on_request: Callable[[bytes], None]):
+        self.path = path
+        self.on_request = on_request
+        self._stop = threading.Event()
+        self._sock: socket.socket | None = None
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self.path)
+        self._sock.settimeout(LISTENER_POLL_SECONDS)
+        self._thread = threading.Thread(target=self._run, daemon=True, name="refresh-listener")
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(LISTENER_POLL_SECONDS * 2)
+        if self._sock is not None:
+            self._sock.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                messages = {self._sock.recv(64)}
+            except socket.timeout:
+                continue
+            except OSError:
+                if not self._stop.is_set():
+                    logger.exception("Refresh listener receive failed")
+                return
+            self._drain(messages)
+            for message in sorted(messages):
+                try:
+                    self.on_request(message)
+                except Exception:
+                    logger.exception("Handler for %r request failed", message)
+
+    def _drain(self, messages: set[bytes]) -> None:
+        self._sock.setblocking(False)
+        try:
+            while True:
+                messages.add(self._sock.recv(64))
+        except BlockingIOError:
+            pass
+        finally:
+            self._sock.settimeout(LISTENER_POLL_SECONDS)
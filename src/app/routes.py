@@ -1,15 +1,78 @@
+import functools
+import hashlib
 import hmac
+import os
+import time
+from datetime import date
+from typing import Callable
 
 from flask import (Blueprint, render_template, request, redirect, url_for,
-                   jsonify, flash, Response, session, current_app)
+                   jsonify, flash, Response, session, current_app, stream_with_context)
 
-from src.app.database import get_db
-from src.app.services import feed_service, article_service, filter_service, settings_service, opml_service
+from src.app import events, refresh_signal, write_behind
+from src.app.counters import read_counters
+from src.app.database import COUNTER_NAMES, FILTER_TARGETS, get_db
+from src.app.filter_worker import FilterTimeout
+from src.app.services import (feed_service, article_service, filter_service, settings_service,
+                              opml_service, search_service, sync_service)
 
 
 bp = Blueprint("main", __name__)
 
 
+@bp.before_request
+def flush_read_state():
+    """Pages and listings show what this worker has already acknowledged."""
+    if request.method == "GET" and request.endpoint != "main.health":
+        write_behind.flush()
+
+
+_release_token: str | None = None
+
+
+def _release() -> str:
+    """Newest modification time under src/, so responses cached before a
+    deploy that changed templates or code don't validate after it."""
+    global _release_token
+    if _release_token is None:
+        root = os.path.dirname(current_app.root_path)
+        _release_token = str(max(
+            os.path.getmtime(os.path.join(dirpath, name))
+            for dirpath, _, names in os.walk(root) for name in names
+            if name.endswith((".py", ".html"))
+        ))
+    return _release_token
+
+
+def conditional_get(extra: Callable[[], object] | None = None):
+    """Give a view a weak ETag derived from the change counters, the request
+    path and query, and extra(); a matching If-None-Match gets 304 without
+    running the view.
+
+    The counters are read before the view, so a write landing while it runs
+    changes the next ETag instead of being hidden behind this one. Pages
+    carrying flashed messages are never validated.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(*args, **kwargs):
+            if session.get("_flashes"):
+                return view(*args, **kwargs)
+            key = f"{_release()}|{read_counters(COUNTER_NAMES)}|{extra() if extra else ''}|{request.full_path}"
+            etag = hashlib.sha1(key.encode()).hexdigest()
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+        return wrapped
+    return decorator
+
+
 @bp.route("/health")
 def health():
     db = get_db()
@@ -46,11 +109,15 @@ def logout():
 
 
 @bp.route("/")
+@conditional_get()
 def index():
     feeds = feed_service.get_all_feeds()
     feed_id = request.args.get("feed_id", type=int)
     unread_only = request.args.get("unread", "1") == "1"
 
+    # Taken before the listing, so a change landing while the page renders
+    # is synced again rather than missed.
+    sync_seq = sync_service.current_seq()
     articles = article_service.get_articles(
         feed_id=feed_id,
         unread_only=unread_only
@@ -68,7 +135,8 @@ def index():
         unread_only=unread_only,
         total_unread=total_unread,
         saved_count=saved_count,
-        filtered_count=filtered_count
+        filtered_count=filtered_count,
+        sync_seq=sync_seq
     )
 
 
@@ -106,7 +174,7 @@ def resubscribe_feeds():
     feed_ids = [int(fid) for fid in request.form.getlist("feed_ids") if fid.isdigit()]
     count = feed_service.resubscribe_feeds(feed_ids)
     if count > 0:
-        settings_service.set_setting("refresh_requested", "1")
+        refresh_signal.request_refresh()
         flash(f"Resubscribed to {count} feed(s)", "success")
     else:
         flash("No feeds selected", "info")
@@ -147,7 +215,7 @@ def refresh_all_feeds():
 
 @bp.route("/api/refresh-if-stale", methods=["POST"])
 def api_refresh_if_stale():
-    settings_service.set_setting("refresh_requested", "1")
+    refresh_signal.request_refresh()
     return jsonify({"requested": True})
 
 
@@ -186,41 +254,228 @@ def mark_all_read():
     return redirect(request.referrer or url_for("main.index"))
 
 
+@bp.route("/api/batch", methods=["POST"])
+def api_batch():
+    """Read, save and hide actions queued by app.js, applied together."""
+    data = request.get_json(silent=True)
+    actions = data.get("actions") if isinstance(data, dict) else None
+    if not isinstance(actions, list):
+        return jsonify({"error": "actions must be a list"}), 400
+    if len(actions) > article_service.MAX_BATCH_ACTIONS:
+        return jsonify({"error": "Too many actions"}), 400
+
+    parsed = []
+    for action in actions:
+        op = action.get("op") if isinstance(action, dict) else None
+        target_id = action.get("id") if isinstance(action, dict) else None
+        if op not in article_service.BATCH_ACTIONS or type(target_id) is not int:
+            return jsonify({"error": "Invalid action"}), 400
+        parsed.append((op, target_id))
+
+    counts = article_service.apply_batch(parsed)
+    return jsonify({"success": True, "applied": len(parsed), **counts})
+
+
+@bp.route("/api/sync")
+def api_sync():
+    """Articles changed since the client's last seq; see sync_service."""
+    since = request.args.get("since", type=int)
+    if since is None or since < 0:
+        return jsonify({"error": "since must be a non-negative integer"}), 400
+    client_id = request.args.get("client") or None
+    if client_id and len(client_id) > sync_service.MAX_CLIENT_ID_LENGTH:
+        return jsonify({"error": "client id too long"}), 400
+    return jsonify(sync_service.get_changes(since, client_id))
+
+
+SSE_KEEPALIVE_SECONDS = 15
+SSE_RETRY_MS = 5000
+
+
+@bp.route("/api/events")
+def api_events():
+    """Server-Sent Events: unread and saved counts whenever they change, and
+    articles new since the previous event by feed id; see events.py."""
+    feed = events.get_feed()
+    if not feed.subscribe():
+        return jsonify({"error": "Too many open streams"}), 503, {"Retry-After": "60"}
+    response = Response(
+        _change_events(feed, current_app.config["SSE_STREAM_SECONDS"], current_app.json.dumps),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Also runs when the client goes away before the first event.
+    response.call_on_close(feed.unsubscribe)
+    return response
+
+
+def _change_events(feed: events.ChangeFeed, stream_seconds: float, dumps):
+    """Ends after stream_seconds; EventSource reconnects on its own, which
+    lets gunicorn recycle the thread and the worker."""
+    yield f"retry: {SSE_RETRY_MS}\n\n"
+    version, baseline = 0, None
+    deadline = time.monotonic() + stream_seconds
+    while time.monotonic() < deadline:
+        remaining = deadline - time.monotonic()
+        event = feed.wait(version, max(0, min(remaining, SSE_KEEPALIVE_SECONDS)))
+        if event is None:
+            yield ": keepalive\n\n"
+            continue
+        version, snapshot = event
+        inserted = snapshot["inserted"]
+        new = {} if baseline is None else {
+            feed_id: count - baseline.get(feed_id, 0)
+            for feed_id, count in inserted.items() if count > baseline.get(feed_id, 0)
+        }
+        baseline = inserted
+        payload = dumps({"seq": snapshot["seq"], "new": new, **snapshot["counts"]})
+        yield f"id: {snapshot['seq']}\nevent: changes\ndata: {payload}\n\n"
+
+
+API_FEED_FIELDS = ("id", "title", "url", "unread_count", "fetch_error_count", "last_error")
+API_ARTICLE_FIELDS = ("id", "title", "summary", "url", "feed_title", "published_at",
+                      "is_read", "is_saved")
+API_FILTER_FIELDS = ("id", "name", "pattern", "target", "is_active", "disabled_reason", "match_count",
+                     "evaluations", "eval_matches", "eval_seconds", "cost_share", "hot")
+API_ARTICLES_DEFAULT_LIMIT = 50
+MAX_API_ARTICLES = 1000
+STREAM_CHUNK_ROWS = 100
+
+
+def _requested_fields(available: dict, default: tuple) -> tuple[tuple, str | None]:
+    """Parse ?fields=a,b,c against the fields an endpoint can serve."""
+    raw = request.args.get("fields")
+    if not raw:
+        return default, None
+    fields = tuple(dict.fromkeys(f.strip() for f in raw.split(",") if f.strip()))
+    unknown = [f for f in fields if f not in available]
+    if unknown:
+        return (), f"Unknown field: {unknown[0]}"
+    if not fields:
+        return (), "No fields requested"
+    return fields, None
+
+
+def _stream_json_array(fields: tuple, rows) -> Response:
+    """Serialise rows as a JSON array of objects while the cursor is read,
+    STREAM_CHUNK_ROWS objects per chunk, instead of building the whole list."""
+    dumps = current_app.json.dumps
+
+    def generate():
+        yield "["
+        separator = ""
+        chunk = []
+        for row in rows:
+            chunk.append(dumps(dict(zip(fields, row))))
+            if len(chunk) == STREAM_CHUNK_ROWS:
+                yield separator + ",".join(chunk)
+                separator = ","
+                chunk = []
+        if chunk:
+            yield separator + ",".join(chunk)
+        yield "]"
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
+
+
+def _last_fetched_token():
+    """Fetch times change on every refresh without bumping a counter, so
+    they only enter the ETag when requested."""
+    if "last_fetched" not in request.args.get("fields", ""):
+        return None
+    return get_db().execute("SELECT SUM(last_fetched) FROM feeds").fetchone()[0]
+
+
 @bp.route("/api/feeds")
+@conditional_get(extra=_last_fetched_token)
 def api_feeds():
-    feeds = feed_service.get_all_feeds()
-    return jsonify([{
-        "id": f.id,
-        "title": f.title,
-        "url": f.url,
-        "unread_count": f.unread_count,
-        "fetch_error_count": f.fetch_error_count,
-        "last_error": f.last_error
-    } for f in feeds])
+    fields, error = _requested_fields(feed_service.FEED_FIELDS, API_FEED_FIELDS)
+    if error:
+        return jsonify({"error": error}), 400
+    return _stream_json_array(fields, feed_service.get_feed_values(fields))
 
 
 @bp.route("/api/articles")
+@conditional_get()
 def api_articles():
     feed_id = request.args.get("feed_id", type=int)
     unread_only = request.args.get("unread", "0") == "1"
+    limit = request.args.get("limit", API_ARTICLES_DEFAULT_LIMIT, type=int)
+    limit = max(1, min(limit, MAX_API_ARTICLES))
+    offset = max(0, request.args.get("offset", 0, type=int))
+
+    fields, error = _requested_fields(article_service.ARTICLE_FIELDS, API_ARTICLE_FIELDS)
+    if error:
+        return jsonify({"error": error}), 400
+    rows = article_service.get_article_values(
+        fields, feed_id=feed_id, unread_only=unread_only, limit=limit, offset=offset
+    )
+    return _stream_json_array(fields, rows)
+
+
+MAX_SEARCH_RESULTS = 200
+
+
+def _parse_date_arg(name: str) -> date | None:
+    value = request.args.get(name, "")
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def _run_search() -> tuple[str, list]:
+    query = request.args.get("q", "").strip()
+    limit = min(max(request.args.get("limit", 50, type=int), 1), MAX_SEARCH_RESULTS)
+    results = search_service.search_articles(
+        query,
+        feed_id=request.args.get("feed_id", type=int),
+        date_from=_parse_date_arg("from"),
+        date_to=_parse_date_arg("to"),
+        limit=limit,
+        offset=max(request.args.get("offset", 0, type=int), 0)
+    )
+    return query, results
+
 
-    articles = article_service.get_articles(feed_id=feed_id, unread_only=unread_only)
+@bp.route("/search")
+def search_page():
+    query, results = _run_search()
+    return render_template(
+        "search.html",
+        query=query,
+        results=results,
+        feeds=feed_service.get_all_feeds(),
+        selected_feed_id=request.args.get("feed_id", type=int),
+        date_from=request.args.get("from", ""),
+        date_to=request.args.get("to", ""),
+        total_unread=article_service.get_unread_count(),
+        saved_count=article_service.get_saved_count(),
+        filtered_count=filter_service.get_total_filtered_count()
+    )
+
+
+@bp.route("/api/search")
+def api_search():
+    _, results = _run_search()
     return jsonify([{
         "id": a.id,
         "title": a.title,
-        "summary": a.summary,
         "url": a.url,
+        "feed_id": a.feed_id,
         "feed_title": a.feed_title,
-        "published_at": a.published_at.isoformat() if a.published_at else None,
+        "published_at": a.published_at.isoformat() if a.published_ts is not None else None,
         "is_read": a.is_read,
-        "is_saved": a.is_saved
-    } for a in articles])
+        "is_saved": a.is_saved,
+        "snippet": str(snippet)
+    } for a, snippet in results])
 
 
 @bp.route("/filters")
 def filters_page():
     filters = filter_service.get_all_filters()
-    filter_counts = {f.id: filter_service.get_filter_match_count(f.id) for f in filters}
+    filter_counts = filter_service.get_filter_match_counts()
+    filter_stats = filter_service.get_filter_stats()
     total_unread = article_service.get_unread_count()
     saved_count = article_service.get_saved_count()
     filtered_count = filter_service.get_total_filtered_count()
@@ -228,6 +483,8 @@ def filters_page():
         "filters.html",
         filters=filters,
         filter_counts=filter_counts,
+        filter_stats=filter_stats,
+        reapply_status=filter_service.get_reapply_status(),
         total_unread=total_unread,
         saved_count=saved_count,
         filtered_count=filtered_count
@@ -263,11 +520,9 @@ def edit_filter(filter_id: int):
 
 @bp.route("/filters/reapply", methods=["POST"])
 def reapply_filters():
-    count = filter_service.reapply_all_filters()
-    if count > 0:
-        flash(f"Filters matched {count} article(s)", "success")
-    else:
-        flash("No new matches found", "info")
+    # The pass can take minutes on a large corpus; the scheduler runs it.
+    refresh_signal.request_reapply()
+    flash("Re-applying filters in the background", "info")
     return redirect(url_for("main.filters_page"))
 
 
@@ -286,6 +541,7 @@ def delete_filter(filter_id: int):
 
 
 @bp.route("/filtered")
+@conditional_get()
 def filtered_view():
     filtered_by_rule = filter_service.get_filtered_articles_by_rule()
     total_filtered = filter_service.get_total_filtered_count()
@@ -301,44 +557,79 @@ def filtered_view():
     )
 
 
+@bp.route("/filtered/<int:filter_id>/more")
+def filtered_more(filter_id: int):
+    after = filter_service.parse_filtered_cursor(request.args.get("cursor", ""))
+    if after is None:
+        return "Invalid cursor", 400
+    articles, next_cursor = filter_service.get_filtered_articles_page(filter_id, after)
+    return render_template(
+        "_filtered_articles.html",
+        filter_id=filter_id,
+        articles=articles,
+        next_cursor=next_cursor
+    )
+
+
 @bp.route("/api/filters")
 def api_filters():
-    filters = filter_service.get_all_filters()
-    return jsonify([{
-        "id": f.id,
-        "name": f.name,
-        "pattern": f.pattern,
-        "target": f.target,
-        "is_active": f.is_active,
-        "match_count": filter_service.get_filter_match_count(f.id)
-    } for f in filters])
+    fields, error = _requested_fields(filter_service.FILTER_FIELDS, API_FILTER_FIELDS)
+    if error:
+        return jsonify({"error": error}), 400
+    return _stream_json_array(fields, filter_service.get_filter_values(fields))
 
 
 MAX_FILTER_NAME_LENGTH = 200
 MAX_FILTER_PATTERN_LENGTH = 5000
-VALID_FILTER_TARGETS = ("title", "summary", "both")
+VALID_FILTER_TARGETS = FILTER_TARGETS
 
 
-@bp.route("/api/filters/match-count", methods=["POST"])
-def api_filter_match_count():
+def _pattern_from_request() -> tuple[str, str, str | None]:
+    """(pattern, target, error) from a JSON body for the pattern dry runs."""
     data = request.get_json()
     if not data:
-        return jsonify({"error": "Request body required"}), 400
+        return "", "", "Request body required"
 
     pattern = (data.get("pattern") or "").strip()
     target = data.get("target", "both")
 
     if not pattern:
-        return jsonify({"error": "Pattern is required"}), 400
+        return pattern, target, "Pattern is required"
     if len(pattern) > MAX_FILTER_PATTERN_LENGTH:
-        return jsonify({"error": "Pattern too long"}), 400
+        return pattern, target, "Pattern too long"
     if target not in VALID_FILTER_TARGETS:
-        return jsonify({"error": "Invalid target"}), 400
+        return pattern, target, "Invalid target"
     if not filter_service.is_valid_regex(pattern):
-        return jsonify({"error": "Invalid regex pattern"}), 400
+        return pattern, target, "Invalid regex pattern"
+    if filter_service.has_nested_quantifier(pattern):
+        return pattern, target, filter_service.NESTED_QUANTIFIER_ERROR
+    return pattern, target, None
 
-    count = filter_service.count_unread_matches(pattern, target)
-    return jsonify({"count": count})
+
+@bp.route("/api/filters/match-count", methods=["POST"])
+def api_filter_match_count():
+    pattern, target, error = _pattern_from_request()
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        count, approximate = filter_service.preview_unread_matches(pattern, target)
+    except FilterTimeout:
+        return jsonify({"error": filter_service.PREVIEW_TIMEOUT_ERROR}), 400
+    return jsonify({"count": count, "approximate": approximate})
+
+
+@bp.route("/api/filters/profile", methods=["POST"])
+def api_profile_filter():
+    pattern, target, error = _pattern_from_request()
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        profile = filter_service.profile_pattern(pattern, target)
+    except FilterTimeout:
+        return jsonify({"error": filter_service.PREVIEW_TIMEOUT_ERROR}), 400
+    return jsonify(profile)
 
 
 @bp.route("/api/filters", methods=["POST"])
@@ -411,8 +702,10 @@ def toggle_save(article_id: int):
 
 
 @bp.route("/saved")
+@conditional_get()
 def saved_articles():
     feeds = feed_service.get_all_feeds()
+    sync_seq = sync_service.current_seq()
     articles = article_service.get_articles(saved_only=True)
     total_unread = article_service.get_unread_count()
     saved_count = article_service.get_saved_count()
@@ -427,6 +720,7 @@ def saved_articles():
         total_unread=total_unread,
         saved_count=saved_count,
         filtered_count=filtered_count,
+        sync_seq=sync_seq,
         view_mode="saved"
     )
 
@@ -1,4 +1,6 @@
 import logging
+import sqlite3
+import threading
 import time
 from datetime import datetime, timedelta, timezone
 
@@ -9,10 +11,21 @@ logger = logging.getLogger(__name__)
 
 scheduler = BackgroundScheduler()
 _app = None
+_refresh_listener = None
+# Set by the refresh socket listener; the refresh_requested setting is the
+# fallback when the web side can't reach the socket.
+_refresh_requested = threading.Event()
+# Likewise for "Re-apply filters", with the reapply_requested setting.
+_reapply_requested = threading.Event()
 
 ON_DEMAND_POLL_SECONDS = 30
 ON_DEMAND_COOLDOWN_MINUTES = 5
 CLEANUP_INTERVAL_HOURS = 6
+COMPRESSION_INTERVAL_HOURS = 6
+MATCH_TEXT_BACKFILL_INTERVAL_HOURS = 6
+MAINTENANCE_INTERVAL_MINUTES = 60
+SYNC_COMPACTION_INTERVAL_HOURS = 1
+REAPPLY_PROGRESS_SECONDS = 5
 
 
 def _run_refresh(trigger: str):
@@ -58,14 +71,105 @@ def cleanup_old_articles_job():
     with _app.app_context():
         from src.app.services import article_service
 
-        deleted = article_service.cleanup_old_articles(article_service.RETENTION_DAYS)
-        if deleted > 0:
+        start = time.monotonic()
+
+        def report(total: int) -> None:
+            logger.debug("Article cleanup: %d deleted so far", total)
+
+        deleted = article_service.cleanup_old_articles(
+            article_service.RETENTION_DAYS, progress=report
+        )
+        pruned = article_service.prune_seen_guids()
+        if deleted > 0 or pruned > 0:
+            logger.info(
+                "Article cleanup: deleted %d articles older than %d days, "
+                "pruned %d guid tombstones, %.1fs elapsed",
+                deleted, article_service.RETENTION_DAYS, pruned, time.monotonic() - start
+            )
+
+
+def compress_article_bodies_job():
+    if _app is None or not _app.config.get("COMPRESS_ARTICLE_BODIES"):
+        return
+
+    with _app.app_context():
+        from src.app.services import article_service
+
+        start = time.monotonic()
+        converted = article_service.compress_stored_bodies()
+        if converted > 0:
+            logger.info(
+                "Article compression: rewrote %d articles in %.1fs",
+                converted, time.monotonic() - start
+            )
+
+
+def match_text_job():
+    if _app is None:
+        return
+
+    with _app.app_context():
+        from src.app.services import filter_service, search_service
+
+        start = time.monotonic()
+        filled = filter_service.backfill_match_text()
+        if filled > 0:
+            logger.info(
+                "Match text: filled %d articles in %.1fs",
+                filled, time.monotonic() - start
+            )
+
+        start = time.monotonic()
+        filled = search_service.backfill_search_content()
+        if filled > 0:
             logger.info(
-                "Article cleanup: deleted %d articles older than %d days",
-                deleted, article_service.RETENTION_DAYS
+                "Search content: indexed %d summary-less articles in %.1fs",
+                filled, time.monotonic() - start
             )
 
 
+def database_maintenance_job():
+    if _app is None:
+        return
+
+    with _app.app_context():
+        from src.app.services import maintenance_service
+
+        budget = _app.config["DB_MAINTENANCE_BUDGET_SECONDS"]
+        start = time.monotonic()
+        try:
+            stats = maintenance_service.run_maintenance(budget)
+        except sqlite3.OperationalError as e:
+            logger.warning("Database maintenance skipped: %s", e)
+            return
+
+        (db_before, wal_before), (db_after, wal_after) = stats["before"], stats["after"]
+        logger.info(
+            "Database maintenance: db %.1f -> %.1f MB, wal %.1f -> %.1f MB, "
+            "%d pages released, checkpointed=%s, optimized=%s, %.1fs elapsed, "
+            "%.1fs of budget left",
+            db_before / 1e6, db_after / 1e6, wal_before / 1e6, wal_after / 1e6,
+            stats["pages_released"], stats["checkpointed"], stats["optimized"],
+            time.monotonic() - start, stats["remaining_seconds"]
+        )
+
+
+def compact_article_changes_job():
+    if _app is None:
+        return
+
+    with _app.app_context():
+        from src.app.services import sync_service
+
+        try:
+            deleted = sync_service.compact_changes()
+        except sqlite3.OperationalError as e:
+            logger.warning("Change log compaction skipped: %s", e)
+            return
+        if deleted > 0:
+            logger.info("Change log: compacted %d entries", deleted)
+
+
 def check_on_demand_refresh_job():
     if _app is None:
         return
@@ -73,20 +177,23 @@ def check_on_demand_refresh_job():
     with _app.app_context():
         from src.app.services import settings_service
 
-        if settings_service.get_setting("refresh_requested") != "1":
+        signalled = _refresh_requested.is_set()
+        _refresh_requested.clear()
+        flagged = settings_service.get_setting("refresh_requested") == "1"
+        if not signalled and not flagged:
             return
+        if flagged:
+            settings_service.set_setting("refresh_requested", "0")
 
         last_at = settings_service.get_setting("last_on_demand_refresh_at")
         if last_at:
             try:
                 last_time = datetime.fromisoformat(last_at)
                 if datetime.now(timezone.utc) - last_time < timedelta(minutes=ON_DEMAND_COOLDOWN_MINUTES):
-                    settings_service.set_setting("refresh_requested", "0")
                     return
             except ValueError:
                 pass
 
-        settings_service.set_setting("refresh_requested", "0")
         settings_service.set_setting(
             "last_on_demand_refresh_at",
             datetime.now(timezone.utc).isoformat()
@@ -94,6 +201,61 @@ def check_on_demand_refresh_job():
         _run_refresh("on-demand")
 
 
+def reapply_filters_job():
+    if _app is None:
+        return
+
+    with _app.app_context():
+        from src.app.services import filter_service, settings_service
+
+        signalled = _reapply_requested.is_set()
+        _reapply_requested.clear()
+        flagged = settings_service.get_setting("reapply_requested") == "1"
+        if not signalled and not flagged:
+            return
+        if flagged:
+            settings_service.set_setting("reapply_requested", "0")
+
+        started_at = datetime.now(timezone.utc).isoformat()
+        start = last_report = time.monotonic()
+        filter_service.set_reapply_status(state="running", checked=0, started_at=started_at)
+
+        def report(checked: int) -> None:
+            nonlocal last_report
+            if time.monotonic() - last_report < REAPPLY_PROGRESS_SECONDS:
+                return
+            last_report = time.monotonic()
+            logger.info("Reapply filters: %d articles checked", checked)
+            filter_service.set_reapply_status(state="running", checked=checked,
+                                              started_at=started_at)
+
+        try:
+            count = filter_service.reapply_all_filters(progress=report, parallel=True)
+        except Exception:
+            logger.exception("Reapply filters failed")
+            filter_service.set_reapply_status(state="failed", started_at=started_at)
+            return
+        elapsed = time.monotonic() - start
+        filter_service.set_reapply_status(
+            state="done", matches=count, seconds=round(elapsed, 1),
+            finished_at=datetime.now(timezone.utc).isoformat()
+        )
+        logger.info("Reapply filters: %d matches in %.1fs", count, elapsed)
+
+
+def _on_refresh_signal(message: bytes):
+    """Run the requested job now rather than at its next poll."""
+    from src.app.refresh_signal import REAPPLY_MESSAGE
+
+    if message == REAPPLY_MESSAGE:
+        event, job_id = _reapply_requested, "reapply_filters"
+    else:
+        event, job_id = _refresh_requested, "check_on_demand_refresh"
+    event.set()
+    if scheduler.running:
+        scheduler.modify_job(job_id, next_run_time=datetime.now(timezone.utc))
+
+
 def init_scheduler(app):
     global _app
     _app = app
@@ -119,6 +281,13 @@ def init_scheduler(app):
         replace_existing=True
     )
 
+    scheduler.add_job(
+        reapply_filters_job,
+        trigger=IntervalTrigger(seconds=ON_DEMAND_POLL_SECONDS),
+        id="reapply_filters",
+        replace_existing=True
+    )
+
     scheduler.add_job(
         cleanup_old_articles_job,
         trigger=IntervalTrigger(hours=CLEANUP_INTERVAL_HOURS),
@@ -127,7 +296,55 @@ def init_scheduler(app):
         replace_existing=True
     )
 
+    scheduler.add_job(
+        match_text_job,
+        trigger=IntervalTrigger(hours=MATCH_TEXT_BACKFILL_INTERVAL_HOURS),
+        id="match_text",
+        next_run_time=datetime.now(timezone.utc) + timedelta(seconds=75),
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        database_maintenance_job,
+        trigger=IntervalTrigger(minutes=MAINTENANCE_INTERVAL_MINUTES),
+        id="database_maintenance",
+        next_run_time=datetime.now(timezone.utc) + timedelta(minutes=5),
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        compact_article_changes_job,
+        trigger=IntervalTrigger(hours=SYNC_COMPACTION_INTERVAL_HOURS),
+        id="compact_article_changes",
+        next_run_time=datetime.now(timezone.utc) + timedelta(minutes=10),
+        replace_existing=True
+    )
+
+    if app.config.get("COMPRESS_ARTICLE_BODIES"):
+        scheduler.add_job(
+            compress_article_bodies_job,
+            trigger=IntervalTrigger(hours=COMPRESSION_INTERVAL_HOURS),
+            id="compress_article_bodies",
+            next_run_time=datetime.now(timezone.utc) + timedelta(seconds=90),
+            replace_existing=True
+        )
+
     scheduler.start()
+    _start_refresh_listener(app.config["REFRESH_SOCKET_PATH"])
+
+
+def _start_refresh_listener(path: str):
+    global _refresh_listener
+    from src.app.refresh_signal import RefreshListener
+
+    listener = RefreshListener(path, _on_refresh_signal)
+    try:
+        listener.start()
+    except OSError as e:
+        logger.warning("Refresh socket %s unavailable (%s); on-demand refresh "
+                       "requests wait for the %ds poll", path, e, ON_DEMAND_POLL_SECONDS)
+        return
+    _refresh_listener = listener
 
 
 def update_scheduler_interval(minutes: int):
@@ -141,5 +358,9 @@ def update_scheduler_interval(minutes: int):
 
 
 def shutdown_scheduler():
+    global _refresh_listener
+    if _refresh_listener is not None:
+        _refresh_listener.stop()
+        _refresh_listener = None
     if scheduler.running:
         scheduler.shutdown(wait=False)
@@ -1,21 +1,30 @@
-from src.app.database import get_db
-from src.app.models import Article
+import time
+from typing import Callable, Iterator, Sequence
+
+from src.app import write_behind
+from src.app.compression import MIN_COMPRESS_LENGTH, compress_text, decompress_text, is_compressed
+from src.app.database import get_db, iter_projection
+from src.app.models import Article, epoch_to_iso
 
 
 RETENTION_DAYS = 7
+TOMBSTONE_RETENTION_DAYS = 30
+TOMBSTONE_TOUCH_SECONDS = 24 * 60 * 60
+CLEANUP_BATCH_SIZE = 500
+CLEANUP_BATCH_PAUSE_SECONDS = 0.05
+COMPRESSION_BATCH_SIZE = 500
+COMPRESSION_BATCH_PAUSE_SECONDS = 0.05
+SQLITE_VAR_LIMIT = 999
 
 
-def get_articles(
-    feed_id: int | None = None,
-    unread_only: bool = False,
-    saved_only: bool = False,
-    limit: int = 50,
-    offset: int = 0
-) -> list[Article]:
-    db = get_db()
-
-    query = """
-        SELECT a.*, f.title as feed_title
+def _article_list_query(
+    select: str,
+    feed_id: int | None,
+    unread_only: bool,
+    saved_only: bool
+) -> tuple[str, list]:
+    query = f"""
+        SELECT {select}
         FROM articles a
         JOIN feeds f ON a.feed_id = f.id
         WHERE 1=1
@@ -35,10 +44,55 @@ def get_articles(
         query += " AND a.is_saved = 1"
 
     query += " ORDER BY a.published_at DESC LIMIT ? OFFSET ?"
-    params.extend([limit, offset])
+    return query, params
+
+
+def get_articles(
+    feed_id: int | None = None,
+    unread_only: bool = False,
+    saved_only: bool = False,
+    limit: int = 50,
+    offset: int = 0
+) -> list[Article]:
+    query, params = _article_list_query("a.*, f.title as feed_title",
+                                        feed_id, unread_only, saved_only)
+    rows = get_db().execute(query, [*params, limit, offset]).fetchall()
+    return Article.from_rows(rows)
 
-    rows = db.execute(query, params).fetchall()
-    return [Article.from_row(row) for row in rows]
+
+# API field -> (SQL expression, converter applied to the stored value).
+ARTICLE_FIELDS = {
+    "id": ("a.id", None),
+    "feed_id": ("a.feed_id", None),
+    "title": ("a.title", None),
+    "summary": ("a.summary", decompress_text),
+    "url": ("a.url", None),
+    "image_url": ("a.image_url", None),
+    "feed_title": ("f.title", None),
+    "published_at": ("a.published_at", epoch_to_iso),
+    "is_read": ("a.is_read", bool),
+    "is_saved": ("a.is_saved", bool),
+}
+
+
+def get_article_values(
+    fields: Sequence[str],
+    feed_id: int | None = None,
+    unread_only: bool = False,
+    saved_only: bool = False,
+    limit: int = 50,
+    offset: int = 0
+) -> Iterator[tuple]:
+    """Same listing as get_articles, as plain tuples of the named
+    ARTICLE_FIELDS in order.
+
+    Only those columns are read and no Article objects are built, which is
+    all a JSON listing needs.
+    """
+    select = ", ".join(ARTICLE_FIELDS[name][0] for name in fields)
+    query, params = _article_list_query(select, feed_id, unread_only, saved_only)
+    return iter_projection(query, [*params, limit, offset],
+                           [ARTICLE_FIELDS[name][1] for name in fields])
 
 
 def get_article_by_id(article_id: int) -> Article | None:
@@ -53,6 +107,7 @@ def get_article_by_id(article_id: int) -> Article | None:
 
 
 def mark_article_read(article_id: int, is_read: bool = True) -> bool:
+    write_behind.flush()
     db = get_db()
     cursor = db.execute(
         "UPDATE articles SET is_read = ? WHERE id = ?",
@@ -66,6 +121,7 @@ def mark_all_read(
     feed_id: int | None = None,
     article_ids: list[int] | None = None
 ) -> int:
+    write_behind.flush()
     db = get_db()
 
     if article_ids:
@@ -86,7 +142,83 @@ def mark_all_read(
     return cursor.rowcount
 
 
+# Actions /api/batch accepts. hide and show take a feed id, the rest an
+# article id.
+BATCH_ACTIONS = ("read", "unread", "save", "unsave", "hide", "show")
+MAX_BATCH_ACTIONS = 500
+
+
+def apply_batch(actions: Sequence[tuple[str, int]]) -> dict:
+    """Apply (action, id) pairs queued by the client in one transaction.
+
+    Actions are idempotent and a later one on the same row overrides an
+    earlier one, so only each row's final state is written. Read and saved
+    changes go through the write-behind buffer when it's enabled, and the
+    counts include them. Returns the unread and saved totals afterwards,
+    plus the unread count of every feed the batch touched, keyed by feed id.
+    """
+    changes: dict[int, dict[str, int]] = {}
+    hidden: dict[int, int] = {}
+    for action, target_id in actions:
+        if action in ("read", "unread"):
+            changes.setdefault(target_id, {})["is_read"] = 1 if action == "read" else 0
+        elif action in ("save", "unsave"):
+            changes.setdefault(target_id, {})["is_saved"] = 1 if action == "save" else 0
+        else:
+            hidden[target_id] = 1 if action == "hide" else 0
+
+    db = get_db()
+    buffer = write_behind.get_buffer()
+    if buffer is None:
+        for flag in write_behind.FLAGS:
+            db.executemany(
+                f"UPDATE articles SET {flag} = ? WHERE id = ? AND {flag} != ?",
+                [(flags[flag], article_id, flags[flag])
+                 for article_id, flags in changes.items() if flag in flags]
+            )
+    db.executemany("UPDATE feeds SET hidden = ? WHERE id = ? AND hidden != ?",
+                   [(value, feed_id, value) for feed_id, value in hidden.items()])
+    db.commit()
+    if buffer is not None:
+        buffer.record(changes)
+
+    pending = buffer.pending() if buffer is not None else {}
+    rows = []
+    article_ids = list(set(changes) | set(pending))
+    for i in range(0, len(article_ids), SQLITE_VAR_LIMIT):
+        chunk = article_ids[i:i + SQLITE_VAR_LIMIT]
+        placeholders = ",".join("?" for _ in chunk)
+        rows.extend(db.execute(
+            f"SELECT a.id, a.feed_id, a.is_read, a.is_saved, f.hidden FROM articles a "
+            f"JOIN feeds f ON a.feed_id = f.id WHERE a.id IN ({placeholders})", chunk
+        ).fetchall())
+
+    feed_ids = set(hidden) | {row["feed_id"] for row in rows if "is_read" in changes.get(row["id"], ())}
+    feeds = dict.fromkeys(feed_ids, 0)
+    if feed_ids:
+        placeholders = ",".join("?" for _ in feed_ids)
+        feeds.update(db.execute(
+            f"SELECT feed_id, COUNT(*) FROM articles "
+            f"WHERE feed_id IN ({placeholders}) AND is_read = 0 GROUP BY feed_id",
+            list(feed_ids)
+        ).fetchall())
+    unread = get_unread_count()
+    saved = get_saved_count()
+
+    # Rows still waiting in the buffer differ from what was just counted.
+    for row in rows:
+        flags = pending.get(row["id"], {})
+        unread_delta = row["is_read"] - flags.get("is_read", row["is_read"])
+        if not row["hidden"]:
+            unread += unread_delta
+        if row["feed_id"] in feeds:
+            feeds[row["feed_id"]] += unread_delta
+        saved += flags.get("is_saved", row["is_saved"]) - row["is_saved"]
+    return {"unread": unread, "saved": saved, "feeds": feeds}
+
+
 def toggle_saved(article_id: int) -> bool | None:
+    write_behind.flush()
     db = get_db()
     row = db.execute("SELECT is_saved FROM articles WHERE id = ?", (article_id,)).fetchone()
     if not row:
@@ -122,20 +254,121 @@ def get_saved_count() -> int:
     return row["count"]
 
 
-def cleanup_old_articles(retention_days: int) -> int:
+def cleanup_old_articles(
+    retention_days: int,
+    batch_size: int = CLEANUP_BATCH_SIZE,
+    progress: Callable[[int], None] | None = None
+) -> int:
     """Delete read, unsaved articles older than retention_days.
 
     Unread articles are always kept so nothing is purged before it has been
     seen; saved articles are always kept regardless of age. Returns the number
     of articles deleted. Rows in filter_matches are removed automatically via
     ON DELETE CASCADE.
+
+    Deletes run in batches of batch_size through idx_articles_cleanup, each in
+    its own short transaction with a pause in between, so web writes are never
+    stuck behind one long DELETE. progress, if given, is called with the
+    running total after every batch.
     """
-    days = int(retention_days)
     db = get_db()
-    cursor = db.execute(
-        "DELETE FROM articles WHERE is_saved = 0 AND is_read = 1 "
-        "AND created_at < datetime('now', ?)",
-        (f"-{days} days",)
-    )
-    db.commit()
-    return cursor.rowcount
+    cutoff = int(time.time()) - int(retention_days) * 86400
+
+    deleted = 0
+    while True:
+        cursor = db.execute("""
+            DELETE FROM articles WHERE id IN (
+                SELECT id FROM articles
+                WHERE is_saved = 0 AND is_read = 1 AND created_at < ?
+                LIMIT ?
+            )
+        """, (cutoff, batch_size))
+        db.commit()
+        deleted += cursor.rowcount
+        if progress is not None and cursor.rowcount:
+            progress(deleted)
+        if cursor.rowcount < batch_size:
+            break
+        time.sleep(CLEANUP_BATCH_PAUSE_SECONDS)
+
+    return deleted
+
+
+def prune_seen_guids(
+    retention_days: int = TOMBSTONE_RETENTION_DAYS,
+    batch_size: int = CLEANUP_BATCH_SIZE
+) -> int:
+    """Drop undated-guid tombstones that can no longer prevent a resurrection.
+
+    A tombstone goes once its article is gone, it hasn't been seen in the
+    feed for retention_days, and the feed has been parsed since without it
+    (so a feed answering 304 for weeks keeps its tombstones). Returns the
+    number pruned.
+    """
+    db = get_db()
+    cutoff = int(time.time()) - int(retention_days) * 86400
+    pruned = 0
+    while True:
+        cursor = db.execute("""
+            DELETE FROM seen_guids WHERE rowid IN (
+                SELECT s.rowid FROM seen_guids s
+                JOIN feeds f ON f.id = s.feed_id
+                WHERE s.last_seen_at < ?
+                  AND f.last_parsed_at > s.last_seen_at + ?
+                  AND NOT EXISTS (
+                      SELECT 1 FROM articles a
+                      WHERE a.feed_id = s.feed_id AND a.guid = s.guid
+                  )
+                LIMIT ?
+            )
+        """, (cutoff, TOMBSTONE_TOUCH_SECONDS, batch_size))
+        db.commit()
+        pruned += cursor.rowcount
+        if cursor.rowcount < batch_size:
+            break
+        time.sleep(CLEANUP_BATCH_PAUSE_SECONDS)
+
+    return pruned
+
+
+def compress_stored_bodies(batch_size: int = COMPRESSION_BATCH_SIZE) -> int:
+    """Rewrite plain-text summary/content rows in compressed form.
+
+    Works through the table in id order, one short transaction per batch, so
+    web writes waiting on the lock get a turn in between. Returns the number of
+    rows rewritten.
+    """
+    db = get_db()
+    last_id = 0
+    converted = 0
+
+    while True:
+        rows = db.execute("""
+            SELECT id, summary, content FROM articles
+            WHERE id > ?
+              AND ((typeof(summary) = 'text' AND length(summary) >= ?)
+                   OR (typeof(content) = 'text' AND length(content) >= ?))
+            ORDER BY id
+            LIMIT ?
+        """, (last_id, MIN_COMPRESS_LENGTH, MIN_COMPRESS_LENGTH, batch_size)).fetchall()
+        if not rows:
+            break
+
+        updates = []
+        for row in rows:
+            summary = compress_text(row["summary"])
+            content = compress_text(row["content"])
+            if is_compressed(summary) or is_compressed(content):
+                updates.append((summary, content, row["id"]))
+
+        if updates:
+            db.executemany(
+                "UPDATE articles SET summary = ?, content = ? WHERE id = ?", updates
+            )
+            db.commit()
+            converted += len(updates)
+
+        last_id = rows[-1]["id"]
+        time.sleep(COMPRESSION_BATCH_PAUSE_SECONDS)
+
+    return converted
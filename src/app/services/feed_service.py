@@ -3,14 +3,17 @@ import re
 import sqlite3
 import time
 from datetime import datetime, timedelta, timezone
-from typing import Tuple
+from typing import Iterator, Sequence, Tuple
 from urllib.parse import urlparse
 
 import feedparser
 import requests
+from flask import current_app
 
-from src.app.database import get_db
-from src.app.models import Feed, Article
+from src.app.compression import compress_text
+from src.app.database import get_db, iter_projection
+from src.app.models import Feed, Article, epoch_to_iso
+from src.app.textnorm import match_text
 
 
 FETCH_TIMEOUT = 30
@@ -22,22 +25,49 @@ UNSUBSCRIBED_FEED_URL = "myfeeds:unsubscribed"
 UNSUBSCRIBED_FEED_TITLE = "Unsubscribed"
 
 
+_SIDEBAR_FEEDS_QUERY = """
+    SELECT {select}
+    FROM feeds f
+    LEFT JOIN articles a ON f.id = a.feed_id
+    WHERE f.unsubscribed = 0
+    GROUP BY f.id
+    HAVING f.url != ? OR COUNT(a.id) > 0
+    ORDER BY f.hidden, f.title COLLATE NOCASE
+"""
+_UNREAD_COUNT_SQL = "COUNT(CASE WHEN a.is_read = 0 THEN 1 END)"
+
+
 def get_all_feeds() -> list[Feed]:
     """Feeds shown in the sidebar: active subscriptions, plus the Unsubscribed
     archive only while it actually holds articles."""
     db = get_db()
-    rows = db.execute("""
-        SELECT f.*,
-               COUNT(CASE WHEN a.is_read = 0 THEN 1 END) as unread_count,
-               COUNT(a.id) as total_count
-        FROM feeds f
-        LEFT JOIN articles a ON f.id = a.feed_id
-        WHERE f.unsubscribed = 0
-        GROUP BY f.id
-        HAVING f.url != ? OR total_count > 0
-        ORDER BY f.hidden, f.title COLLATE NOCASE
-    """, (UNSUBSCRIBED_FEED_URL,)).fetchall()
-    return [Feed.from_row(row) for row in rows]
+    rows = db.execute(
+        _SIDEBAR_FEEDS_QUERY.format(select=f"f.*, {_UNREAD_COUNT_SQL} as unread_count"),
+        (UNSUBSCRIBED_FEED_URL,)
+    ).fetchall()
+    return Feed.from_rows(rows)
+
+
+# API field -> (SQL expression, converter applied to the stored value).
+FEED_FIELDS = {
+    "id": ("f.id", None),
+    "title": ("f.title", None),
+    "url": ("f.url", None),
+    "site_url": ("f.site_url", None),
+    "unread_count": (_UNREAD_COUNT_SQL, None),
+    "fetch_error_count": ("f.fetch_error_count", None),
+    "last_error": ("f.last_error", None),
+    "last_fetched": ("f.last_fetched", epoch_to_iso),
+    "hidden": ("f.hidden", bool),
+}
+
+
+def get_feed_values(fields: Sequence[str]) -> Iterator[tuple]:
+    """The get_all_feeds listing as plain tuples of the named FEED_FIELDS."""
+    select = ", ".join(FEED_FIELDS[name][0] for name in fields)
+    return iter_projection(_SIDEBAR_FEEDS_QUERY.format(select=select),
+                           (UNSUBSCRIBED_FEED_URL,),
+                           [FEED_FIELDS[name][1] for name in fields])
 
 
 def get_unsubscribed_feeds() -> list[Feed]:
@@ -48,7 +78,7 @@ def get_unsubscribed_feeds() -> list[Feed]:
         WHERE f.unsubscribed = 1
         ORDER BY f.title COLLATE NOCASE
     """).fetchall()
-    return [Feed.from_row(row) for row in rows]
+    return Feed.from_rows(rows)
 
 
 def get_or_create_unsubscribed_feed() -> int:
@@ -61,8 +91,8 @@ def get_or_create_unsubscribed_feed() -> int:
     if row:
         return row["id"]
     cursor = db.execute(
-        "INSERT INTO feeds (url, title, site_url) VALUES (?, ?, ?)",
-        (UNSUBSCRIBED_FEED_URL, UNSUBSCRIBED_FEED_TITLE, "")
+        "INSERT INTO feeds (url, title, site_url, created_at) VALUES (?, ?, ?, ?)",
+        (UNSUBSCRIBED_FEED_URL, UNSUBSCRIBED_FEED_TITLE, "", int(time.time()))
     )
     db.commit()
     return cursor.lastrowid
@@ -95,9 +125,11 @@ def add_feed(url: str) -> Tuple[Feed | None, str | None]:
     title = result.parsed.feed.get("title", url)
     site_url = result.parsed.feed.get("link", "")
 
+    now = int(time.time())
     cursor = db.execute(
-        "INSERT INTO feeds (url, title, site_url, last_fetched, etag, last_modified) VALUES (?, ?, ?, ?, ?, ?)",
-        (url, title, site_url, datetime.now(timezone.utc).isoformat(), result.etag, result.last_modified)
+        "INSERT INTO feeds (url, title, site_url, last_fetched, etag, last_modified, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (url, title, site_url, now, result.etag, result.last_modified, now)
     )
     feed_id = cursor.lastrowid
     db.commit()
@@ -206,7 +238,7 @@ def refresh_feed(feed_id: int) -> Tuple[int, str | None]:
         db.execute("""
             UPDATE feeds SET last_fetched = ?, fetch_error_count = 0, last_error = NULL
             WHERE id = ?
-        """, (datetime.now(timezone.utc).isoformat(), feed_id))
+        """, (int(time.time()), feed_id))
         db.commit()
         return 0, "not_modified"
 
@@ -228,7 +260,7 @@ def refresh_feed(feed_id: int) -> Tuple[int, str | None]:
         SET last_fetched = ?, fetch_error_count = 0, last_error = NULL,
             etag = ?, last_modified = ?
         WHERE id = ?
-    """, (datetime.now(timezone.utc).isoformat(), result.etag, result.last_modified, feed_id))
+    """, (int(time.time()), result.etag, result.last_modified, feed_id))
     db.commit()
 
     new_count = save_articles_from_parsed(feed_id, result.parsed, apply_age_gate=True)
@@ -373,26 +405,54 @@ def _parse_entry_datetime(entry) -> datetime | None:
     return None
 
 
-def _guid_is_seen(db: sqlite3.Connection, feed_id: int, guid: str) -> bool:
-    return db.execute(
-        "SELECT 1 FROM seen_guids WHERE feed_id = ? AND guid = ?", (feed_id, guid)
-    ).fetchone() is not None
+def _guid_is_seen(db: sqlite3.Connection, feed_id: int, guid: str, now: int) -> bool:
+    """Check for a tombstone, refreshing its last-seen time (at most once per
+    TOMBSTONE_TOUCH_SECONDS) so retention cleanup knows the feed still
+    carries the entry."""
+    from src.app.services import article_service
+
+    row = db.execute(
+        "SELECT last_seen_at FROM seen_guids WHERE feed_id = ? AND guid = ?", (feed_id, guid)
+    ).fetchone()
+    if row is None:
+        return False
+    if (row["last_seen_at"] or 0) < now - article_service.TOMBSTONE_TOUCH_SECONDS:
+        db.execute(
+            "UPDATE seen_guids SET last_seen_at = ? WHERE feed_id = ? AND guid = ?",
+            (now, feed_id, guid)
+        )
+    return True
 
 
-def _record_seen_guid(db: sqlite3.Connection, feed_id: int, guid: str) -> None:
+def _record_seen_guid(db: sqlite3.Connection, feed_id: int, guid: str, now: int) -> None:
     db.execute(
-        "INSERT OR IGNORE INTO seen_guids (feed_id, guid) VALUES (?, ?)", (feed_id, guid)
+        "INSERT OR IGNORE INTO seen_guids (feed_id, guid, last_seen_at) VALUES (?, ?, ?)",
+        (feed_id, guid, now)
     )
 
 
+def _touch_parsed_at(db: sqlite3.Connection, feed_id: int, now: int) -> None:
+    """Record that the feed was parsed, at most once per
+    TOMBSTONE_TOUCH_SECONDS. Only prune_seen_guids reads last_parsed_at, to
+    that precision, so a refresh that finds nothing new stays read-only."""
+    from src.app.services import article_service
+
+    row = db.execute("SELECT last_parsed_at FROM feeds WHERE id = ?", (feed_id,)).fetchone()
+    if row is not None and (row["last_parsed_at"] or 0) >= now - article_service.TOMBSTONE_TOUCH_SECONDS:
+        return
+    db.execute("UPDATE feeds SET last_parsed_at = ? WHERE id = ?", (now, feed_id))
+
+
 def save_articles_from_parsed(feed_id: int, parsed: feedparser.FeedParserDict,
                               apply_age_gate: bool = False) -> int:
-    from src.app.services import article_service, filter_service
+    from src.app.services import article_service, filter_service, search_service
 
     db = get_db()
     new_count = 0
-    compiled_filters = filter_service.get_compiled_active_filters()
+    filter_engine = filter_service.get_active_filter_engine()
     cutoff = datetime.now(timezone.utc) - timedelta(days=article_service.RETENTION_DAYS)
+    compress = current_app.config.get("COMPRESS_ARTICLE_BODIES", False)
+    now = int(time.time())
 
     new_articles = []
 
@@ -407,7 +467,7 @@ def save_articles_from_parsed(feed_id: int, parsed: feedparser.FeedParserDict,
         if apply_age_gate:
             if not undated and published_dt < cutoff:
                 continue
-            if undated and _guid_is_seen(db, feed_id, guid):
+            if undated and _guid_is_seen(db, feed_id, guid, now):
                 continue
 
         title = html.unescape(entry.get("title", ""))
@@ -418,22 +478,32 @@ def save_articles_from_parsed(feed_id: int, parsed: feedparser.FeedParserDict,
         url = entry.get("link", "")
         image_url = extract_image_url(entry)
 
-        published_at = published_dt.isoformat() if published_dt else None
+        published_at = int(published_dt.timestamp()) if published_dt else None
+        match_title = match_text(title)
+        match_summary = match_text(summary)
+        indexed_content = search_service.search_content(match_summary, content)
+        stored_summary = compress_text(summary) if compress else summary
+        stored_content = compress_text(content) if compress else content
 
         try:
             cursor = db.execute("""
-                INSERT INTO articles (feed_id, guid, title, summary, content, url, image_url, published_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (feed_id, guid, title, summary, content, url, image_url, published_at))
-            new_articles.append((cursor.lastrowid, title, summary))
+                INSERT INTO articles (feed_id, guid, title, summary, content, url, image_url,
+                                      published_at, created_at, match_title, match_summary,
+                                      search_content)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (feed_id, guid, title, stored_summary, stored_content, url, image_url,
+                  published_at, now, match_title, match_summary, indexed_content))
+            new_articles.append((cursor.lastrowid, match_title, match_summary, content))
             new_count += 1
             if undated:
-                _record_seen_guid(db, feed_id, guid)
+                _record_seen_guid(db, feed_id, guid, now)
         except sqlite3.IntegrityError:
             pass
 
+    _touch_parsed_at(db, feed_id, now)
+    db.commit()
+
     if new_articles:
-        db.commit()
-        filter_service.apply_filters_to_articles(new_articles, compiled_filters=compiled_filters)
+        filter_service.apply_filters_to_articles(new_articles, engine=filter_engine)
 
     return new_count
@@ -1,11 +1,141 @@
+import functools
+import json
+import logging
 import re
 import sqlite3
-from src.app.database import get_db
-from src.app.models import Filter, Article
+import threading
+import time
+from typing import Callable, Iterator, Sequence
 
-SQLITE_VAR_LIMIT = 999
+from flask import current_app
+
+from src.app.compression import decompress_text
+from src.app.counters import VersionedCache
+from src.app.database import FILTER_TARGETS, get_db, iter_projection
+from src.app.filter_engine import (CONTENT_TARGETS, ArticleBatch, FilterCosts, FilterEngine,
+                                   add_costs, compile_pattern, fts_query,
+                                   has_nested_quantifier, required_literals)
+from src.app.filter_worker import FilterTimeout, FilterWorker, iter_pool_matches
+from src.app.models import Filter, FilterStats, Article
+from src.app.services import settings_service
+from src.app.textnorm import match_text
+
+logger = logging.getLogger(__name__)
 
-FILTER_UPDATABLE_COLUMNS = {"name", "pattern", "target", "is_active"}
+SQLITE_VAR_LIMIT = 999
+# Articles folded and scanned together by FilterEngine; bounds the size of the
+# joined text it builds.
+FILTER_BATCH_SIZE = 2000
+
+# Bulk evaluations (new filter, reapply) at least this large are spread over
+# FILTER_WORKERS processes.
+PARALLEL_MATCH_MIN_ARTICLES = 10000
+# Time a match-count preview may spend before answering with an estimate.
+MATCH_COUNT_BUDGET_SECONDS = 0.04
+# Id range per batch of the unread corpus: the unit of reuse across
+# refreshes and of progress under the preview budget.
+UNREAD_CORPUS_BUCKET = 2048
+# Filter costs are buffered per process and written to filter_stats at most
+# this often, or whenever they're read.
+FILTER_STATS_FLUSH_SECONDS = 60
+# A filter using at least this share of all filters' evaluation time is
+# flagged as dominating it.
+HOT_FILTER_SHARE = 0.5
+# Time a "profile this pattern" dry run may spend on the unread corpus.
+PROFILE_BUDGET_SECONDS = 1.0
+# Previews and profiles match each corpus batch in a filter worker; a batch
+# taking longer than this kills it and the pattern is reported too slow.
+PREVIEW_BATCH_TIMEOUT_SECONDS = 0.5
+MATCH_TEXT_BACKFILL_BATCH_SIZE = 500
+# Setting holding the scheduler's reapply progress, for the Filters page.
+REAPPLY_STATUS_SETTING = "filter_reapply_status"
+
+FILTER_UPDATABLE_COLUMNS = {"name", "pattern", "target", "is_active", "disabled_reason"}
+
+TARGET_ERROR = "Target must be 'title', 'summary', 'both', 'content', or 'any'"
+
+NESTED_QUANTIFIER_ERROR = (
+    "Pattern repeats a group that contains + or * (like (a+)+), or "
+    "alternatives that overlap (like (a|aa)+), which can take exponential time"
+)
+
+PREVIEW_TIMEOUT_ERROR = "Pattern is too slow to run on your articles"
+
+
+# What filters read from articles. The raw fields are only read for rows
+# stored before match text existed; _match_text_row derives it for those.
+_MATCH_TEXT_COLUMNS = """
+    a.match_title, a.match_summary,
+    CASE WHEN a.match_title IS NULL THEN a.title END AS title,
+    CASE WHEN a.match_summary IS NULL THEN a.summary END AS summary
+"""
+
+# Articles a filter can match, given its fts_query: the match index's hits,
+# plus rows whose match text isn't stored (or indexed) yet.
+_INDEX_CANDIDATES = """a.id IN (
+    SELECT rowid FROM filter_fts WHERE filter_fts MATCH ?
+    UNION ALL
+    SELECT id FROM articles WHERE match_title IS NULL OR match_summary IS NULL
+)"""
+
+
+def _indexed_queries(engine: FilterEngine) -> dict[int, str]:
+    """fts_query of every rule in engine that has one, by filter id. Empty
+    when this SQLite build has no match index."""
+    queries = {}
+    for rule in engine.rules:
+        query = fts_query(rule.compiled, rule.target)
+        if query is not None:
+            queries[rule.filter_id] = query
+    if queries and not _has_match_index():
+        return {}
+    return queries
+
+
+def _has_match_index() -> bool:
+    return get_db().execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'filter_fts'"
+    ).fetchone() is not None
+
+
+def _match_columns(engine: FilterEngine) -> str:
+    """_MATCH_TEXT_COLUMNS, plus content when engine has content filters."""
+    return _MATCH_TEXT_COLUMNS + (", a.content" if engine.needs_content else "")
+
+
+def _match_text_row(row) -> tuple:
+    """(id, match title, match summary) from a _MATCH_TEXT_COLUMNS row, with
+    the content HTML appended if the row has it (see _with_content)."""
+    title = row["match_title"]
+    summary = row["match_summary"]
+    if title is None:
+        title = match_text(row["title"])
+    if summary is None:
+        summary = match_text(decompress_text(row["summary"]))
+    if "content" in row.keys():
+        return row["id"], title, summary, decompress_text(row["content"])
+    return row["id"], title, summary
+
+
+def _with_content(engine: FilterEngine, articles: list[tuple]) -> list[tuple]:
+    """(id, match title, match summary[, content HTML]) articles ready for
+    engine: content becomes match text of at most FILTER_CONTENT_SCAN_CHARS
+    if engine has content filters, and is dropped otherwise.
+
+    Converting content is the main cost of those filters, so its time is
+    split between them in filter_stats.
+    """
+    if not engine.needs_content:
+        return [a[:3] for a in articles]
+    limit = current_app.config["FILTER_CONTENT_SCAN_CHARS"]
+    started = time.perf_counter()
+    prepared = [
+        (a[0], a[1], a[2], match_text(a[3] if len(a) > 3 else None, limit)) for a in articles
+    ]
+    content_rules = [rule.filter_id for rule in engine.rules if rule.target in CONTENT_TARGETS]
+    seconds = (time.perf_counter() - started) / len(content_rules)
+    _record_filter_costs({filter_id: [0, 0, seconds] for filter_id in content_rules})
+    return prepared
 
 
 def _chunked_update_is_read(db, article_ids: list[int]) -> None:
@@ -26,6 +156,58 @@ def get_all_filters() -> list[Filter]:
     return [Filter.from_row(row) for row in rows]
 
 
+# API field -> (SQL expression, converter applied to the stored value).
+FILTER_FIELDS = {
+    "id": ("f.id", None),
+    "name": ("f.name", None),
+    "pattern": ("f.pattern", None),
+    "target": ("f.target", None),
+    "is_active": ("f.is_active", bool),
+    "disabled_reason": ("f.disabled_reason", None),
+    "match_count": ("COALESCE(mc.match_count, 0)", None),
+    "evaluations": ("COALESCE(fs.evaluations, 0)", None),
+    "eval_matches": ("COALESCE(fs.matches, 0)", None),
+    "eval_seconds": ("COALESCE(fs.seconds, 0.0)", None),
+    "cost_share": ("COALESCE(fs.share, 0.0)", None),
+    "hot": ("COALESCE(fs.hot, 0)", bool),
+}
+
+_STATS_FIELDS = {"evaluations", "eval_matches", "eval_seconds", "cost_share", "hot"}
+
+_MATCH_COUNTS_JOIN = """
+    LEFT JOIN (
+        SELECT filter_id, COUNT(*) AS match_count FROM filter_matches GROUP BY filter_id
+    ) mc ON mc.filter_id = f.id
+"""
+
+# filter_stats with each filter's share of the total, and whether it
+# dominates (only meaningful once more than one filter has been measured).
+_FILTER_STATS_QUERY = f"""
+    SELECT filter_id, evaluations, matches, seconds,
+           COALESCE(share, 0.0) AS share,
+           (measured > 1 AND share >= {HOT_FILTER_SHARE}) AS hot
+    FROM (
+        SELECT filter_id, evaluations, matches, seconds,
+               seconds / NULLIF(SUM(seconds) OVER (), 0) AS share,
+               COUNT(*) OVER () AS measured
+        FROM filter_stats
+    )
+"""
+
+
+def get_filter_values(fields: Sequence[str]) -> Iterator[tuple]:
+    """The get_all_filters listing as plain tuples of the named FILTER_FIELDS."""
+    select = ", ".join(FILTER_FIELDS[name][0] for name in fields)
+    join = _MATCH_COUNTS_JOIN if "match_count" in fields else ""
+    if _STATS_FIELDS.intersection(fields):
+        flush_filter_stats(force=True)
+        join += f" LEFT JOIN ({_FILTER_STATS_QUERY}) fs ON fs.filter_id = f.id"
+    return iter_projection(
+        f"SELECT {select} FROM filters f {join} ORDER BY f.name COLLATE NOCASE", (),
+        [FILTER_FIELDS[name][1] for name in fields]
+    )
+
+
 def get_active_filters() -> list[Filter]:
     db = get_db()
     rows = db.execute("""
@@ -47,16 +229,19 @@ def create_filter(name: str, pattern: str, target: str) -> tuple[Filter | None,
     if not pattern or not pattern.strip():
         return None, "Pattern is required"
 
-    if target not in ("title", "summary", "both"):
-        return None, "Target must be 'title', 'summary', or 'both'"
+    if target not in FILTER_TARGETS:
+        return None, TARGET_ERROR
 
     if not is_valid_regex(pattern):
         return None, "Invalid regex pattern"
 
+    if has_nested_quantifier(pattern):
+        return None, NESTED_QUANTIFIER_ERROR
+
     db = get_db()
     cursor = db.execute(
-        "INSERT INTO filters (name, pattern, target) VALUES (?, ?, ?)",
-        (name.strip(), pattern.strip(), target)
+        "INSERT INTO filters (name, pattern, target, created_at) VALUES (?, ?, ?, ?)",
+        (name.strip(), pattern.strip(), target, int(time.time()))
     )
     db.commit()
 
@@ -81,8 +266,11 @@ def update_filter(
     if pattern is not None and not is_valid_regex(pattern):
         return None, "Invalid regex pattern"
 
-    if target is not None and target not in ("title", "summary", "both"):
-        return None, "Target must be 'title', 'summary', or 'both'"
+    if pattern is not None and has_nested_quantifier(pattern):
+        return None, NESTED_QUANTIFIER_ERROR
+
+    if target is not None and target not in FILTER_TARGETS:
+        return None, TARGET_ERROR
 
     db = get_db()
 
@@ -99,6 +287,12 @@ def update_filter(
     if not field_values:
         return existing, None
 
+    pattern_changed = pattern is not None and pattern != existing.pattern
+    target_changed = target is not None and target != existing.target
+    reactivated = is_active is True and not existing.is_active
+    if pattern_changed or target_changed or reactivated:
+        field_values["disabled_reason"] = None
+
     for col in field_values:
         if col not in FILTER_UPDATABLE_COLUMNS:
             return None, f"Invalid field: {col}"
@@ -106,14 +300,14 @@ def update_filter(
     set_clause = ", ".join(f"{col} = ?" for col in field_values)
     params = list(field_values.values()) + [filter_id]
     db.execute(f"UPDATE filters SET {set_clause} WHERE id = ?", params)
+    if pattern_changed or target_changed:
+        # Costs measured for the old pattern say nothing about the new one.
+        _discard_filter_costs(filter_id)
+        db.execute("DELETE FROM filter_stats WHERE filter_id = ?", (filter_id,))
     db.commit()
 
     updated = get_filter_by_id(filter_id)
 
-    pattern_changed = pattern is not None and pattern != existing.pattern
-    target_changed = target is not None and target != existing.target
-    reactivated = is_active is True and not existing.is_active
-
     if pattern_changed or target_changed or reactivated:
         clear_filter_matches(filter_id)
         apply_filter_to_existing_articles(updated)
@@ -136,30 +330,30 @@ def is_valid_regex(pattern: str) -> bool:
         return False
 
 
-def apply_filter_to_existing_articles(filter_obj: Filter) -> int:
+def apply_filter_to_existing_articles(filter_obj: Filter,
+                                      progress: Callable[[int], None] | None = None) -> int:
     if not filter_obj.is_active:
         return 0
 
     db = get_db()
 
-    rows = db.execute("""
-        SELECT a.id, a.title, a.summary, a.is_read
+    engine = FilterEngine([(filter_obj, compile_pattern(filter_obj.pattern))])
+    query = _indexed_queries(engine).get(filter_obj.id)
+    through = db.execute("SELECT COALESCE(MAX(id), 0) FROM articles").fetchone()[0]
+    rows = db.execute(f"""
+        SELECT a.id, {_match_columns(engine)}, a.is_read
         FROM articles a
         WHERE a.is_saved = 0
           AND a.id NOT IN (
               SELECT article_id FROM filter_matches WHERE filter_id = ?
           )
-    """, (filter_obj.id,)).fetchall()
+          {"AND " + _INDEX_CANDIDATES if query else ""}
+        ORDER BY a.id
+    """, (filter_obj.id, query) if query else (filter_obj.id,)).fetchall()
 
-    match_ids = []
-    unread_matched_ids = []
-    compiled = re.compile(filter_obj.pattern, re.IGNORECASE)
-
-    for row in rows:
-        if article_matches_filter(row["title"], row["summary"], compiled, filter_obj.target):
-            match_ids.append(row["id"])
-            if not row["is_read"]:
-                unread_matched_ids.append(row["id"])
+    is_read = {row["id"]: row["is_read"] for row in rows}
+    match_ids = [article_id for article_id, _ in _match_rows(engine, rows, progress)]
+    unread_matched_ids = [article_id for article_id in match_ids if not is_read[article_id]]
 
     if match_ids:
         db.executemany(
@@ -168,7 +362,11 @@ def apply_filter_to_existing_articles(filter_obj: Filter) -> int:
         )
         if unread_matched_ids:
             _chunked_update_is_read(db, unread_matched_ids)
-        db.commit()
+    db.execute(
+        "UPDATE filters SET evaluated_through = ? WHERE id = ?", (through, filter_obj.id)
+    )
+    db.commit()
+    flush_filter_stats()
 
     return len(match_ids)
 
@@ -180,19 +378,147 @@ def count_unread_matches(pattern: str, target: str) -> int:
     add: saved articles are exempt, and already-filtered articles are read so
     they're excluded here. Assumes pattern is a valid regex.
     """
+    count, _ = preview_unread_matches(pattern, target, budget=None)
+    return count
+
+
+def preview_unread_matches(pattern: str, target: str,
+                           budget: float | None = MATCH_COUNT_BUDGET_SECONDS) -> tuple[int, bool]:
+    """count_unread_matches against the in-memory unread corpus, stopping
+    after budget seconds. Returns (count, approximate); an approximate count
+    is extrapolated from the part of the corpus that was checked. Without a
+    budget, only the articles the match index points at are checked.
+    Raises FilterTimeout if the pattern overruns the preview worker."""
+    start = time.monotonic()
+    probe = Filter(id=None, name="", pattern=pattern, target=target)
+    engine = FilterEngine([(probe, compile_pattern(pattern))])
+    query = _indexed_queries(engine).get(None) if budget is None else None
+    if query is not None:
+        rows = get_db().execute(f"""
+            SELECT a.id, {_MATCH_TEXT_COLUMNS} FROM articles a
+            WHERE a.is_saved = 0 AND a.is_read = 0 AND {_INDEX_CANDIDATES}
+        """, (query,)).fetchall()
+        batch = ArticleBatch([_match_text_row(row) for row in rows])
+        return len(_preview_match(engine, batch)), False
+    buckets = _unread_corpus.get()
+    deadline = start + budget if budget is not None else None
+    prepare = _load_unread_content if engine.needs_content else None
+    return engine.count_matches(list(buckets.values()), deadline, prepare,
+                                lambda batch: _preview_match(engine, batch))
+
+
+_preview_worker = FilterWorker()
+
+
+def _preview_match(engine: FilterEngine, batch: ArticleBatch,
+                   costs: FilterCosts | None = None) -> list[tuple[int, int]]:
+    """engine.match for a pattern typed into a form, which isn't saved yet.
+    It runs in a filter worker of its own, so a pathological pattern can be
+    killed instead of holding a web thread, allowing
+    PREVIEW_BATCH_TIMEOUT_SECONDS per batch; FilterTimeout propagates. A
+    FILTER_TIME_BUDGET_SECONDS of 0 matches in-process, as for saved
+    filters."""
+    if not current_app.config.get("FILTER_TIME_BUDGET_SECONDS") or not batch:
+        return engine.match(batch, costs)
+    articles = list(zip(batch.ids, batch.titles, batch.summaries, batch.contents))
+    pairs, batch_costs = _preview_worker.match(engine, articles, PREVIEW_BATCH_TIMEOUT_SECONDS)
+    if costs is not None:
+        add_costs(costs, batch_costs)
+    return pairs
+
+
+def _load_unread_content(batch: ArticleBatch) -> ArticleBatch:
+    """A corpus batch with content match text, for previewing content
+    filters. Content isn't kept in the corpus; it can be large."""
+    limit = current_app.config["FILTER_CONTENT_SCAN_CHARS"]
     db = get_db()
-    rows = db.execute(
-        "SELECT title, summary FROM articles WHERE is_saved = 0 AND is_read = 0"
-    ).fetchall()
-
-    compiled = re.compile(pattern, re.IGNORECASE)
-    return sum(
-        1 for row in rows
-        if article_matches_filter(row["title"], row["summary"], compiled, target)
-    )
+    contents = {}
+    for i in range(0, len(batch.ids), SQLITE_VAR_LIMIT):
+        chunk = batch.ids[i:i + SQLITE_VAR_LIMIT]
+        placeholders = ",".join("?" for _ in chunk)
+        for article_id, content in db.execute(
+            f"SELECT id, content FROM articles WHERE id IN ({placeholders})", chunk
+        ):
+            contents[article_id] = match_text(decompress_text(content), limit)
+    return batch.with_contents([contents.get(article_id, "") for article_id in batch.ids])
 
 
-def reapply_all_filters() -> int:
+def _refresh_unread_corpus(previous: dict[int, ArticleBatch] | None) -> dict[int, ArticleBatch]:
+    """Match text of unread, unsaved articles grouped into ArticleBatches by
+    id // UNREAD_CORPUS_BUCKET. A bucket whose ids are unchanged is reused
+    with its folded text; text for articles new to a bucket is fetched by id."""
+    db = get_db()
+    if previous is None:
+        rows = db.execute(
+            f"SELECT a.id, {_MATCH_TEXT_COLUMNS} FROM articles a "
+            "WHERE a.is_saved = 0 AND a.is_read = 0 ORDER BY a.id"
+        ).fetchall()
+        grouped: dict[int, list] = {}
+        for row in rows:
+            grouped.setdefault(row["id"] // UNREAD_CORPUS_BUCKET, []).append(_match_text_row(row))
+        return {key: ArticleBatch(articles) for key, articles in grouped.items()}
+
+    # Unordered so the covering (is_read, is_saved, ...) index answers it.
+    grouped_ids: dict[int, list[int]] = {}
+    for (article_id,) in db.execute(
+        "SELECT id FROM articles WHERE is_saved = 0 AND is_read = 0"
+    ):
+        grouped_ids.setdefault(article_id // UNREAD_CORPUS_BUCKET, []).append(article_id)
+    for ids in grouped_ids.values():
+        ids.sort()
+
+    known = {}
+    missing = []
+    for key, ids in grouped_ids.items():
+        old = previous.get(key)
+        if old is not None and old.ids == ids:
+            continue
+        if old is not None:
+            known.update(zip(old.ids, zip(old.titles, old.summaries)))
+        missing.extend(article_id for article_id in ids if article_id not in known)
+    for i in range(0, len(missing), SQLITE_VAR_LIMIT):
+        chunk = missing[i:i + SQLITE_VAR_LIMIT]
+        placeholders = ",".join("?" for _ in chunk)
+        for row in db.execute(
+            f"SELECT a.id, {_MATCH_TEXT_COLUMNS} FROM articles a WHERE a.id IN ({placeholders})",
+            chunk
+        ):
+            article_id, title, summary = _match_text_row(row)
+            known[article_id] = (title, summary)
+
+    buckets = {}
+    for key, ids in grouped_ids.items():
+        old = previous.get(key)
+        if old is not None and old.ids == ids:
+            buckets[key] = old
+        else:
+            buckets[key] = ArticleBatch([
+                (article_id, *known[article_id]) for article_id in ids if article_id in known
+            ])
+    return buckets
+
+
+# Kept per worker and refreshed when the articles counter moves, so typing
+# in the filter sheet doesn't re-read every unread article per keystroke.
+_unread_corpus = VersionedCache("articles", _refresh_unread_corpus)
+
+
+def reapply_all_filters(progress: Callable[[int], None] | None = None,
+                        parallel: bool = False) -> int:
+    """Re-mark filtered articles read and catch up every active filter on
+    articles it hasn't been evaluated against.
+
+    Each filter records in evaluated_through the highest article id it has
+    been checked against; a pattern or target change re-evaluates from
+    scratch via apply_filter_to_existing_articles. Here only articles above
+    a filter's watermark are checked, plus those queued in filter_recheck:
+    against every filter when unsaved since a pass skipped them while
+    saved, against one filter when taken out of its matches. The result is
+    the same as checking every unsaved article against every filter.
+    progress is called with the number of articles checked so far.
+    parallel allows a process pool for large passes (see _match_groups);
+    only the scheduler asks for it.
+    """
     db = get_db()
 
     remarked = db.execute("""
@@ -203,82 +529,455 @@ def reapply_all_filters() -> int:
     db.commit()
     remarked_count = remarked.rowcount
 
-    compiled_filters = get_compiled_active_filters()
-    if not compiled_filters:
+    engine = get_active_filter_engine()
+    if not engine:
         return remarked_count
 
-    existing_matches = set()
-    for row in db.execute("SELECT article_id, filter_id FROM filter_matches").fetchall():
-        existing_matches.add((row["article_id"], row["filter_id"]))
+    through = db.execute("SELECT COALESCE(MAX(id), 0) FROM articles").fetchone()[0]
+    watermarks = dict(db.execute(
+        "SELECT id, evaluated_through FROM filters WHERE is_active = 1"
+    ).fetchall())
+    queued = db.execute("SELECT article_id, filter_id FROM filter_recheck").fetchall()
+    recheck = {article_id for article_id, filter_id in queued if filter_id == 0}
+    recheck_pairs: dict[int, set[int]] = {}
+    for article_id, filter_id in queued:
+        if filter_id != 0 and filter_id in watermarks:
+            recheck_pairs.setdefault(filter_id, set()).add(article_id)
+
+    by_watermark: dict[int, list[int]] = {}
+    for rule in engine.rules:
+        by_watermark.setdefault(watermarks.get(rule.filter_id, 0), []).append(rule.filter_id)
+
+    # A group whose filters all have a match index query only reads the
+    # articles those queries point at; the rest read every article above
+    # their watermark.
+    indexed = _indexed_queries(engine)
+    scanned = {watermark: filter_ids for watermark, filter_ids in by_watermark.items()
+               if not all(filter_id in indexed for filter_id in filter_ids)}
+    groups = []
+    rows = []
+    if scanned:
+        rows = db.execute(f"""
+            SELECT a.id, {_match_columns(engine)}, a.is_read
+            FROM articles a
+            WHERE a.is_saved = 0 AND a.id <= ?
+              AND (a.id > ? OR a.id IN (SELECT article_id FROM filter_recheck WHERE filter_id = 0))
+            ORDER BY a.id
+        """, (through, min(scanned))).fetchall()
+        groups = [
+            (engine.subset(filter_ids),
+             [row for row in rows if row["id"] > watermark or row["id"] in recheck])
+            for watermark, filter_ids in scanned.items()
+        ]
+    for watermark, filter_ids in by_watermark.items():
+        if watermark in scanned:
+            continue
+        candidates = db.execute(f"""
+            SELECT a.id, {_MATCH_TEXT_COLUMNS}, a.is_read
+            FROM articles a
+            WHERE a.is_saved = 0 AND a.id <= ?
+              AND (a.id > ? OR a.id IN (SELECT article_id FROM filter_recheck WHERE filter_id = 0))
+              AND {_INDEX_CANDIDATES}
+            ORDER BY a.id
+        """, (through, watermark, " OR ".join(f"({indexed[fid]})" for fid in filter_ids))).fetchall()
+        groups.append((engine.subset(filter_ids), candidates))
+        rows.extend(candidates)
+    if recheck_pairs:
+        pair_rows = db.execute(f"""
+            SELECT a.id, {_match_columns(engine)}, a.is_read
+            FROM articles a
+            WHERE a.is_saved = 0
+              AND a.id IN (SELECT article_id FROM filter_recheck WHERE filter_id != 0)
+            ORDER BY a.id
+        """).fetchall()
+        for filter_id, article_ids in recheck_pairs.items():
+            groups.append((engine.subset([filter_id]),
+                           [row for row in pair_rows if row["id"] in article_ids]))
+        rows.extend(pair_rows)
+
+    match_rows = _match_groups(groups, progress, parallel)
+
+    new_count = 0
+    if match_rows:
+        new_count = db.executemany(
+            "INSERT OR IGNORE INTO filter_matches (article_id, filter_id) VALUES (?, ?)",
+            match_rows
+        ).rowcount
+        is_read = {row["id"]: row["is_read"] for row in rows}
+        unread_matched_ids = {article_id for article_id, _ in match_rows if not is_read[article_id]}
+        if unread_matched_ids:
+            _chunked_update_is_read(db, list(unread_matched_ids))
 
-    rows = db.execute("""
-        SELECT a.id, a.title, a.summary, a.is_read
-        FROM articles a
-        WHERE a.is_saved = 0
-    """).fetchall()
+    db.executemany(
+        "UPDATE filters SET evaluated_through = ? WHERE id = ? AND evaluated_through < ?",
+        [(through, rule.filter_id, through) for rule in engine.rules]
+    )
+    db.executemany("DELETE FROM filter_recheck WHERE article_id = ? AND filter_id = ?",
+                   [tuple(row) for row in queued])
+    db.commit()
+    flush_filter_stats()
 
-    new_match_rows = []
-    unread_matched_ids = set()
+    return remarked_count + new_count
 
-    for row in rows:
-        for f, compiled in compiled_filters:
-            if (row["id"], f.id) in existing_matches:
-                continue
-            if article_matches_filter(row["title"], row["summary"], compiled, f.target):
-                new_match_rows.append((row["id"], f.id))
-                if not row["is_read"]:
-                    unread_matched_ids.add(row["id"])
-
-    if new_match_rows:
-        db.executemany(
-            "INSERT OR IGNORE INTO filter_matches (article_id, filter_id) VALUES (?, ?)",
-            new_match_rows
-        )
 
-    if unread_matched_ids:
-        _chunked_update_is_read(db, list(unread_matched_ids))
+def get_reapply_status() -> dict | None:
+    """The scheduler's last or running reapply pass, as recorded by
+    set_reapply_status, or None if there hasn't been one."""
+    value = settings_service.get_setting(REAPPLY_STATUS_SETTING)
+    try:
+        return json.loads(value) if value else None
+    except ValueError:
+        return None
 
-    if new_match_rows or unread_matched_ids:
-        db.commit()
 
-    return remarked_count + len(new_match_rows)
+def set_reapply_status(**status) -> None:
+    settings_service.set_setting(REAPPLY_STATUS_SETTING, json.dumps(status))
 
 
 def clear_filter_matches(filter_id: int) -> None:
+    """Drop every match of a filter, ahead of a full re-evaluation; nothing
+    is queued for recheck."""
     db = get_db()
     db.execute("DELETE FROM filter_matches WHERE filter_id = ?", (filter_id,))
+    db.execute("DELETE FROM filter_recheck WHERE filter_id = ?", (filter_id,))
     db.commit()
 
 
-def get_compiled_active_filters() -> list[tuple[Filter, re.Pattern]]:
+def remove_filter_match(article_id: int, filter_id: int) -> bool:
+    """Take one article out of a filter's matches. The pair is queued in
+    filter_recheck so the next reapply evaluates it again, as a full pass
+    would, without moving the filter's evaluated_through back. Returns
+    False if there was no such match."""
+    db = get_db()
+    removed = db.execute(
+        "DELETE FROM filter_matches WHERE article_id = ? AND filter_id = ?",
+        (article_id, filter_id)
+    ).rowcount
+    if removed:
+        db.execute("INSERT OR IGNORE INTO filter_recheck (article_id, filter_id) VALUES (?, ?)",
+                   (article_id, filter_id))
+    db.commit()
+    return bool(removed)
+
+
+def backfill_match_text(batch_size: int = MATCH_TEXT_BACKFILL_BATCH_SIZE) -> int:
+    """Store match text for articles saved before it existed, one batch per
+    commit. Filters derive it on the fly meanwhile, so this only saves work."""
+    db = get_db()
+    last_id = 0
+    filled = 0
+    while True:
+        rows = db.execute(f"""
+            SELECT a.id, {_MATCH_TEXT_COLUMNS} FROM articles a
+            WHERE (a.match_title IS NULL OR a.match_summary IS NULL) AND a.id > ?
+            ORDER BY a.id
+            LIMIT ?
+        """, (last_id, batch_size)).fetchall()
+        if not rows:
+            break
+
+        db.executemany(
+            "UPDATE articles SET match_title = ?, match_summary = ? WHERE id = ?",
+            [(title, summary, article_id)
+             for article_id, title, summary in map(_match_text_row, rows)]
+        )
+        db.commit()
+        filled += len(rows)
+        last_id = rows[-1]["id"]
+
+    return filled
+
+
+def _match_rows(engine: FilterEngine, rows,
+                progress: Callable[[int], None] | None = None) -> list[tuple[int, int]]:
+    """Run engine over article rows selected with _match_columns(engine);
+    returns (article_id, filter_id) pairs."""
+    return _match_groups([(engine, rows)], progress)
+
+
+def _match_groups(groups: list[tuple[FilterEngine, list]],
+                  progress: Callable[[int], None] | None = None,
+                  parallel: bool = False) -> list[tuple[int, int]]:
+    """_match_rows for several (engine, rows) groups at once.
+
+    Rows (ordered by id) are cut into FILTER_BATCH_SIZE slices, so each
+    batch covers an id range. With parallel, from
+    PARALLEL_MATCH_MIN_ARTICLES on, batches are spread over FILTER_WORKERS
+    processes spawned for the call; a batch that overruns there,
+    and any after it, are retried one at a time in the filter worker.
+    Otherwise batches go through _guarded_match. progress
+    is called with the number of articles checked so far.
+    """
+    jobs = [
+        (engine, _with_content(
+            engine, [_match_text_row(row) for row in rows[start:start + FILTER_BATCH_SIZE]]
+        ))
+        for engine, rows in groups if engine
+        for start in range(0, len(rows), FILTER_BATCH_SIZE)
+    ]
+    pairs = []
+    checked = 0
+    done = 0
+
+    def merge(batch_pairs, batch):
+        nonlocal checked
+        pairs.extend(batch_pairs)
+        checked += len(batch)
+        if progress is not None:
+            progress(checked)
+
+    budget = current_app.config.get("FILTER_TIME_BUDGET_SECONDS")
+    workers = current_app.config.get("FILTER_WORKERS") or 1
+    total = sum(len(batch) for _, batch in jobs)
+    if (parallel and budget and workers > 1 and len(jobs) > 1
+            and total >= PARALLEL_MATCH_MIN_ARTICLES):
+        most_rules = max(len(engine.rules) for engine, _ in jobs)
+        try:
+            for batch_pairs, costs in iter_pool_matches(jobs, workers, budget * most_rules):
+                _record_filter_costs(costs)
+                merge(batch_pairs, jobs[done][1])
+                done += 1
+        except FilterTimeout:
+            logger.warning("Parallel filter evaluation overran after %d of %d batches; "
+                           "finishing one batch at a time in the filter worker",
+                           done, len(jobs))
+            for engine, batch in jobs[done:]:
+                merge(_worker_match(engine, batch, budget), batch)
+            return pairs
+
+    for engine, batch in jobs[done:]:
+        merge(_guarded_match(engine, batch), batch)
+    return pairs
+
+
+_worker = FilterWorker()
+
+# Patterns that overran FILTER_TIME_BUDGET_SECONDS in-process, in this
+# process. They are matched in the worker from then on.
+_slow_patterns: set[str] = set()
+_slow_patterns_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1024)
+def _risky_pattern(pattern: str) -> bool:
+    # Saving rejects these, but filters saved before the check may have one.
+    return has_nested_quantifier(pattern)
+
+
+def _guarded_match(engine: FilterEngine,
+                   articles: list[tuple[int, str | None, str | None]]) -> list[tuple[int, int]]:
+    """engine.match, sending only risky filters to the filter worker.
+
+    Filters run in-process unless their pattern has a nested quantifier or
+    has already overrun FILTER_TIME_BUDGET_SECONDS in this process; a
+    filter that overruns in-process is noted so its next batch goes to the
+    worker. There each filter gets the budget for the batch: when the batch
+    overruns, filters are retried one at a time and any that overrun alone
+    are deactivated, so one pathological pattern can't stall ingest for
+    every article after it. A budget of 0 matches everything in-process.
+    Each filter's cost is recorded for filter_stats.
+    """
+    budget = current_app.config.get("FILTER_TIME_BUDGET_SECONDS")
+    if not engine or not articles:
+        return []
+    guarded = set()
+    if budget:
+        with _slow_patterns_lock:
+            guarded = {f.id for f, _ in engine.compiled_filters
+                       if f.pattern in _slow_patterns or _risky_pattern(f.pattern)}
+    inline = engine.subset(rule.filter_id for rule in engine.rules
+                           if rule.filter_id not in guarded) if guarded else engine
+
+    pairs = []
+    if inline:
+        costs = {}
+        pairs = inline.match(articles, costs)
+        _record_filter_costs(costs)
+        if budget:
+            _note_slow_filters(inline, costs, budget)
+    if guarded:
+        pairs.extend(_worker_match(engine.subset(guarded), articles, budget))
+    return pairs
+
+
+def _note_slow_filters(engine: FilterEngine, costs: FilterCosts, budget: float) -> None:
+    patterns = {f.id: f.pattern for f, _ in engine.compiled_filters}
+    for filter_id, (evaluations, _, seconds) in costs.items():
+        if seconds > budget and filter_id in patterns:
+            logger.warning("Filter %s took %.2fs for %d articles; matching it in the "
+                           "filter worker from now on", filter_id, seconds, evaluations)
+            with _slow_patterns_lock:
+                _slow_patterns.add(patterns[filter_id])
+
+
+def _worker_match(engine: FilterEngine, articles: list[tuple],
+                  budget: float) -> list[tuple[int, int]]:
+    try:
+        pairs, costs = _worker.match(engine, articles, budget * len(engine.rules))
+        _record_filter_costs(costs)
+        return pairs
+    except FilterTimeout:
+        pass
+
+    pairs = []
+    for rule in engine.rules:
+        try:
+            rule_pairs, costs = _worker.match(engine.subset([rule.filter_id]), articles, budget)
+        except FilterTimeout:
+            _record_filter_costs({rule.filter_id: [len(articles), 0, budget]})
+            _deactivate_slow_filter(rule.filter_id, budget, len(articles))
+            continue
+        _record_filter_costs(costs)
+        pairs.extend(rule_pairs)
+    return pairs
+
+
+def _deactivate_slow_filter(filter_id: int | None, budget: float, article_count: int) -> None:
+    reason = (f"Deactivated automatically: matching {article_count} "
+              f"article{'s' if article_count != 1 else ''} took longer than {budget:g}s")
+    logger.warning("Filter %s exceeded its time budget; deactivating", filter_id)
+    db = get_db()
+    db.execute(
+        "UPDATE filters SET is_active = 0, disabled_reason = ? WHERE id = ?",
+        (reason, filter_id)
+    )
+    db.commit()
+
+
+# Costs recorded by this process since its last flush, per database.
+_pending_costs: dict[str, FilterCosts] = {}
+_last_stats_flush: dict[str, float] = {}
+_pending_costs_lock = threading.Lock()
+
+
+def _record_filter_costs(costs: FilterCosts) -> None:
+    if not costs:
+        return
+    with _pending_costs_lock:
+        add_costs(_pending_costs.setdefault(current_app.config["DATABASE"], {}), costs)
+
+
+def _discard_filter_costs(filter_id: int) -> None:
+    with _pending_costs_lock:
+        _pending_costs.get(current_app.config["DATABASE"], {}).pop(filter_id, None)
+
+
+def flush_filter_stats(force: bool = False) -> None:
+    """Add this process's buffered filter costs to filter_stats, at most
+    every FILTER_STATS_FLUSH_SECONDS unless forced. Commits, so call it
+    between transactions."""
+    key = current_app.config["DATABASE"]
+    now = time.monotonic()
+    with _pending_costs_lock:
+        last = _last_stats_flush.get(key)
+        if not force and last is not None and now - last < FILTER_STATS_FLUSH_SECONDS:
+            return
+        _last_stats_flush[key] = now
+        costs = _pending_costs.pop(key, None)
+    if not costs:
+        return
+    db = get_db()
+    # Costs of filters deleted since they were recorded are dropped.
+    db.executemany("""
+        INSERT INTO filter_stats (filter_id, evaluations, matches, seconds, updated_at)
+        SELECT id, ?, ?, ?, ? FROM filters WHERE id = ?
+        ON CONFLICT(filter_id) DO UPDATE SET
+            evaluations = evaluations + excluded.evaluations,
+            matches = matches + excluded.matches,
+            seconds = seconds + excluded.seconds,
+            updated_at = excluded.updated_at
+    """, [
+        (evaluations, matches, seconds, int(time.time()), filter_id)
+        for filter_id, (evaluations, matches, seconds) in costs.items()
+    ])
+    db.commit()
+
+
+def get_filter_stats() -> dict[int, FilterStats]:
+    """Recorded evaluation cost per filter id, including this process's
+    unflushed costs. Filters never evaluated are absent."""
+    flush_filter_stats(force=True)
+    return {
+        row["filter_id"]: FilterStats(
+            row["filter_id"], row["evaluations"], row["matches"], row["seconds"],
+            row["share"], bool(row["hot"])
+        )
+        for row in get_db().execute(_FILTER_STATS_QUERY)
+    }
+
+
+def profile_pattern(pattern: str, target: str,
+                    budget: float = PROFILE_BUDGET_SECONDS) -> dict:
+    """Dry run of pattern as a filter over the in-memory unread corpus,
+    newest batches first, for up to budget seconds. Reports what it would
+    cost per article; nothing is saved. Assumes pattern is a valid regex.
+    Raises FilterTimeout if a batch overruns the preview worker."""
+    buckets = _unread_corpus.get()
+    compiled = compile_pattern(pattern)
+    probe = Filter(id=0, name="", pattern=pattern, target=target)
+    engine = FilterEngine([(probe, compiled)])
+    deadline = time.monotonic() + budget
+    costs: FilterCosts = {}
+    for key in sorted(buckets, reverse=True):
+        if costs and time.monotonic() > deadline:
+            break
+        batch = buckets[key]
+        if engine.needs_content:
+            started = time.perf_counter()
+            batch = _load_unread_content(batch)
+            add_costs(costs, {0: [0, 0, time.perf_counter() - started]})
+        _preview_match(engine, batch, costs)
+    evaluations, matches, seconds = costs.get(0, [0, 0, 0.0])
+    literals = required_literals(compiled)
+    return {
+        "articles": evaluations,
+        "corpus_articles": sum(len(batch) for batch in buckets.values()),
+        "matches": matches,
+        "seconds": seconds,
+        "micros_per_article": seconds * 1e6 / evaluations if evaluations else 0.0,
+        "prefilter": sorted(literals) if literals is not None else None,
+    }
+
+
+def _compile_active_filters() -> FilterEngine:
     compiled = []
     for f in get_active_filters():
         try:
-            compiled.append((f, re.compile(f.pattern, re.IGNORECASE)))
+            compiled.append((f, compile_pattern(f.pattern)))
         except re.error:
             continue
-    return compiled
+    return FilterEngine(compiled)
+
+
+# Rebuilt only when the filters counter moves, so a refresh cycle compiles
+# the active set once per process rather than once per feed.
+_active_engine = VersionedCache("filters", lambda previous: _compile_active_filters())
+
+
+def get_active_filter_engine() -> FilterEngine:
+    return _active_engine.get()
+
+
+def get_compiled_active_filters() -> list[tuple[Filter, re.Pattern]]:
+    return list(get_active_filter_engine().compiled_filters)
 
 
 def apply_filters_to_articles(
-    articles: list[tuple[int, str | None, str | None]],
-    compiled_filters: list[tuple[Filter, re.Pattern]] | None = None
+    articles: list[tuple],
+    engine: FilterEngine | None = None
 ) -> int:
-    if compiled_filters is None:
-        compiled_filters = get_compiled_active_filters()
+    """Match freshly stored articles, given as (id, match_title,
+    match_summary[, content HTML]) with match text from textnorm.match_text,
+    and file the matches."""
+    if engine is None:
+        engine = get_active_filter_engine()
 
-    if not compiled_filters or not articles:
+    if not engine or not articles:
         return 0
 
     db = get_db()
-    match_rows = []
-    matched_article_ids = set()
-
-    for article_id, title, summary in articles:
-        for f, compiled in compiled_filters:
-            if article_matches_filter(title, summary, compiled, f.target):
-                match_rows.append((article_id, f.id))
-                matched_article_ids.add(article_id)
+    match_rows = _guarded_match(engine, _with_content(engine, articles))
+    matched_article_ids = {article_id for article_id, _ in match_rows}
 
     if match_rows:
         db.executemany(
@@ -287,20 +986,21 @@ def apply_filters_to_articles(
         )
         _chunked_update_is_read(db, list(matched_article_ids))
         db.commit()
+    flush_filter_stats()
 
     return len(matched_article_ids)
 
 
 def apply_filters_to_article(article_id: int, title: str | None, summary: str | None,
-                              compiled_filters: list[tuple[Filter, re.Pattern]] | None = None) -> list[int]:
-    if compiled_filters is None:
-        compiled_filters = get_compiled_active_filters()
-
-    matched_filter_ids = []
+                              engine: FilterEngine | None = None) -> list[int]:
+    if engine is None:
+        engine = get_active_filter_engine()
 
-    for f, compiled in compiled_filters:
-        if article_matches_filter(title, summary, compiled, f.target):
-            matched_filter_ids.append(f.id)
+    matched_filter_ids = [
+        filter_id for _, filter_id in _guarded_match(
+            engine, [(article_id, match_text(title), match_text(summary))]
+        )
+    ]
 
     if matched_filter_ids:
         db = get_db()
@@ -310,6 +1010,7 @@ def apply_filters_to_article(article_id: int, title: str | None, summary: str |
         )
         db.execute("UPDATE articles SET is_read = 1 WHERE id = ?", (article_id,))
         db.commit()
+    flush_filter_stats()
 
     return matched_filter_ids
 
@@ -318,41 +1019,113 @@ def article_matches_filter(
     title: str | None,
     summary: str | None,
     compiled_pattern: re.Pattern,
-    target: str
+    target: str,
+    content: str | None = None
 ) -> bool:
     title = title or ""
     summary = summary or ""
+    content = content or ""
 
     if target == "title":
         return bool(compiled_pattern.search(title))
     elif target == "summary":
         return bool(compiled_pattern.search(summary))
+    elif target == "content":
+        return bool(compiled_pattern.search(content))
+    elif target == "any":
+        return any(compiled_pattern.search(text) for text in (title, summary, content))
     else:
         return bool(compiled_pattern.search(title) or compiled_pattern.search(summary))
 
 
 
-def get_filtered_articles_by_rule() -> list[tuple[Filter, list[Article]]]:
-    db = get_db()
-    filters = get_all_filters()
-    result = []
+# Matches shown per rule on /filtered before "Show more".
+FILTERED_PAGE_SIZE = 20
 
-    for f in filters:
-        rows = db.execute("""
-            SELECT a.*, feeds.title as feed_title
-            FROM articles a
-            JOIN filter_matches fm ON a.id = fm.article_id
-            JOIN feeds ON a.feed_id = feeds.id
-            WHERE fm.filter_id = ?
-            ORDER BY a.published_at DESC
-        """, (f.id,)).fetchall()
+# Everything the filtered view renders; content is never read there.
+_FILTERED_ARTICLE_COLUMNS = """
+    a.id, a.feed_id, a.guid, a.title, a.summary, NULL AS content, a.url, a.image_url,
+    a.published_at, a.is_read, a.is_saved, a.created_at, feeds.title AS feed_title
+"""
+_FILTERED_ORDER = "COALESCE(a.published_at, 0) DESC, a.id DESC"
 
-        if rows:
-            result.append((f, [Article.from_row(row) for row in rows]))
 
+def filtered_cursor(article: Article) -> str:
+    """Keyset position after article in a rule's matches."""
+    return f"{article.published_ts or 0}:{article.id}"
+
+
+def parse_filtered_cursor(cursor: str) -> tuple[int, int] | None:
+    try:
+        published, article_id = cursor.split(":")
+        return int(published), int(article_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def get_filtered_articles_by_rule(
+    per_rule: int = FILTERED_PAGE_SIZE
+) -> list[tuple[Filter, list[Article], int, str | None]]:
+    """(filter, newest per_rule matches, total matches, cursor for the rest)
+    for every filter with matches, from one windowed query."""
+    db = get_db()
+    rows = db.execute(f"""
+        WITH ranked AS (
+            -- Articles first, so the ranking reads published_at from
+            -- idx_articles_published_at instead of from wide article rows.
+            SELECT fm.filter_id, fm.article_id,
+                   ROW_NUMBER() OVER (PARTITION BY fm.filter_id ORDER BY {_FILTERED_ORDER}) AS rn
+            FROM articles a
+            CROSS JOIN filter_matches fm ON fm.article_id = a.id
+        ),
+        totals AS (
+            SELECT filter_id, COUNT(*) AS total FROM filter_matches GROUP BY filter_id
+        )
+        SELECT r.filter_id, t.total, {_FILTERED_ARTICLE_COLUMNS}
+        FROM ranked r
+        JOIN totals t ON t.filter_id = r.filter_id
+        JOIN articles a ON a.id = r.article_id
+        JOIN feeds ON feeds.id = a.feed_id
+        WHERE r.rn <= ?
+        ORDER BY r.filter_id, r.rn
+    """, (per_rule,)).fetchall()
+
+    grouped: dict[int, list] = {}
+    for row in rows:
+        grouped.setdefault(row["filter_id"], []).append(row)
+
+    result = []
+    for f in get_all_filters():
+        group = grouped.get(f.id)
+        if not group:
+            continue
+        articles = Article.from_rows(group)
+        total = group[0]["total"]
+        next_cursor = filtered_cursor(articles[-1]) if total > len(articles) else None
+        result.append((f, articles, total, next_cursor))
     return result
 
 
+def get_filtered_articles_page(
+    filter_id: int, after: tuple[int, int], limit: int = FILTERED_PAGE_SIZE
+) -> tuple[list[Article], str | None]:
+    """The next limit matches of one rule after a filtered_cursor position,
+    and the cursor for the page after that (None at the end)."""
+    db = get_db()
+    rows = db.execute(f"""
+        SELECT {_FILTERED_ARTICLE_COLUMNS}
+        FROM filter_matches fm
+        JOIN articles a ON a.id = fm.article_id
+        JOIN feeds ON feeds.id = a.feed_id
+        WHERE fm.filter_id = ? AND (COALESCE(a.published_at, 0), a.id) < (?, ?)
+        ORDER BY {_FILTERED_ORDER}
+        LIMIT ?
+    """, (filter_id, after[0], after[1], limit + 1)).fetchall()
+    articles = Article.from_rows(rows[:limit])
+    next_cursor = filtered_cursor(articles[-1]) if len(rows) > limit else None
+    return articles, next_cursor
+
+
 def get_filter_match_count(filter_id: int) -> int:
     db = get_db()
     row = db.execute(
@@ -362,7 +1135,15 @@ def get_filter_match_count(filter_id: int) -> int:
     return row["count"]
 
 
-def get_total_filtered_count() -> int:
+def get_filter_match_counts() -> dict[int, int]:
+    """Match count of every filter with matches, in one grouped query."""
+    db = get_db()
+    return dict(db.execute(
+        "SELECT filter_id, COUNT(*) FROM filter_matches GROUP BY filter_id"
+    ).fetchall())
+
+
+def _count_filtered() -> int:
     db = get_db()
     row = db.execute(
         "SELECT COUNT(DISTINCT fm.article_id) as count "
@@ -372,3 +1153,12 @@ def get_total_filtered_count() -> int:
         "WHERE f.hidden = 0"
     ).fetchone()
     return row["count"]
+
+
+# The sidebar badge on every page; recounted only when matches or feed
+# visibility change. Deleted articles and feeds cascade to filter_matches.
+_total_filtered = VersionedCache(("filter_matches", "feeds"), lambda previous: _count_filtered())
+
+
+def get_total_filtered_count() -> int:
+    return _total_filtered.get()
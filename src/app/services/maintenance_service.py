@@ -0,0 +1,150 @@
+import logging
+import os
+import time
+
+from flask import current_app
+
+from src.app.database import get_db
+
+logger = logging.getLogger(__name__)
+
+
+WAL_CHECKPOINT_THRESHOLD_BYTES = 32 * 1024 * 1024
+VACUUM_STEP_PAGES = 256
+ANALYSIS_LIMIT = 400
+# Rough VACUUM throughput used to decide whether converting an existing file
+# to incremental auto-vacuum fits inside the budget.
+VACUUM_BYTES_PER_SECOND = 50 * 1024 * 1024
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def database_file_sizes() -> tuple[int, int]:
+    """Return (main file bytes, WAL bytes) for the configured database."""
+    path = current_app.config["DATABASE"]
+    return _size(path), _size(path + "-wal")
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def checkpoint_wal(threshold_bytes: int = WAL_CHECKPOINT_THRESHOLD_BYTES) -> bool:
+    """Checkpoint and truncate the WAL once it has grown past threshold_bytes.
+
+    Returns True if the WAL was fully checkpointed. A busy result (a reader
+    still pinned to an old snapshot) is left for the next run.
+    """
+    _, wal_bytes = database_file_sizes()
+    if wal_bytes < threshold_bytes:
+        return False
+    busy, _, _ = get_db().execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    return busy == 0
+
+
+def ensure_incremental_auto_vacuum(budget_seconds: float) -> bool:
+    """Switch the file to auto_vacuum=INCREMENTAL if it isn't already.
+
+    The switch only takes effect through a VACUUM, which rewrites the whole
+    file, so it is done here only when the file is small enough to finish
+    within budget_seconds. Larger files are left for
+    convert_to_incremental_auto_vacuum. Returns True if the mode is (now)
+    incremental.
+    """
+    db = get_db()
+    if db.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+        return True
+
+    db_bytes, _ = database_file_sizes()
+    if db_bytes > budget_seconds * VACUUM_BYTES_PER_SECOND:
+        logger.info(
+            "Maintenance: %.1f MB database too large to convert to incremental "
+            "auto-vacuum within %.1fs; convert it once with "
+            "python -m src.maintenance_runner convert-auto-vacuum",
+            db_bytes / 1e6, budget_seconds
+        )
+        return False
+    return convert_to_incremental_auto_vacuum()
+
+
+def convert_to_incremental_auto_vacuum() -> bool:
+    """Rewrite the file with a VACUUM so auto_vacuum=INCREMENTAL takes
+    effect, however long it takes. The VACUUM holds the write lock
+    throughout: ingest and read/saved writes wait for it, readers don't.
+    Returns True if the mode is now incremental."""
+    db = get_db()
+    db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    db.execute("VACUUM")
+    return db.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL
+
+
+def incremental_vacuum(budget_seconds: float, step_pages: int = VACUUM_STEP_PAGES) -> int:
+    """Return free pages to the filesystem in small steps until the freelist
+    is empty or the budget is spent. Returns the number of pages released."""
+    db = get_db()
+    if db.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+        return 0
+
+    deadline = time.monotonic() + budget_seconds
+    released = 0
+    while time.monotonic() < deadline:
+        free = db.execute("PRAGMA freelist_count").fetchone()[0]
+        if free == 0:
+            break
+        step = min(free, step_pages)
+        db.execute(f"PRAGMA incremental_vacuum({step})").fetchall()
+        released += step
+    return released
+
+
+def optimize() -> None:
+    """Refresh planner statistics with a bounded per-index sample."""
+    db = get_db()
+    db.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+    has_stats = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+    ).fetchone()
+    if has_stats:
+        db.execute("PRAGMA optimize").fetchall()
+    else:
+        db.execute("ANALYZE")
+    db.commit()
+
+
+def run_maintenance(budget_seconds: float) -> dict:
+    """One pass of WAL truncation, space reclamation and statistics refresh,
+    all within budget_seconds.
+
+    Each phase gets what the earlier ones left of the budget, and the
+    connection's busy timeout is lowered to that, so no step waits on a
+    competing lock past the deadline; a step that can't get its lock, or
+    has no time left, is simply retried on the next run. The returned stats
+    include remaining_seconds, what was left of the budget at the end.
+    """
+    db = get_db()
+    deadline = time.monotonic() + budget_seconds
+
+    def remaining() -> float:
+        left = max(0.0, deadline - time.monotonic())
+        db.execute(f"PRAGMA busy_timeout = {int(left * 1000)}")
+        return left
+
+    before = database_file_sizes()
+    stats = {"checkpointed": False, "pages_released": 0, "optimized": False, "before": before}
+
+    remaining()
+    stats["checkpointed"] = checkpoint_wal()
+    if ensure_incremental_auto_vacuum(remaining()):
+        stats["pages_released"] = incremental_vacuum(remaining())
+        if stats["pages_released"] and remaining() > 0:
+            stats["checkpointed"] = checkpoint_wal(threshold_bytes=0) or stats["checkpointed"]
+    if remaining() > 0:
+        optimize()
+        stats["optimized"] = True
+
+    stats["after"] = database_file_sizes()
+    stats["remaining_seconds"] = remaining()
+    return stats
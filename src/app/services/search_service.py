@@ -0,0 +1,207 @@
+import calendar
+import re
+from datetime import date, timedelta
+
+from markupsafe import Markup, escape
+
+from src.app.compression import decompress_text
+from src.app.database import get_db
+from src.app.models import Article
+from src.app.textnorm import fold_case, html_to_text, match_text
+
+
+SNIPPET_TOKENS = 16
+TITLE_WEIGHT = 10.0
+SUMMARY_WEIGHT = 3.0
+CONTENT_WEIGHT = 1.0
+# Articles whose summary has no text (full-text feeds that only fill
+# content:encoded) are indexed on this much of their body instead.
+SEARCH_CONTENT_MAX_CHARS = 4000
+SEARCH_BACKFILL_BATCH_SIZE = 500
+
+_HIGHLIGHT_OPEN = "\x02"
+_HIGHLIGHT_CLOSE = "\x03"
+_TERM_RE = re.compile(r'"([^"]*)"?|(\S+)')
+
+
+def is_search_available() -> bool:
+    db = get_db()
+    row = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles_fts'"
+    ).fetchone()
+    return row is not None
+
+
+def search_content(match_summary: str, content: str | None) -> str | None:
+    """What to store in articles.search_content: match text of the start of
+    content when the summary has none, otherwise None."""
+    if match_summary:
+        return None
+    return match_text(content, SEARCH_CONTENT_MAX_CHARS)
+
+
+def backfill_search_content(batch_size: int = SEARCH_BACKFILL_BATCH_SIZE) -> int:
+    """Fill search_content for summary-less articles stored before it
+    existed, one batch per commit. Rows waiting for match text are picked
+    up once filter_service.backfill_match_text has stored it."""
+    db = get_db()
+    filled = 0
+    while True:
+        rows = db.execute("""
+            SELECT id, content FROM articles
+            WHERE match_summary = '' AND search_content IS NULL
+            ORDER BY id
+            LIMIT ?
+        """, (batch_size,)).fetchall()
+        if not rows:
+            break
+        db.executemany(
+            "UPDATE articles SET search_content = ? WHERE id = ?",
+            [(search_content("", decompress_text(row["content"])), row["id"]) for row in rows]
+        )
+        db.commit()
+        filled += len(rows)
+    return filled
+
+
+def build_match_query(query: str) -> str | None:
+    """Turn free text into a safe FTS5 query.
+
+    Every word or "quoted phrase" becomes a quoted FTS string, so operators
+    and punctuation typed by the user can't produce syntax errors. Terms are
+    ANDed; a trailing bare word is a prefix match so results follow typing.
+    """
+    parts = []
+    last_is_word = False
+    for phrase, word in _TERM_RE.findall(query or ""):
+        text = (phrase or word).replace('"', " ").strip()
+        if not text:
+            continue
+        parts.append(f'"{text}"')
+        last_is_word = bool(word)
+    if not parts:
+        return None
+    if last_is_word:
+        parts[-1] += "*"
+    return " ".join(parts)
+
+
+def _render_snippet(raw: str | None) -> Markup:
+    if not raw:
+        return Markup("")
+    return Markup(
+        str(escape(raw))
+        .replace(_HIGHLIGHT_OPEN, "<mark>")
+        .replace(_HIGHLIGHT_CLOSE, "</mark>")
+    )
+
+
+def search_articles(
+    query: str,
+    feed_id: int | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    limit: int = 50,
+    offset: int = 0
+) -> list[tuple[Article, Markup]]:
+    """Ranked full-text search; returns (article, highlighted snippet) pairs.
+
+    Scoping follows get_articles: a feed_id limits to that feed, otherwise
+    hidden feeds are left out. date_to is inclusive.
+    """
+    match = build_match_query(query)
+    if match is None:
+        return []
+    if not is_search_available():
+        return _search_titles(query, feed_id, date_from, date_to, limit, offset)
+
+    where, params = _scope_clause(feed_id, date_from, date_to)
+    rows = get_db().execute(f"""
+        SELECT a.*, f.title AS feed_title,
+               snippet(articles_fts, -1, ?, ?, '…', ?) AS snippet
+        FROM articles_fts
+        JOIN articles a ON a.id = articles_fts.rowid
+        JOIN feeds f ON f.id = a.feed_id
+        WHERE articles_fts MATCH ?{where}
+        ORDER BY bm25(articles_fts, ?, ?, ?)
+        LIMIT ? OFFSET ?
+    """, [_HIGHLIGHT_OPEN, _HIGHLIGHT_CLOSE, SNIPPET_TOKENS, match, *params,
+          TITLE_WEIGHT, SUMMARY_WEIGHT, CONTENT_WEIGHT, limit, offset]).fetchall()
+
+    articles = Article.from_rows(rows)
+    return [
+        (article, _render_snippet(_restore_case(row["snippet"], row["match_summary"], article.summary)))
+        for article, row in zip(articles, rows)
+    ]
+
+
+def _restore_case(snippet: str | None, folded: str | None, summary: str | None) -> str | None:
+    """Snippets from the summary column are cut from match_summary, which is
+    case-folded. Put the original characters back where folding kept the
+    text's length, which is the case for almost all text; otherwise, and for
+    title and search_content snippets, return the snippet as it is."""
+    if not snippet or not folded:
+        return snippet
+    original = html_to_text(summary)
+    if len(original) != len(folded) or fold_case(original) != folded:
+        return snippet
+    plain = snippet.replace(_HIGHLIGHT_OPEN, "").replace(_HIGHLIGHT_CLOSE, "")
+    core = plain.strip("…")
+    offset = folded.find(core)
+    if not core or offset < 0:
+        return snippet
+    lead = plain.index(core)
+    restored = []
+    position = 0
+    for char in snippet:
+        if char in (_HIGHLIGHT_OPEN, _HIGHLIGHT_CLOSE):
+            restored.append(char)
+            continue
+        if lead <= position < lead + len(core):
+            char = original[offset + position - lead]
+        restored.append(char)
+        position += 1
+    return "".join(restored)
+
+
+def _scope_clause(feed_id: int | None, date_from: date | None,
+                  date_to: date | None) -> tuple[str, list]:
+    clause = ""
+    params = []
+    if feed_id is not None:
+        clause += " AND a.feed_id = ?"
+        params.append(feed_id)
+    else:
+        clause += " AND f.hidden = 0"
+    if date_from is not None:
+        clause += " AND a.published_at >= ?"
+        params.append(_day_start(date_from))
+    # date.max has no following day; it bounds nothing anyway.
+    if date_to is not None and date_to < date.max:
+        clause += " AND a.published_at < ?"
+        params.append(_day_start(date_to + timedelta(days=1)))
+    return clause, params
+
+
+def _day_start(day: date) -> int:
+    """Epoch seconds at 00:00 UTC on day."""
+    return calendar.timegm(day.timetuple())
+
+
+def _search_titles(query, feed_id, date_from, date_to, limit, offset):
+    """Title-only LIKE search for SQLite builds without FTS5."""
+    where, params = _scope_clause(feed_id, date_from, date_to)
+    rows = get_db().execute(f"""
+        SELECT a.*, f.title AS feed_title
+        FROM articles a
+        JOIN feeds f ON f.id = a.feed_id
+        WHERE a.title LIKE ? ESCAPE '\\'{where}
+        ORDER BY a.published_at DESC
+        LIMIT ? OFFSET ?
+    """, [f"%{_escape_like(query.strip())}%", *params, limit, offset]).fetchall()
+    return [(article, Markup("")) for article in Article.from_rows(rows)]
+
+
+def _escape_like(text: str) -> str:
+    """Make %, _ and the escape character itself match literally."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
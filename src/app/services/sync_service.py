@@ -0,0 +1,178 @@
+"""Delta sync over the article change log (SYNC_SCHEMA in database.py).
+
+Triggers append a row to article_changes whenever an article is inserted,
+deleted, or has its read or saved flag changed. A client keeps the last seq
+it has applied and asks for everything after it, so a tab coming back from
+the background pulls the handful of rows that changed instead of reloading
+the page. Changes are coalesced per article: the response carries the
+current state of each touched article, not its history.
+"""
+import time
+
+from src.app.database import get_db, iter_projection
+from src.app.services.article_service import ARTICLE_FIELDS, SQLITE_VAR_LIMIT
+
+
+# Past this many changed articles a delta is no cheaper than re-rendering,
+# so the client is told to reset.
+MAX_SYNC_CHANGES = 500
+MAX_CLIENT_ID_LENGTH = 64
+# Cursors not seen for this long stop holding back compaction; their
+# clients reset on their next sync.
+SYNC_CURSOR_TTL_DAYS = 30
+# Changes are kept at least this long regardless of cursors, so a page
+# that hasn't synced yet can still catch up from the seq it was rendered at.
+SYNC_MIN_RETENTION_HOURS = 24
+# A cursor whose seq hasn't moved is rewritten at most this often, just to
+# keep it live; syncs that find nothing new stay read-only.
+SYNC_CURSOR_TOUCH_SECONDS = 60 * 60
+
+SYNC_ARTICLE_FIELDS = ("id", "feed_id", "title", "summary", "url", "image_url",
+                       "feed_title", "published_at", "is_read", "is_saved")
+
+
+def current_seq() -> int:
+    """The seq of the newest change, 0 before the first one."""
+    row = get_db().execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'article_changes'"
+    ).fetchone()
+    return row["seq"] if row else 0
+
+
+def _oldest_retained_seq(db, seq: int) -> int:
+    row = db.execute("SELECT MIN(seq) AS seq FROM article_changes").fetchone()
+    return row["seq"] if row["seq"] is not None else seq + 1
+
+
+def get_changes(since: int, client_id: str | None = None) -> dict:
+    """Everything that changed after seq since.
+
+    Returns {"seq", "reset", "inserted", "updated", "deleted", "counts"}.
+    inserted holds SYNC_ARTICLE_FIELDS of new articles, updated the id,
+    feed_id and flags of existing ones, deleted bare ids. An article
+    inserted and deleted within the range doesn't appear at all. reset is
+    True, with no changes, when since is older than the retained log, ahead
+    of it (another database), or more than MAX_SYNC_CHANGES articles behind.
+    With client_id, since is recorded as that client's cursor when it has
+    moved forward, or when the cursor is SYNC_CURSOR_TOUCH_SECONDS old.
+    """
+    db = get_db()
+    seq = current_seq()
+    if client_id:
+        _touch_cursor(db, client_id, since)
+
+    result = {"seq": seq, "reset": False, "inserted": [], "updated": [], "deleted": []}
+    if since > seq or since < _oldest_retained_seq(db, seq) - 1:
+        result["reset"] = True
+    elif since < seq:
+        rows = db.execute("""
+            SELECT c.article_id, MAX(c.kind = 'insert') AS inserted,
+                   a.id IS NOT NULL AS present, a.feed_id, a.is_read, a.is_saved
+            FROM article_changes c
+            LEFT JOIN articles a ON a.id = c.article_id
+            WHERE c.seq > ? AND c.seq <= ?
+            GROUP BY c.article_id
+            LIMIT ?
+        """, (since, seq, MAX_SYNC_CHANGES + 1)).fetchall()
+        if len(rows) > MAX_SYNC_CHANGES:
+            result["reset"] = True
+        else:
+            inserted_ids = []
+            for row in rows:
+                if not row["present"]:
+                    if not row["inserted"]:
+                        result["deleted"].append(row["article_id"])
+                elif row["inserted"]:
+                    inserted_ids.append(row["article_id"])
+                else:
+                    result["updated"].append({
+                        "id": row["article_id"],
+                        "feed_id": row["feed_id"],
+                        "is_read": bool(row["is_read"]),
+                        "is_saved": bool(row["is_saved"]),
+                    })
+            result["inserted"] = _article_values(inserted_ids)
+
+    result["counts"] = get_counts()
+    db.commit()
+    return result
+
+
+def _article_values(article_ids: list[int]) -> list[dict]:
+    select = ", ".join(ARTICLE_FIELDS[name][0] for name in SYNC_ARTICLE_FIELDS)
+    converters = [ARTICLE_FIELDS[name][1] for name in SYNC_ARTICLE_FIELDS]
+    articles = []
+    for i in range(0, len(article_ids), SQLITE_VAR_LIMIT):
+        chunk = article_ids[i:i + SQLITE_VAR_LIMIT]
+        placeholders = ",".join("?" for _ in chunk)
+        query = (f"SELECT {select} FROM articles a JOIN feeds f ON a.feed_id = f.id "
+                 f"WHERE a.id IN ({placeholders}) ORDER BY a.published_at DESC")
+        articles.extend(dict(zip(SYNC_ARTICLE_FIELDS, values))
+                        for values in iter_projection(query, chunk, converters))
+    return articles
+
+
+def get_counts() -> dict:
+    """Unread total (hidden feeds excluded), saved total, and unread count
+    by feed id for feeds that have any."""
+    db = get_db()
+    unread = db.execute(
+        "SELECT COUNT(*) FROM articles a JOIN feeds f ON a.feed_id = f.id "
+        "WHERE a.is_read = 0 AND f.hidden = 0"
+    ).fetchone()[0]
+    saved = db.execute("SELECT COUNT(*) FROM articles WHERE is_saved = 1").fetchone()[0]
+    feeds = dict(db.execute(
+        "SELECT feed_id, COUNT(*) FROM articles WHERE is_read = 0 GROUP BY feed_id"
+    ).fetchall())
+    return {"unread": unread, "saved": saved, "feeds": feeds}
+
+
+def count_inserted_since(since: int, through: int) -> dict[int, int]:
+    """Articles inserted after seq since, up to through, that still exist,
+    by feed id."""
+    return dict(get_db().execute("""
+        SELECT a.feed_id, COUNT(*) FROM article_changes c
+        JOIN articles a ON a.id = c.article_id
+        WHERE c.seq > ? AND c.seq <= ? AND c.kind = 'insert'
+        GROUP BY a.feed_id
+    """, (since, through)).fetchall())
+
+
+def _touch_cursor(db, client_id: str, seq: int) -> None:
+    now = int(time.time())
+    row = db.execute(
+        "SELECT seq, seen_at FROM sync_cursors WHERE client_id = ?", (client_id,)
+    ).fetchone()
+    if row is not None and seq <= row["seq"] and now - row["seen_at"] < SYNC_CURSOR_TOUCH_SECONDS:
+        return
+    # Cursors only move forward: tabs sharing a client id may lag each other.
+    if row is not None:
+        seq = max(seq, row["seq"])
+    db.execute("""
+        INSERT INTO sync_cursors (client_id, seq, seen_at) VALUES (?, ?, ?)
+        ON CONFLICT(client_id) DO UPDATE SET seq = excluded.seq, seen_at = excluded.seen_at
+    """, (client_id, seq, now))
+
+
+def compact_changes(
+    cursor_ttl_days: int = SYNC_CURSOR_TTL_DAYS,
+    min_retention_hours: int = SYNC_MIN_RETENTION_HOURS
+) -> int:
+    """Delete changes every live cursor has moved past and that are older
+    than min_retention_hours, after expiring cursors not seen for
+    cursor_ttl_days. Returns the number of changes deleted."""
+    db = get_db()
+    now = int(time.time())
+    db.execute("DELETE FROM sync_cursors WHERE seen_at < ?", (now - cursor_ttl_days * 86400,))
+    through = db.execute(
+        "SELECT MAX(seq) FROM article_changes WHERE changed_at < ?",
+        (now - min_retention_hours * 3600,)
+    ).fetchone()[0]
+    slowest = db.execute("SELECT MIN(seq) FROM sync_cursors").fetchone()[0]
+    if through is not None and slowest is not None:
+        through = min(through, slowest)
+    deleted = 0
+    if through is not None:
+        deleted = db.execute("DELETE FROM article_changes WHERE seq <= ?", (through,)).rowcount
+    db.commit()
+    return deleted
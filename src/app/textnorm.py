@@ -0,0 +1,98 @@
+"""Plain-text views of article HTML for indexing and matching."""
+import html
+import re
+
+try:
+    from re._casefix import _EXTRA_CASES
+except ImportError:  # Python < 3.11
+    from sre_compile import _ignorecase_fixes as _EXTRA_CASES
+
+
+_SCRIPT_STYLE_RE = re.compile(r"<(script|style)\b[^>]*>.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]*>")
+_WHITESPACE_RE = re.compile(r"\s+")
+# The same markup as above, tokenized so a bounded conversion can stop early.
+# Text runs are capped and entities kept whole so every token can be
+# converted on its own.
+_TOKEN_RE = re.compile(
+    r"<(script|style)\b[^>]*>.*?</\1\s*>|<!--.*?-->|<[^>]*>"
+    r"|&(?:#[xX]?[0-9a-fA-F]+|\w+);?|[^<&]{1,4096}|[<&]",
+    re.IGNORECASE | re.DOTALL
+)
+
+# str.lower() turns U+0130 into "i" plus a combining dot; the regex engine
+# treats it as plain "i".
+_PRE_LOWER = {0x130: "i"}
+
+
+def _ignorecase_fold_table() -> dict[int, str]:
+    """Characters re.IGNORECASE considers equal beyond simple lowercasing
+    (ſ/s, ı/i, ς/σ, ...), each mapped to one representative."""
+    table = {}
+    for lo, others in _EXTRA_CASES.items():
+        canonical = min(lo, *others)
+        for cp in (lo, *others):
+            if cp != canonical:
+                table[cp] = chr(canonical)
+    return table
+
+
+_FOLD = _ignorecase_fold_table()
+
+
+def html_to_text(value: str | None, max_chars: int | None = None) -> str:
+    """Strip tags, decode entities and collapse whitespace.
+
+    Tags become a space so words on either side of a block element don't run
+    together. With max_chars the result is cut to that length, and the input
+    is only read as far as needed to produce it, so a megabyte body costs no
+    more than a short one.
+    """
+    if not value:
+        return ""
+    if max_chars is not None:
+        return _html_to_text_prefix(value, max_chars)
+    text = _SCRIPT_STYLE_RE.sub(" ", value)
+    text = _COMMENT_RE.sub(" ", text)
+    text = _TAG_RE.sub(" ", text)
+    text = html.unescape(text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def _html_to_text_prefix(value: str, max_chars: int) -> str:
+    parts = []
+    length = 0
+    after_space = True
+    for token in _TOKEN_RE.finditer(value):
+        piece = token.group()
+        if piece.startswith("<") and len(piece) > 1:
+            piece = " "
+        else:
+            piece = _WHITESPACE_RE.sub(" ", html.unescape(piece))
+        if after_space and piece.startswith(" "):
+            piece = piece[1:]
+        if not piece:
+            continue
+        parts.append(piece)
+        length += len(piece)
+        after_space = piece.endswith(" ")
+        if length > max_chars:
+            break
+    return "".join(parts)[:max_chars].rstrip()
+
+
+def match_text(value: str | None, max_chars: int | None = None) -> str:
+    """What filters are matched against: html_to_text, case-folded. Stored
+    per article at ingest (articles.match_title, match_summary); content is
+    converted when matched, up to max_chars."""
+    return fold_case(html_to_text(value, max_chars))
+
+
+def fold_case(value: str) -> str:
+    """Case-fold so that any two strings re.IGNORECASE treats as equal fold
+    to the same text. Used to test for required literals with a plain
+    substring check before running a case-insensitive regex."""
+    if value.isascii():
+        return value.lower()
+    return value.translate(_PRE_LOWER).lower().translate(_FOLD)
@@ -0,0 +1,143 @@
+"""Write-behind buffer for article read and saved flags.
+
+Marking articles read arrives in bursts, from several devices at once, and
+every commit competes with the scheduler's ingest for SQLite's single
+writer lock. With READ_STATE_FLUSH_SECONDS set, article_service.apply_batch
+records changes here and answers straight away. Changes are coalesced per
+article (the last write wins) and written in one transaction once the
+oldest has waited READ_STATE_FLUSH_SECONDS, or once READ_STATE_MAX_PENDING
+articles are waiting.
+
+Buffers are per process and keyed by database path. gunicorn.conf.py
+flushes them when a worker exits, including recycling by --max-requests,
+and an atexit hook covers other servers. A write that fails (the database
+is locked past its timeout) is kept and retried with the next flush.
+"""
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+
+from flask import current_app
+
+
+logger = logging.getLogger(__name__)
+
+FLAGS = ("is_read", "is_saved")
+
+
+class WriteBehindBuffer:
+    def __init__(self, path: str, interval: float, max_pending: int):
+        self.path = path
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending: dict[int, dict[str, int]] = {}
+        self._lock = threading.Lock()
+        # Held across taking a snapshot and writing it, so an older snapshot
+        # can never be written after a newer one.
+        self._flush_lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+
+    def record(self, changes: dict[int, dict[str, int]]) -> None:
+        """Queue flag values by article id, e.g. {12: {"is_read": 1}}."""
+        with self._lock:
+            for article_id, flags in changes.items():
+                self._pending.setdefault(article_id, {}).update(flags)
+            full = len(self._pending) >= self.max_pending
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def pending(self) -> dict[int, dict[str, int]]:
+        with self._lock:
+            return {article_id: dict(flags) for article_id, flags in self._pending.items()}
+
+    def flush(self) -> int:
+        """Write everything pending in one transaction; returns the number of
+        articles written."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if not pending:
+                return 0
+            if not os.path.exists(self.path):
+                logger.warning("Dropping %d read-state changes: %s is gone",
+                               len(pending), self.path)
+                return 0
+            try:
+                _write(self.path, pending)
+            except sqlite3.Error:
+                logger.exception("Writing %d read-state changes failed; will retry",
+                                 len(pending))
+                self._requeue(pending)
+                return 0
+            return len(pending)
+
+    def _requeue(self, pending: dict[int, dict[str, int]]) -> None:
+        with self._lock:
+            for article_id, flags in self._pending.items():
+                pending.setdefault(article_id, {}).update(flags)
+            self._pending = pending
+            if self._timer is None:
+                self._timer = threading.Timer(self.interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+
+def _write(path: str, pending: dict[int, dict[str, int]]) -> None:
+    conn = sqlite3.connect(path, timeout=10)
+    try:
+        for flag in FLAGS:
+            conn.executemany(
+                f"UPDATE articles SET {flag} = ? WHERE id = ? AND {flag} != ?",
+                [(flags[flag], article_id, flags[flag])
+                 for article_id, flags in pending.items() if flag in flags]
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+_buffers: dict[str, WriteBehindBuffer] = {}
+_buffers_lock = threading.Lock()
+
+
+def get_buffer() -> WriteBehindBuffer | None:
+    """This process's buffer for the app's database, or None when
+    READ_STATE_FLUSH_SECONDS is 0 and changes are written directly."""
+    interval = current_app.config.get("READ_STATE_FLUSH_SECONDS")
+    if not interval:
+        return None
+    path = current_app.config["DATABASE"]
+    with _buffers_lock:
+        buffer = _buffers.get(path)
+        if buffer is None:
+            buffer = _buffers[path] = WriteBehindBuffer(
+                path, interval, current_app.config["READ_STATE_MAX_PENDING"]
+            )
+        return buffer
+
+
+def flush() -> int:
+    """Flush the app database's buffer, if there is one. Direct writes to
+    the same flags call this first so they land after what was queued."""
+    with _buffers_lock:
+        buffer = _buffers.get(current_app.config["DATABASE"])
+    return buffer.flush() if buffer is not None else 0
+
+
+def flush_all() -> None:
+    with _buffers_lock:
+        buffers = list(_buffers.values())
+    for buffer in buffers:
+        buffer.flush()
+
+
+atexit.register(flush_all)
@@ -0,0 +1,53 @@
+"""One-off database maintenance that doesn't fit the scheduler's budget.
+
+    python -m src.maintenance_runner convert-auto-vacuum
+
+convert-auto-vacuum switches a database created before incremental
+auto-vacuum to it with one full VACUUM. The hourly maintenance job only
+does that for files it can rewrite within DB_MAINTENANCE_BUDGET_SECONDS;
+larger ones need this once, ideally with the scheduler stopped, since
+writers wait for the VACUUM to finish. It needs free disk space about the
+size of the database.
+"""
+import argparse
+import logging
+import time
+
+from src.app import create_app
+from src.app.database import get_db
+from src.app.services import maintenance_service
+
+logger = logging.getLogger("maintenance_runner")
+
+
+def convert_auto_vacuum() -> bool:
+    app = create_app({"SCHEDULER_ENABLED": False})
+    with app.app_context():
+        db = get_db()
+        if db.execute("PRAGMA auto_vacuum").fetchone()[0] == maintenance_service.AUTO_VACUUM_INCREMENTAL:
+            logger.info("Database already uses incremental auto-vacuum")
+            return True
+
+        # Wait out other writers' transactions rather than failing at once.
+        db.execute("PRAGMA busy_timeout = 60000")
+        before, _ = maintenance_service.database_file_sizes()
+        start = time.monotonic()
+        converted = maintenance_service.convert_to_incremental_auto_vacuum()
+        after, _ = maintenance_service.database_file_sizes()
+        logger.info(
+            "Converted to incremental auto-vacuum=%s: db %.1f -> %.1f MB in %.1fs",
+            converted, before / 1e6, after / 1e6, time.monotonic() - start
+        )
+        return converted
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("command", choices=["convert-auto-vacuum"])
+    args = parser.parse_args()
+    if args.command == "convert-auto-vacuum":
+        raise SystemExit(0 if convert_auto_vacuum() else 1)
+
+
+if __name__ == "__main__":
+    main()
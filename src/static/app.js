@@ -2,6 +2,49 @@ var VISIBILITY_RELOAD_THRESHOLD_MS = 60 * 1000;
 var REACHABILITY_TIMEOUT_MS = 4000;
 var hiddenAt = null;
 
+// Read, save and hide actions are queued and sent to /api/batch together,
+// BATCH_DEBOUNCE_MS after the last one, or straight away when the page is
+// hidden or the queue reaches MAX_BATCH_ACTIONS.
+var BATCH_DEBOUNCE_MS = 400;
+var MAX_BATCH_ACTIONS = 500;
+var queuedActions = [];
+var batchTimer = null;
+var onBatchCounts = null;
+
+function queueAction(op, id) {
+    queuedActions.push({ op: op, id: parseInt(id, 10) });
+    clearTimeout(batchTimer);
+    if (queuedActions.length >= MAX_BATCH_ACTIONS) {
+        flushActions();
+    } else {
+        batchTimer = setTimeout(flushActions, BATCH_DEBOUNCE_MS);
+    }
+}
+
+function flushActions() {
+    clearTimeout(batchTimer);
+    batchTimer = null;
+    if (!queuedActions.length) return;
+    var actions = queuedActions.splice(0, MAX_BATCH_ACTIONS);
+    fetch("/api/batch", {
+        method: "POST",
+        headers: { "Content-Type": "application/json", "X-Requested-With": "XMLHttpRequest" },
+        body: JSON.stringify({ actions: actions }),
+        keepalive: true
+    }).then(function(response) {
+        return response.ok ? response.json() : null;
+    }).then(function(counts) {
+        // Counts are only current if nothing was queued meanwhile.
+        if (counts && onBatchCounts && !queuedActions.length) onBatchCounts(counts);
+    }).catch(function() {
+        // Network failure: send these again with the next batch.
+        queuedActions = actions.concat(queuedActions);
+    });
+    if (queuedActions.length) flushActions();
+}
+
+window.addEventListener("pagehide", flushActions);
+
 function reloadIfReachable() {
     if (navigator.onLine === false) {
         return;
@@ -20,21 +63,96 @@ function reloadIfReachable() {
         });
 }
 
+// Article lists carry the change-log seq they were rendered at and catch up
+// through /api/sync; other pages reload. A reset answer (too far behind, or
+// the log was compacted past us) falls back to a reload too.
+var SYNC_CLIENT_KEY = "syncClientId";
+var onSyncChanges = null;
+
+function syncClientId() {
+    try {
+        var id = localStorage.getItem(SYNC_CLIENT_KEY);
+        if (!id) {
+            id = Date.now().toString(36) + Math.random().toString(36).slice(2, 10);
+            localStorage.setItem(SYNC_CLIENT_KEY, id);
+        }
+        return id;
+    } catch (e) {
+        return null;
+    }
+}
+
+function syncOrReload(elapsed) {
+    if (!document.querySelector(".article-list[data-sync-seq]") || !onSyncChanges) {
+        if (elapsed > VISIBILITY_RELOAD_THRESHOLD_MS) reloadIfReachable();
+        return;
+    }
+    syncChanges(function() { location.reload(); });
+}
+
+function syncChanges(onReset) {
+    var list = document.querySelector(".article-list[data-sync-seq]");
+    if (!list || !onSyncChanges || navigator.onLine === false) return;
+    var url = "/api/sync?since=" + encodeURIComponent(list.dataset.syncSeq);
+    var clientId = syncClientId();
+    if (clientId) url += "&client=" + encodeURIComponent(clientId);
+    fetch(url, { cache: "no-store", headers: { "X-Requested-With": "XMLHttpRequest" } })
+        .then(function(response) {
+            return response.ok ? response.json() : null;
+        })
+        .then(function(changes) {
+            if (!changes) return;
+            if (changes.reset) {
+                onReset();
+                return;
+            }
+            list.dataset.syncSeq = changes.seq;
+            onSyncChanges(changes);
+        })
+        .catch(function() {});
+}
+
+// While visible, article lists also listen on /api/events for new articles
+// and count changes. The stream is closed while the page is hidden, so it
+// doesn't hold a server thread, and /api/sync catches up on return.
+var onChangeEvent = null;
+var changeEvents = null;
+
+function openChangeEvents() {
+    if (changeEvents || !window.EventSource || !onChangeEvent) return;
+    if (!document.querySelector(".article-list[data-sync-seq]")) return;
+    changeEvents = new EventSource("/api/events");
+    changeEvents.addEventListener("changes", function(event) {
+        onChangeEvent(JSON.parse(event.data));
+    });
+}
+
+function closeChangeEvents() {
+    if (changeEvents) {
+        changeEvents.close();
+        changeEvents = null;
+    }
+}
+
 window.addEventListener("pageshow", function(event) {
     if (event.persisted) {
-        reloadIfReachable();
+        syncOrReload(Infinity);
+        openChangeEvents();
     }
 });
 
+window.addEventListener("pagehide", closeChangeEvents);
+
 document.addEventListener("visibilitychange", function() {
     if (document.visibilityState === "hidden") {
         hiddenAt = Date.now();
+        flushActions();
+        closeChangeEvents();
     } else if (document.visibilityState === "visible" && hiddenAt) {
         var elapsed = Date.now() - hiddenAt;
         hiddenAt = null;
-        if (elapsed > VISIBILITY_RELOAD_THRESHOLD_MS) {
-            reloadIfReachable();
-        }
+        syncOrReload(elapsed);
+        openChangeEvents();
     }
 });
 
@@ -72,6 +190,22 @@ document.addEventListener("DOMContentLoaded", function() {
         }
     }
 
+    function setCount(row, value) {
+        var countEl = row && row.querySelector(".count");
+        if (!countEl) return;
+        countEl.textContent = value;
+        countEl.style.display = value > 0 ? "" : "none";
+    }
+
+    // Replace the optimistic sidebar counts with the server's once a batch lands
+    onBatchCounts = function(counts) {
+        setCount(document.querySelector('.nav-row[data-feed-id="all"]'), counts.unread);
+        Object.keys(counts.feeds || {}).forEach(function(feedId) {
+            setCount(document.querySelector('.nav-row[data-feed-id="' + feedId + '"]'),
+                     counts.feeds[feedId]);
+        });
+    };
+
     // Undo toast state
     var pendingUndo = null;
     var undoToast = document.getElementById("undoToast");
@@ -124,18 +258,14 @@ document.addEventListener("DOMContentLoaded", function() {
             var feedId = pendingUndo.feedId;
             var articleEl = pendingUndo.articleEl;
 
-            fetch("/articles/" + articleId + "/unread", {
-                method: "POST",
-                headers: { "X-Requested-With": "XMLHttpRequest" }
-            }).then(function() {
-                updateUnreadCount(feedId, 1);
-                if (articleEl) {
-                    articleEl.classList.remove("is-read");
-                    syncReadToggleButton(articleEl, false);
-                    expandArticle(articleEl);
-                }
-                hideUndoToast();
-            });
+            queueAction("unread", articleId);
+            updateUnreadCount(feedId, 1);
+            if (articleEl) {
+                articleEl.classList.remove("is-read");
+                syncReadToggleButton(articleEl, false);
+                expandArticle(articleEl);
+            }
+            hideUndoToast();
         });
     }
 
@@ -159,6 +289,88 @@ document.addEventListener("DOMContentLoaded", function() {
         form.action = form.action.replace(/\/(?:un)?read$/, isRead ? "/unread" : "/read");
     }
 
+    function articleBelongsHere(article) {
+        var params = new URLSearchParams(window.location.search);
+        if (window.location.pathname === "/saved") return article.is_saved;
+        var feedId = params.get("feed_id");
+        if (feedId && String(article.feed_id) !== feedId) return false;
+        if (!feedId && document.querySelector('.nav-row.feed-hidden[data-feed-id="' + article.feed_id + '"]')) {
+            return false;
+        }
+        return !(isUnreadView() && article.is_read);
+    }
+
+    function showNewArticlesNotice(count) {
+        if (!articleList) return;
+        var notice = articleList.querySelector(".sync-notice");
+        if (!notice) {
+            notice = document.createElement("button");
+            notice.type = "button";
+            notice.className = "flash-message flash-info sync-notice";
+            notice.addEventListener("click", function() { location.reload(); });
+            articleList.insertBefore(notice, articleList.firstChild);
+        }
+        notice.dataset.count = (parseInt(notice.dataset.count, 10) || 0) + count;
+        var total = parseInt(notice.dataset.count, 10);
+        notice.textContent = total + " new article" + (total === 1 ? "" : "s") + " \u2014 show";
+    }
+
+    // Apply a /api/sync delta in place: flags on rendered articles, removals,
+    // and a notice for new articles rather than inserting them mid-read.
+    onSyncChanges = function(changes) {
+        changes.updated.forEach(function(article) {
+            var el = articleList && articleList.querySelector('.article-item[data-id="' + article.id + '"]');
+            if (!el) return;
+            if (!articleBelongsHere(article)) {
+                el.remove();
+                return;
+            }
+            el.classList.toggle("is-read", article.is_read);
+            syncReadToggleButton(el, article.is_read);
+            el.classList.toggle("is-saved", article.is_saved);
+            var starBtn = el.querySelector(".btn-star");
+            if (starBtn) {
+                starBtn.classList.toggle("active", article.is_saved);
+                starBtn.textContent = article.is_saved ? "★" : "☆";
+            }
+        });
+        changes.deleted.forEach(function(id) {
+            var el = articleList && articleList.querySelector('.article-item[data-id="' + id + '"]');
+            if (el) el.remove();
+        });
+        var added = changes.inserted.filter(articleBelongsHere).length;
+        if (added) showNewArticlesNotice(added);
+        applyAllCounts(changes.counts);
+    };
+
+    function applyAllCounts(counts) {
+        // Feeds missing from counts.feeds have nothing unread.
+        document.querySelectorAll(".nav-row[data-feed-id]").forEach(function(row) {
+            var feedId = row.dataset.feedId;
+            if (feedId !== "all" && !(feedId in counts.feeds)) setCount(row, 0);
+        });
+        onBatchCounts(counts);
+    }
+
+    // /api/events: counts, plus articles new since the last event by feed.
+    // New articles for this view are fetched through /api/sync, which also
+    // advances the page's seq so they are never announced twice.
+    onChangeEvent = function(event) {
+        // Counts are only current if no local action is still queued.
+        if (!queuedActions.length) applyAllCounts(event);
+        if (window.location.pathname === "/saved") return;
+        var feedId = new URLSearchParams(window.location.search).get("feed_id");
+        var added = 0;
+        Object.keys(event.new).forEach(function(id) {
+            if (feedId ? id === feedId
+                       : !document.querySelector('.nav-row.feed-hidden[data-feed-id="' + id + '"]')) {
+                added += event.new[id];
+            }
+        });
+        if (added) syncChanges(function() { showNewArticlesNotice(added); });
+    };
+    openChangeEvents();
+
     // Handle marking article as read with flash and undo toast
     function markAsReadWithAnimation(article) {
         var articleId = article.dataset.id;
@@ -215,10 +427,7 @@ document.addEventListener("DOMContentLoaded", function() {
                 updateUnreadCount(articleEl.dataset.feedId, -1);
                 markAsReadWithAnimation(articleEl);
             }
-            fetch("/articles/" + articleId + "/read", {
-                method: "POST",
-                headers: { "X-Requested-With": "XMLHttpRequest" }
-            });
+            queueAction("read", articleId);
         });
     });
 
@@ -235,10 +444,7 @@ document.addEventListener("DOMContentLoaded", function() {
 
             updateUnreadCount(article.dataset.feedId, -1);
             markAsReadWithAnimation(article);
-            fetch(form.action, {
-                method: "POST",
-                headers: { "X-Requested-With": "XMLHttpRequest" }
-            });
+            queueAction("read", article.dataset.id);
         });
     });
 
@@ -340,7 +546,6 @@ document.addEventListener("DOMContentLoaded", function() {
             if (diff < -SWIPE_THRESHOLD) {
                 // Swipe left = toggle read/unread
                 var isRead = article.classList.contains("is-read");
-                var endpoint = isRead ? "/articles/" + articleId + "/unread" : "/articles/" + articleId + "/read";
                 if (!isRead) {
                     updateUnreadCount(article.dataset.feedId, -1);
                     markAsReadWithAnimation(article);
@@ -349,10 +554,7 @@ document.addEventListener("DOMContentLoaded", function() {
                     article.classList.remove("is-read");
                     syncReadToggleButton(article, false);
                 }
-                fetch(endpoint, {
-                    method: "POST",
-                    headers: { "X-Requested-With": "XMLHttpRequest" }
-                });
+                queueAction(isRead ? "unread" : "read", articleId);
             } else if (diff > SWIPE_SAVE_THRESHOLD) {
                 // Swipe right = add to favorites (optimistic UI)
                 article.classList.toggle("is-saved");
@@ -361,10 +563,7 @@ document.addEventListener("DOMContentLoaded", function() {
                     starBtn.classList.toggle("active");
                     starBtn.textContent = starBtn.classList.contains("active") ? "★" : "☆";
                 }
-                fetch("/articles/" + articleId + "/toggle-save", {
-                    method: "POST",
-                    headers: { "X-Requested-With": "XMLHttpRequest" }
-                });
+                queueAction(article.classList.contains("is-saved") ? "save" : "unsave", articleId);
             }
         });
     });
@@ -400,10 +599,7 @@ document.addEventListener("DOMContentLoaded", function() {
             var n = countEl ? (parseInt(countEl.textContent) || 0) : 0;
             if (n > 0) adjustAllFeedsCount(wasHidden ? n : -n);
 
-            fetch(form.action, {
-                method: "POST",
-                headers: { "X-Requested-With": "XMLHttpRequest" }
-            });
+            queueAction(wasHidden ? "show" : "hide", row.dataset.feedId);
         });
     });
 
@@ -517,6 +713,38 @@ document.addEventListener("DOMContentLoaded", function() {
         });
     });
 
+    // "Profile" dry run of the pattern typed in an add or edit form
+    document.querySelectorAll(".btn-profile").forEach(function(btn) {
+        btn.addEventListener("click", function() {
+            var form = btn.closest("form");
+            var result = form.querySelector(".filter-profile-result");
+            var pattern = form.querySelector("[name=pattern]").value;
+            var target = form.querySelector("[name=target]").value;
+            result.textContent = "Profiling\u2026";
+
+            fetch("/api/filters/profile", {
+                method: "POST",
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify({ pattern: pattern, target: target })
+            }).then(function(r) {
+                return r.json().then(function(d) {
+                    if (!r.ok) throw new Error(d.error);
+                    return d;
+                });
+            }).then(function(data) {
+                var text = data.micros_per_article.toFixed(1) + " \u00b5s/article over " +
+                    data.articles + " of " + data.corpus_articles + " unread articles, " +
+                    data.matches + " matched. ";
+                text += data.prefilter
+                    ? "Prefiltered on: " + data.prefilter.join(", ")
+                    : "No literal prefilter: the regex runs on every article.";
+                result.textContent = text;
+            }).catch(function(err) {
+                result.textContent = err.message || "Couldn't profile pattern";
+            });
+        });
+    });
+
     // Custom confirm modal for filter deletion
     var deleteModal = document.getElementById("deleteFilterModal");
     var deleteNameEl = document.getElementById("deleteFilterName");
@@ -688,4 +916,25 @@ document.addEventListener("DOMContentLoaded", function() {
             }
         });
     }
+
+    // "Show more" on the filtered view appends the next page of a rule's matches
+    document.addEventListener("click", function(e) {
+        var btn = e.target.closest(".btn-show-more");
+        if (!btn) return;
+        btn.disabled = true;
+        fetch(btn.dataset.url, {
+            headers: { "X-Requested-With": "XMLHttpRequest" }
+        }).then(function(r) {
+            if (!r.ok) throw new Error(r.statusText);
+            return r.text();
+        }).then(function(html) {
+            btn.insertAdjacentHTML("afterend", html);
+            btn.remove();
+            if (searchInput && searchInput.value.trim()) {
+                filterArticles(searchInput.value.toLowerCase().trim());
+            }
+        }).catch(function() {
+            btn.disabled = false;
+        });
+    });
 });
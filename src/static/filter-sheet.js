@@ -140,12 +140,13 @@ document.addEventListener("DOMContentLoaded", function() {
 
     // ── Kebab Button ──
 
-    document.querySelectorAll(".btn-kebab").forEach(function(btn) {
-        btn.addEventListener("click", function(e) {
-            e.stopPropagation();
-            var article = btn.closest(".article-item");
-            if (article) openSheet(article);
-        });
+    // Delegated so articles appended by "Show more" get it too.
+    document.addEventListener("click", function(e) {
+        var btn = e.target.closest(".btn-kebab");
+        if (!btn) return;
+        e.stopPropagation();
+        var article = btn.closest(".article-item");
+        if (article) openSheet(article);
     });
 
     // ── Sheet Open/Close ──
@@ -684,10 +685,11 @@ document.addEventListener("DOMContentLoaded", function() {
             if (token !== matchCountToken) return;
             var n = data.count;
             var label = n === 1 ? " unread article" : " unread articles";
-            setMatchCount("Would filter " + n + label, n === 0);
-        }).catch(function() {
+            var prefix = data.approximate ? "Would filter about " : "Would filter ";
+            setMatchCount(prefix + n + label, n === 0);
+        }).catch(function(err) {
             if (token !== matchCountToken) return;
-            setMatchCount("Couldn't count matches", true);
+            setMatchCount(err.message || "Couldn't count matches", true);
         });
     }
 
@@ -14,6 +14,7 @@ def app():
     app = create_app({
         "TESTING": True,
         "DATABASE": db_path,
+        "READ_STATE_FLUSH_SECONDS": 0,
     })
 
     yield app
@@ -1,5 +1,6 @@
 import pytest
 
+from src.app.compression import compress_text
 from src.app.database import get_db
 from src.app.services import article_service
 
@@ -69,6 +70,49 @@ class TestGetArticles:
             assert article.title == "Article One"
 
 
+class TestGetArticleValues:
+    def test_matches_model_listing(self, app, sample_articles):
+        with app.app_context():
+            fields = ("id", "title", "summary", "feed_title", "published_at", "is_read")
+            values = list(article_service.get_article_values(fields))
+            expected = [
+                (a.id, a.title, a.summary, a.feed_title,
+                 a.published_at.isoformat() if a.published_at else None, a.is_read)
+                for a in article_service.get_articles()
+            ]
+            assert values == expected
+            assert all(isinstance(v[5], bool) for v in values)
+
+    def test_decodes_compressed_summary_and_epoch_dates(self, app, sample_feed):
+        with app.app_context():
+            db = get_db()
+            summary = "compressible body " * 40
+            db.execute(
+                "INSERT INTO articles (feed_id, guid, title, summary, published_at) "
+                "VALUES (?, 'g', 't', ?, 1704103200)",
+                (sample_feed, compress_text(summary, codec="zlib"))
+            )
+            db.commit()
+
+            [(value, published)] = article_service.get_article_values(("summary", "published_at"))
+            assert value == summary
+            assert published == "2024-01-01T10:00:00+00:00"
+
+    def test_article_decodes_body_on_first_access(self, app, sample_feed):
+        with app.app_context():
+            db = get_db()
+            db.execute(
+                "INSERT INTO articles (feed_id, guid, title, content) VALUES (?, 'g', 't', ?)",
+                (sample_feed, compress_text("long content " * 40, codec="zlib"))
+            )
+            db.commit()
+
+            [article] = article_service.get_articles()
+            assert isinstance(article._content, bytes)
+            assert article.content == "long content " * 40
+            assert isinstance(article._content, str)
+
+
 class TestMarkRead:
     def test_mark_article_read(self, app, sample_articles):
         with app.app_context():
@@ -142,6 +186,44 @@ class TestToggleSaved:
             assert result is None
 
 
+class TestApplyBatch:
+    def test_last_action_per_article_wins(self, app, sample_feed, sample_articles):
+        first, second, third = sample_articles
+        with app.app_context():
+            counts = article_service.apply_batch([
+                ("read", first), ("unread", second), ("read", second),
+                ("save", first), ("unsave", third),
+            ])
+
+            assert counts == {"unread": 1, "saved": 1, "feeds": {sample_feed: 1}}
+            assert article_service.get_article_by_id(first).is_saved is True
+            assert article_service.get_article_by_id(third).is_saved is False
+
+    def test_hide_feed(self, app, sample_feed, sample_articles):
+        with app.app_context():
+            counts = article_service.apply_batch([("hide", sample_feed)])
+
+            assert counts["unread"] == 0
+            assert counts["feeds"] == {sample_feed: 2}
+            counts = article_service.apply_batch([("show", sample_feed)])
+            assert counts["unread"] == 2
+
+    def test_one_commit(self, app, sample_articles):
+        with app.app_context():
+            db = get_db()
+            statements = []
+            db.set_trace_callback(statements.append)
+            article_service.apply_batch([("read", aid) for aid in sample_articles])
+            db.set_trace_callback(None)
+
+            assert sum(1 for sql in statements if sql.strip().upper() == "COMMIT") == 1
+
+    def test_unknown_ids_are_ignored(self, app, sample_articles):
+        with app.app_context():
+            counts = article_service.apply_batch([("read", 999), ("hide", 999)])
+            assert counts == {"unread": 2, "saved": 1, "feeds": {999: 0}}
+
+
 class TestUnreadCount:
     def test_get_unread_count_all(self, app, sample_articles):
         with app.app_context():
@@ -158,7 +240,7 @@ class TestCleanupOldArticles:
     def _insert(self, db, feed_id, guid, is_read, is_saved, age_days):
         db.execute(
             "INSERT INTO articles (feed_id, guid, title, is_read, is_saved, created_at) "
-            "VALUES (?, ?, ?, ?, ?, datetime('now', ?))",
+            "VALUES (?, ?, ?, ?, ?, CAST(strftime('%s', 'now', ?) AS INTEGER))",
             (feed_id, guid, guid, is_read, is_saved, f"-{age_days} days")
         )
 
@@ -236,3 +318,129 @@ class TestCleanupOldArticles:
                 (article_id,)
             ).fetchone()["n"]
             assert orphans == 0
+
+    def test_deletes_in_batches_and_reports_progress(self, app, sample_feed):
+        with app.app_context():
+            db = get_db()
+            for i in range(5):
+                self._insert(db, sample_feed, f"old-{i}", is_read=1, is_saved=0, age_days=9)
+            db.commit()
+
+            seen = []
+            deleted = article_service.cleanup_old_articles(
+                retention_days=7, batch_size=2, progress=seen.append
+            )
+
+            assert deleted == 5
+            assert seen == [2, 4, 5]
+            assert article_service.get_articles() == []
+
+    def test_cleanup_query_uses_retention_index(self, app):
+        with app.app_context():
+            plan = get_db().execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM articles "
+                "WHERE is_saved = 0 AND is_read = 1 AND created_at < ? LIMIT 10",
+                ("2024-01-01",)
+            ).fetchall()
+            assert any("idx_articles_cleanup" in row["detail"] for row in plan)
+
+
+class TestPruneSeenGuids:
+    DAY = 86400
+
+    def _tombstone(self, db, feed_id, guid, last_seen_days_ago):
+        db.execute(
+            "INSERT INTO seen_guids (feed_id, guid, last_seen_at) "
+            "VALUES (?, ?, CAST(strftime('%s', 'now') AS INTEGER) - ?)",
+            (feed_id, guid, last_seen_days_ago * self.DAY)
+        )
+
+    def _parsed(self, db, feed_id, days_ago):
+        db.execute(
+            "UPDATE feeds SET last_parsed_at = CAST(strftime('%s', 'now') AS INTEGER) - ? "
+            "WHERE id = ?",
+            (days_ago * self.DAY, feed_id)
+        )
+
+    def test_prunes_stale_tombstone_absent_from_recent_parse(self, app, sample_feed):
+        with app.app_context():
+            db = get_db()
+            self._tombstone(db, sample_feed, "gone", last_seen_days_ago=40)
+            self._parsed(db, sample_feed, days_ago=0)
+            db.commit()
+
+            assert article_service.prune_seen_guids(retention_days=30) == 1
+
+    def test_keeps_recently_seen_tombstone(self, app, sample_feed):
+        with app.app_context():
+            db = get_db()
+            self._tombstone(db, sample_feed, "recent", last_seen_days_ago=3)
+            self._parsed(db, sample_feed, days_ago=0)
+            db.commit()
+
+            assert article_service.prune_seen_guids(retention_days=30) == 0
+
+    def test_keeps_tombstone_when_feed_not_parsed_since(self, app, sample_feed):
+        with app.app_context():
+            db = get_db()
+            self._tombstone(db, sample_feed, "quiet-feed", last_seen_days_ago=40)
+            self._parsed(db, sample_feed, days_ago=40)
+            db.commit()
+
+            assert article_service.prune_seen_guids(retention_days=30) == 0
+
+    def test_keeps_tombstone_while_article_exists(self, app, sample_feed):
+        with app.app_context():
+            db = get_db()
+            db.execute(
+                "INSERT INTO articles (feed_id, guid, title) VALUES (?, 'kept', 'Kept')",
+                (sample_feed,)
+            )
+            self._tombstone(db, sample_feed, "kept", last_seen_days_ago=40)
+            self._parsed(db, sample_feed, days_ago=0)
+            db.commit()
+
+            assert article_service.prune_seen_guids(retention_days=30) == 0
+
+
+class TestCompressStoredBodies:
+    def test_compresses_plain_rows_and_reads_back(self, app, sample_feed):
+        long_summary = "<p>" + "A fairly ordinary sentence about feeds. " * 30 + "</p>"
+        with app.app_context():
+            db = get_db()
+            db.execute(
+                "INSERT INTO articles (feed_id, guid, title, summary, content) VALUES (?, ?, ?, ?, ?)",
+                (sample_feed, "long", "Long", long_summary, long_summary * 2)
+            )
+            db.execute(
+                "INSERT INTO articles (feed_id, guid, title, summary) VALUES (?, ?, ?, ?)",
+                (sample_feed, "short", "Short", "tiny")
+            )
+            db.commit()
+
+            assert article_service.compress_stored_bodies() == 1
+
+            kinds = db.execute(
+                "SELECT guid, typeof(summary) AS s, typeof(content) AS c FROM articles ORDER BY guid"
+            ).fetchall()
+            assert [(r["guid"], r["s"], r["c"]) for r in kinds] == [
+                ("long", "blob", "blob"),
+                ("short", "text", "null"),
+            ]
+
+            articles = {a.guid: a for a in article_service.get_articles()}
+            assert articles["long"].summary == long_summary
+            assert articles["long"].content == long_summary * 2
+            assert articles["short"].summary == "tiny"
+
+    def test_second_pass_is_a_noop(self, app, sample_feed):
+        with app.app_context():
+            db = get_db()
+            db.execute(
+                "INSERT INTO articles (feed_id, guid, title, summary) VALUES (?, ?, ?, ?)",
+                (sample_feed, "g", "T", "word " * 200)
+            )
+            db.commit()
+
+            assert article_service.compress_stored_bodies() == 1
+            assert article_service.compress_stored_bodies() == 0
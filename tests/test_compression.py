@@ -0,0 +1,35 @@
+from src.app.compression import (MIN_COMPRESS_LENGTH, ZLIB_MARKER, compress_text,
+                                 decompress_text, is_compressed)
+
+
+LONG_HTML = "<p>" + "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 20 + "</p>"
+
+
+def test_short_values_stay_plain_text():
+    value = "short summary"
+    assert len(value) < MIN_COMPRESS_LENGTH
+    assert compress_text(value) == value
+
+
+def test_empty_and_none_pass_through():
+    assert compress_text(None) is None
+    assert compress_text("") == ""
+    assert decompress_text(None) is None
+    assert decompress_text("") == ""
+
+
+def test_zlib_round_trip_carries_marker():
+    packed = compress_text(LONG_HTML, codec="zlib")
+    assert is_compressed(packed)
+    assert packed.startswith(ZLIB_MARKER)
+    assert len(packed) < len(LONG_HTML)
+    assert decompress_text(packed) == LONG_HTML
+
+
+def test_plain_text_reads_back_unchanged():
+    assert decompress_text(LONG_HTML) == LONG_HTML
+
+
+def test_non_ascii_round_trip():
+    value = "Ünïcödé — “quotes” " * 40
+    assert decompress_text(compress_text(value, codec="zlib")) == value
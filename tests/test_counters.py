@@ -0,0 +1,79 @@
+import os
+import tempfile
+
+from flask import current_app
+
+from src.app import create_app
+from src.app.counters import VersionedCache, read_counter, read_counters
+from src.app.database import get_db
+
+
+class TestCounters:
+    def test_filter_writes_bump_counter(self, db):
+        start = read_counter("filters")
+        db.execute("INSERT INTO filters (name, pattern, target) VALUES ('a', 'a', 'title')")
+        db.execute("UPDATE filters SET name = 'b'")
+        db.execute("DELETE FROM filters")
+        db.commit()
+        assert read_counter("filters") == start + 3
+
+    def test_unknown_counter_reads_zero(self, db):
+        assert read_counter("nope") == 0
+
+    def test_feed_visibility_and_match_cascades_bump(self, db):
+        feed_id = db.execute("INSERT INTO feeds (url) VALUES ('u')").lastrowid
+        article_id = db.execute(
+            "INSERT INTO articles (feed_id, guid) VALUES (?, 'g')", (feed_id,)
+        ).lastrowid
+        filter_id = db.execute(
+            "INSERT INTO filters (name, pattern, target) VALUES ('a', 'a', 'title')"
+        ).lastrowid
+        db.execute("INSERT INTO filter_matches (article_id, filter_id) VALUES (?, ?)",
+                   (article_id, filter_id))
+        db.commit()
+        feeds, matches = read_counters(("feeds", "filter_matches"))
+
+        db.execute("UPDATE feeds SET hidden = 1, last_error = 'x'")
+        db.execute("UPDATE feeds SET last_error = 'y'")
+        db.execute("DELETE FROM articles")
+        db.commit()
+        assert read_counters(("feeds", "filter_matches")) == (feeds + 1, matches + 1)
+
+
+class TestVersionedCache:
+    def test_rebuilds_only_on_version_change(self, app):
+        builds = []
+        cache = VersionedCache("filters", lambda previous: builds.append(previous) or len(builds))
+        with app.app_context():
+            assert cache.get() == 1
+            assert cache.get() == 1
+            db = get_db()
+            db.execute("INSERT INTO filters (name, pattern, target) VALUES ('a', 'a', 'title')")
+            db.commit()
+            assert cache.get() == 2
+            assert builds == [None, 1]
+
+    def test_any_counter_invalidates(self, app):
+        cache = VersionedCache(("filters", "feeds"), lambda previous: (previous or 0) + 1)
+        with app.app_context():
+            assert cache.get() == 1
+            db = get_db()
+            db.execute("INSERT INTO feeds (url) VALUES ('u')")
+            db.commit()
+            assert cache.get() == 2
+            db.execute("INSERT INTO filters (name, pattern, target) VALUES ('a', 'a', 'title')")
+            db.commit()
+            assert cache.get() == 3
+
+    def test_entries_are_per_database(self, app):
+        cache = VersionedCache("filters", lambda previous: current_app.config["DATABASE"])
+        fd, other_path = tempfile.mkstemp()
+        try:
+            other = create_app({"TESTING": True, "DATABASE": other_path})
+            with app.app_context():
+                assert cache.get() == app.config["DATABASE"]
+            with other.app_context():
+                assert cache.get() == other_path
+        finally:
+            os.close(fd)
+            os.unlink(other_path)
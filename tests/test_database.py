@@ -0,0 +1,242 @@
+import sqlite3
+from datetime import datetime, timezone
+
+from src.app import create_app
+from src.app.database import get_db
+from src.app.models import Article
+
+
+LEGACY_SCHEMA = """
+CREATE TABLE feeds (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL UNIQUE,
+    title TEXT,
+    site_url TEXT,
+    last_fetched DATETIME,
+    fetch_error_count INTEGER DEFAULT 0,
+    last_error TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE articles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    feed_id INTEGER NOT NULL,
+    guid TEXT NOT NULL,
+    title TEXT,
+    summary TEXT,
+    content TEXT,
+    url TEXT,
+    published_at DATETIME,
+    is_read BOOLEAN DEFAULT 0,
+    is_saved BOOLEAN DEFAULT 0,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (feed_id) REFERENCES feeds(id) ON DELETE CASCADE,
+    UNIQUE(feed_id, guid)
+);
+"""
+
+
+class TestEpochTimestampMigration:
+    def _legacy_app(self, tmp_path):
+        path = str(tmp_path / "legacy.db")
+        conn = sqlite3.connect(path)
+        conn.executescript(LEGACY_SCHEMA)
+        conn.execute(
+            "INSERT INTO feeds (url, title, last_fetched, created_at) VALUES (?, ?, ?, ?)",
+            ("https://example.com/feed.xml", "Feed", "2024-01-01T12:00:00+00:00",
+             "2024-01-01 11:00:00")
+        )
+        conn.executemany(
+            "INSERT INTO articles (feed_id, guid, title, published_at, created_at) "
+            "VALUES (1, ?, ?, ?, ?)",
+            [
+                # 10:30 UTC, sorts after "b" as text but is earlier in time.
+                ("a", "a", "2024-01-01T12:30:00+02:00", "2024-01-01 12:00:00"),
+                ("b", "b", "2024-01-01T11:00:00+00:00", "2024-01-01 12:00:00"),
+                ("c", "c", None, "2024-01-01 12:00:00"),
+            ]
+        )
+        conn.commit()
+        conn.close()
+        return create_app({"TESTING": True, "DATABASE": path})
+
+    def test_text_timestamps_become_epoch_seconds(self, tmp_path):
+        app = self._legacy_app(tmp_path)
+        with app.app_context():
+            db = get_db()
+            rows = {r["guid"]: r for r in db.execute(
+                "SELECT guid, published_at, created_at FROM articles"
+            )}
+            assert rows["a"]["published_at"] == int(
+                datetime(2024, 1, 1, 10, 30, tzinfo=timezone.utc).timestamp()
+            )
+            assert rows["c"]["published_at"] is None
+            assert rows["b"]["created_at"] == int(
+                datetime(2024, 1, 1, 12, tzinfo=timezone.utc).timestamp()
+            )
+            feed = db.execute("SELECT typeof(last_fetched), typeof(created_at) FROM feeds").fetchone()
+            assert tuple(feed) == ("integer", "integer")
+
+    def test_ordering_follows_instants_across_offsets(self, tmp_path):
+        app = self._legacy_app(tmp_path)
+        with app.app_context():
+            guids = [r["guid"] for r in get_db().execute(
+                "SELECT guid FROM articles WHERE published_at IS NOT NULL "
+                "ORDER BY published_at DESC"
+            )]
+            assert guids == ["b", "a"]
+
+    def test_migration_is_idempotent(self, tmp_path):
+        app = self._legacy_app(tmp_path)
+        with app.app_context():
+            before = get_db().execute("SELECT published_at FROM articles ORDER BY id").fetchall()
+        app = create_app({"TESTING": True, "DATABASE": str(tmp_path / "legacy.db")})
+        with app.app_context():
+            after = get_db().execute("SELECT published_at FROM articles ORDER BY id").fetchall()
+        assert [tuple(r) for r in before] == [tuple(r) for r in after]
+
+
+class TestFilterTargetMigration:
+    LEGACY_FILTERS = """
+    CREATE TABLE filters (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        pattern TEXT NOT NULL,
+        target TEXT NOT NULL CHECK(target IN ('title', 'summary', 'both')),
+        is_active BOOLEAN DEFAULT 1,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE filter_matches (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        article_id INTEGER NOT NULL,
+        filter_id INTEGER NOT NULL,
+        matched_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (article_id) REFERENCES articles(id) ON DELETE CASCADE,
+        FOREIGN KEY (filter_id) REFERENCES filters(id) ON DELETE CASCADE,
+        UNIQUE(article_id, filter_id)
+    );
+    """
+
+    def test_rebuild_keeps_filters_and_matches(self, tmp_path):
+        path = str(tmp_path / "legacy.db")
+        conn = sqlite3.connect(path)
+        conn.executescript(LEGACY_SCHEMA + self.LEGACY_FILTERS)
+        conn.execute("INSERT INTO feeds (url) VALUES ('https://example.com/feed.xml')")
+        conn.execute("INSERT INTO articles (feed_id, guid, title) VALUES (1, 'a', 'Python')")
+        conn.executemany("INSERT INTO filters (name, pattern, target) VALUES (?, ?, 'both')",
+                         [("Old", "x"), ("Python", "python")])
+        conn.execute("DELETE FROM filters WHERE name = 'Old'")
+        conn.execute("INSERT INTO filter_matches (article_id, filter_id) VALUES (1, 2)")
+        conn.commit()
+        conn.close()
+
+        app = create_app({"TESTING": True, "DATABASE": path})
+        create_app({"TESTING": True, "DATABASE": path})
+        with app.app_context():
+            db = get_db()
+            assert [tuple(r) for r in db.execute("SELECT id, name, target FROM filters")] == [
+                (2, "Python", "both")
+            ]
+            assert db.execute("SELECT COUNT(*) FROM filter_matches").fetchone()[0] == 1
+
+            cursor = db.execute(
+                "INSERT INTO filters (name, pattern, target) VALUES ('Body', 'x', 'content')"
+            )
+            assert cursor.lastrowid == 3
+            counter = db.execute("SELECT value FROM counters WHERE name = 'filters'").fetchone()[0]
+            db.execute("DELETE FROM filters WHERE id = 2")
+            assert db.execute("SELECT COUNT(*) FROM filter_matches").fetchone()[0] == 0
+            assert db.execute(
+                "SELECT value FROM counters WHERE name = 'filters'"
+            ).fetchone()[0] == counter + 1
+
+
+class TestMatchIndexMigration:
+    def test_positional_index_rebuilt_without_detail(self, tmp_path):
+        path = str(tmp_path / "fts.db")
+        create_app({"TESTING": True, "DATABASE": path})
+        conn = sqlite3.connect(path)
+        conn.executescript("""
+            DROP TRIGGER filter_fts_insert;
+            DROP TRIGGER filter_fts_update;
+            DROP TRIGGER filter_fts_delete;
+            DROP TABLE filter_fts;
+            CREATE VIRTUAL TABLE filter_fts USING fts5(
+                match_title, match_summary,
+                content = 'articles', content_rowid = 'id',
+                tokenize = 'trigram case_sensitive 1'
+            );
+            INSERT INTO feeds (url) VALUES ('https://example.com/feed.xml');
+            INSERT INTO articles (feed_id, guid, title, match_title, match_summary)
+            VALUES (1, 'a', 'Python', 'python', 'weekly news');
+        """)
+        conn.commit()
+        conn.close()
+
+        app = create_app({"TESTING": True, "DATABASE": path})
+        with app.app_context():
+            db = get_db()
+            sql = db.execute(
+                "SELECT sql FROM sqlite_master WHERE name = 'filter_fts'"
+            ).fetchone()[0]
+            assert "detail = none" in sql
+            hits = db.execute("SELECT rowid FROM filter_fts WHERE filter_fts MATCH ?",
+                              ('("eek" AND "kly")',)).fetchall()
+            assert [tuple(r) for r in hits] == [(1,)]
+
+
+class TestFilterRecheckMigration:
+    def test_queued_articles_kept_and_rewind_trigger_dropped(self, tmp_path):
+        path = str(tmp_path / "recheck.db")
+        create_app({"TESTING": True, "DATABASE": path})
+        conn = sqlite3.connect(path)
+        conn.executescript("""
+            INSERT INTO feeds (url) VALUES ('https://example.com/feed.xml');
+            INSERT INTO articles (feed_id, guid, title) VALUES (1, 'a', 'Python');
+            DROP TRIGGER articles_unsaved_recheck;
+            DROP TABLE filter_recheck;
+            CREATE TABLE filter_recheck (
+                article_id INTEGER PRIMARY KEY,
+                FOREIGN KEY (article_id) REFERENCES articles(id) ON DELETE CASCADE
+            );
+            CREATE TRIGGER articles_unsaved_recheck
+            AFTER UPDATE OF is_saved ON articles
+            WHEN old.is_saved = 1 AND new.is_saved = 0 BEGIN
+                INSERT OR IGNORE INTO filter_recheck (article_id) VALUES (new.id);
+            END;
+            CREATE TRIGGER filter_matches_removed_rewind
+            AFTER DELETE ON filter_matches BEGIN
+                UPDATE filters SET evaluated_through = old.article_id - 1;
+            END;
+            INSERT INTO filter_recheck (article_id) VALUES (1);
+        """)
+        conn.commit()
+        conn.close()
+
+        app = create_app({"TESTING": True, "DATABASE": path})
+        with app.app_context():
+            db = get_db()
+            assert [tuple(r) for r in db.execute("SELECT article_id, filter_id FROM filter_recheck")] == [
+                (1, 0)
+            ]
+            assert db.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'filter_matches_removed_rewind'"
+            ).fetchone() is None
+            db.execute("DELETE FROM filter_recheck")
+            db.execute("UPDATE articles SET is_saved = 1")
+            db.execute("UPDATE articles SET is_saved = 0")
+            assert db.execute("SELECT COUNT(*) FROM filter_recheck").fetchone()[0] == 1
+
+
+class TestLazyDatetimes:
+    def test_article_keeps_epoch_and_converts_on_access(self, db):
+        db.execute("INSERT INTO feeds (url, title) VALUES ('https://e.com/f', 'F')")
+        db.execute(
+            "INSERT INTO articles (feed_id, guid, title, published_at) VALUES (1, 'g', 't', ?)",
+            (1704103200,)
+        )
+        db.commit()
+
+        article = Article.from_row(db.execute("SELECT * FROM articles").fetchone())
+        assert article.published_ts == 1704103200
+        assert article.published_at == datetime(2024, 1, 1, 10, tzinfo=timezone.utc)
+        assert isinstance(article.created_ts, int)
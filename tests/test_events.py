@@ -0,0 +1,104 @@
+import time
+
+import pytest
+
+from src.app import events
+from src.app.database import get_db
+
+
+@pytest.fixture
+def feed_app(app):
+    app.config["SSE_POLL_SECONDS"] = 0.02
+    app.config["SSE_MAX_STREAMS"] = 2
+    return app
+
+
+@pytest.fixture
+def feed_id(feed_app):
+    with feed_app.app_context():
+        db = get_db()
+        feed_id = db.execute("INSERT INTO feeds (url) VALUES ('u')").lastrowid
+        db.execute("INSERT INTO articles (feed_id, guid, title) VALUES (?, 'a', 't')", (feed_id,))
+        db.commit()
+        return feed_id
+
+
+def _insert(app, feed_id, guid):
+    with app.app_context():
+        db = get_db()
+        db.execute("INSERT INTO articles (feed_id, guid, title) VALUES (?, ?, 't')", (feed_id, guid))
+        db.commit()
+
+
+class TestChangeFeed:
+    def test_first_snapshot_is_current_state(self, feed_app, feed_id):
+        with feed_app.app_context():
+            feed = events.get_feed()
+        assert feed.subscribe()
+        try:
+            version, snapshot = feed.wait(0, 2)
+            assert version == 1
+            assert snapshot["counts"]["unread"] == 1
+            assert snapshot["inserted"] == {}
+        finally:
+            feed.unsubscribe()
+
+    def test_publishes_inserts_by_feed(self, feed_app, feed_id):
+        with feed_app.app_context():
+            feed = events.get_feed()
+        feed.subscribe()
+        try:
+            version, _ = feed.wait(0, 2)
+            _insert(feed_app, feed_id, "b")
+            _insert(feed_app, feed_id, "c")
+            deadline = time.monotonic() + 2
+            snapshot = None
+            while time.monotonic() < deadline:
+                event = feed.wait(version, 0.5)
+                if event:
+                    version, snapshot = event
+                    if snapshot["inserted"].get(feed_id) == 2:
+                        break
+            assert snapshot["inserted"] == {feed_id: 2}
+            assert snapshot["counts"]["unread"] == 3
+        finally:
+            feed.unsubscribe()
+
+    def test_limits_streams_and_stops_when_idle(self, feed_app, feed_id):
+        with feed_app.app_context():
+            feed = events.get_feed()
+        assert feed.subscribe() and feed.subscribe()
+        assert not feed.subscribe()
+        feed.wait(0, 2)
+        thread = feed._thread
+        feed.unsubscribe()
+        feed.unsubscribe()
+        thread.join(2)
+        assert not thread.is_alive()
+        assert feed._thread is None
+
+
+class TestEventsRoute:
+    def test_streams_counts_then_new_articles(self, feed_app, feed_id):
+        feed_app.config["SSE_STREAM_SECONDS"] = 0.6
+        response = feed_app.test_client().get("/api/events")
+        chunks = response.iter_encoded()
+        body = ""
+        while "data: " not in body:
+            body += next(chunks).decode()
+        _insert(feed_app, feed_id, "b")
+        body += b"".join(chunks).decode()
+
+        assert response.mimetype == "text/event-stream"
+        assert body.startswith("retry: ")
+        payloads = [line[len("data: "):] for line in body.splitlines() if line.startswith("data: ")]
+        assert '"new": {}' in payloads[0] and '"unread": 1' in payloads[0]
+        assert f'"new": {{"{feed_id}": 1}}' in payloads[-1] and '"unread": 2' in payloads[-1]
+        response.close()
+        with feed_app.app_context():
+            assert events.get_feed()._subscribers == 0
+
+    def test_rejects_streams_over_the_limit(self, feed_app):
+        feed_app.config["SSE_MAX_STREAMS"] = 0
+        response = feed_app.test_client().get("/api/events")
+        assert response.status_code == 503
@@ -73,6 +73,63 @@ class TestAddFeed:
             assert len(articles) == 1
             assert articles[0].title == "Test Article"
 
+    def test_add_feed_compresses_bodies_when_enabled(self, app, mock_requests_get, mock_feedparser):
+        long_summary = "<p>" + "Plenty of repetitive feed markup. " * 40 + "</p>"
+        mock_feedparser.return_value = make_mock_parsed_feed(entries=[{
+            "id": "entry-long",
+            "title": "Long Article",
+            "summary": long_summary,
+            "link": "https://example.com/long",
+        }])
+        app.config["COMPRESS_ARTICLE_BODIES"] = True
+
+        with app.app_context():
+            from src.app.database import get_db
+            from src.app.services import article_service
+
+            feed_service.add_feed("https://example.com/feed.xml")
+
+            stored = get_db().execute("SELECT typeof(summary) AS t FROM articles").fetchone()
+            assert stored["t"] == "blob"
+            assert article_service.get_articles()[0].summary == long_summary
+
+
+    def test_add_feed_stores_match_text(self, app, mock_requests_get, mock_feedparser):
+        mock_feedparser.return_value = make_mock_parsed_feed(entries=[{
+            "id": "entry-html",
+            "title": "Big  NEWS",
+            "summary": '<a href="https://python.org">Read &amp; <b>share</b></a>',
+            "link": "https://example.com/html",
+        }])
+
+        with app.app_context():
+            from src.app.database import get_db
+
+            feed_service.add_feed("https://example.com/feed.xml")
+
+            row = get_db().execute("SELECT match_title, match_summary FROM articles").fetchone()
+            assert (row["match_title"], row["match_summary"]) == ("big news", "read & share")
+
+    def test_add_feed_indexes_content_without_summary(self, app, mock_requests_get, mock_feedparser):
+        mock_feedparser.return_value = make_mock_parsed_feed(entries=[
+            {"id": "full", "title": "Full text", "summary": "",
+             "content": [{"value": "<p>Only in the <b>Body</b></p>"}],
+             "link": "https://example.com/full"},
+            {"id": "teaser", "title": "Teaser", "summary": "Short",
+             "content": [{"value": "<p>Longer body</p>"}],
+             "link": "https://example.com/teaser"},
+        ])
+
+        with app.app_context():
+            from src.app.database import get_db
+            from src.app.services import search_service
+
+            feed_service.add_feed("https://example.com/feed.xml")
+
+            rows = get_db().execute("SELECT guid, search_content FROM articles ORDER BY guid")
+            assert [tuple(r) for r in rows] == [("full", "only in the body"), ("teaser", None)]
+            assert [a.guid for a, _ in search_service.search_articles("body")] == ["full"]
+
 
 class TestFetchValidation:
     def _resp(self, status, content, headers=None):
@@ -131,6 +188,16 @@ class TestGetFeeds:
             assert len(feeds) == 1
             assert feeds[0].title == "Test Feed"
 
+    def test_get_feed_values_matches_model_listing(self, app, mock_requests_get, mock_feedparser):
+        with app.app_context():
+            feed_service.add_feed("https://example.com/feed.xml")
+            fields = ("id", "title", "unread_count", "hidden")
+            values = list(feed_service.get_feed_values(fields))
+
+            assert values == [(f.id, f.title, f.unread_count, f.hidden)
+                              for f in feed_service.get_all_feeds()]
+            assert values[0][2] > 0
+
     def test_get_feed_by_id(self, app, mock_requests_get, mock_feedparser):
         with app.app_context():
             added_feed, _ = feed_service.add_feed("https://example.com/feed.xml")
@@ -409,3 +476,48 @@ class TestRefreshFeedAgeGate:
             assert second_count == 0
             titles = [a.title for a in article_service.get_articles(feed_id=added_feed.id)]
             assert "Undated" not in titles
+
+    def test_refresh_touches_stale_tombstone(self, app, mock_requests_get, mock_feedparser):
+        with app.app_context():
+            from src.app.database import get_db
+
+            added_feed, _ = feed_service.add_feed("https://example.com/feed.xml")
+            mock_feedparser.return_value = make_mock_parsed_feed(entries=[
+                {"id": "undated", "title": "Undated", "link": "https://example.com/undated"},
+            ])
+            feed_service.refresh_feed(added_feed.id)
+
+            db = get_db()
+            db.execute("UPDATE seen_guids SET last_seen_at = 0")
+            db.commit()
+
+            feed_service.refresh_feed(added_feed.id)
+
+            row = db.execute("SELECT last_seen_at FROM seen_guids WHERE guid = 'undated'").fetchone()
+            assert row["last_seen_at"] > 0
+            parsed_at = db.execute(
+                "SELECT last_parsed_at FROM feeds WHERE id = ?", (added_feed.id,)
+            ).fetchone()["last_parsed_at"]
+            assert parsed_at >= row["last_seen_at"]
+
+    def test_refresh_without_changes_does_not_write(self, app, mock_requests_get, mock_feedparser):
+        with app.app_context():
+            from src.app.database import get_db
+
+            added_feed, _ = feed_service.add_feed("https://example.com/feed.xml")
+            db = get_db()
+            parsed_at = db.execute(
+                "SELECT last_parsed_at FROM feeds WHERE id = ?", (added_feed.id,)
+            ).fetchone()["last_parsed_at"]
+            assert parsed_at is not None
+
+            before = db.total_changes
+            feed_service.save_articles_from_parsed(added_feed.id, make_mock_parsed_feed())
+            assert db.total_changes == before
+
+            db.execute("UPDATE feeds SET last_parsed_at = 0 WHERE id = ?", (added_feed.id,))
+            db.commit()
+            feed_service.save_articles_from_parsed(added_feed.id, make_mock_parsed_feed())
+            assert db.execute(
+                "SELECT last_parsed_at FROM feeds WHERE id = ?", (added_feed.id,)
+            ).fetchone()["last_parsed_at"] > 0
@@ -0,0 +1,186 @@
+import re
+
+import pytest
+
+from src.app.filter_engine import (ArticleBatch, FilterEngine, compile_pattern, fts_query,
+                                   has_nested_quantifier, required_literals)
+from src.app.models import Filter
+from src.app.services.filter_service import article_matches_filter
+from src.app.textnorm import match_text
+
+
+def _compiled(pattern, target="both", filter_id=1):
+    return (Filter(id=filter_id, name=pattern, pattern=pattern, target=target),
+            re.compile(pattern, re.IGNORECASE))
+
+
+def _brute_force(compiled_filters, articles):
+    return [
+        (article_id, f.id)
+        for f, compiled in compiled_filters
+        for article_id, title, summary in articles
+        if article_matches_filter(title, summary, compiled, f.target)
+    ]
+
+
+class TestRequiredLiterals:
+    @pytest.mark.parametrize("pattern, expected", [
+        (r"bitcoin", {"bitcoin"}),
+        (r"\b(deal|sale)s?\b", {"deal", "sale"}),
+        (r"Free Shipping|coupon", {"free shipping", "coupon"}),
+        (r"(?:sponsored|ad):\s+\w+", {"sponsored", "ad"}),
+        (r"\d+ ways to", {" ways to"}),
+        (r"crypto(currency)?", {"crypto"}),
+        (r"(x|y)z?", {"x", "y"}),
+    ])
+    def test_extracts_literals(self, pattern, expected):
+        assert required_literals(re.compile(pattern, re.IGNORECASE)) == expected
+
+    @pytest.mark.parametrize("pattern", [r"^\d+$", r"\w+", r"(foo)?bar?|x*", r"foo|\d"])
+    def test_no_literal_requirement(self, pattern):
+        assert required_literals(re.compile(pattern, re.IGNORECASE)) is None
+
+
+class TestNestedQuantifier:
+    @pytest.mark.parametrize("pattern", [
+        r"(a+)+", r"(\w+\s?)*$", r"(?:x|y+)+z", r"(a*)*b", r"(\d+){2,}",
+        r"(a|aa)+$", r"(\d|\d\d)+z", r"(ab|a)*c", r"(?:\bfoo|fo)+", r"(?:x|X\d)+",
+        r"(\d{2}|\d{3})+",
+    ])
+    def test_flags_nested(self, pattern):
+        assert has_nested_quantifier(pattern)
+
+    @pytest.mark.parametrize("pattern", [
+        r"\b(deal|sale)s?\b", r"(ab)+", r"a+b+", r"(\d{1,3}\.){3}\d+", r"(a++)+", r"[",
+        r"(foo|bar)+", r"(cat|car)+", r"(a|aa){2}", r"(?:https?|ftp)+", r"(x\d|y)+",
+        r"(?>a|aa)+",
+    ])
+    def test_allows_flat(self, pattern):
+        assert not has_nested_quantifier(pattern)
+
+
+class TestCompilePattern:
+    @pytest.mark.parametrize("pattern", [
+        r"\bpython\b", r"deals?|sales?", r"^\d+\s", r"[a-z]+ing\b", r"\S+@\S+", r"(ab)\1",
+    ])
+    def test_folded_patterns_drop_ignorecase(self, pattern):
+        assert not compile_pattern(pattern).flags & re.IGNORECASE
+
+    @pytest.mark.parametrize("pattern", [
+        r"Python", r"[A-Z]{3}", r"(?-i:Weekly)", r"ſtock", r"[^\x00-\x7f]", r"\x41",
+    ])
+    def test_unfolded_patterns_keep_ignorecase(self, pattern):
+        assert compile_pattern(pattern).flags & re.IGNORECASE
+
+    @pytest.mark.parametrize("pattern", [
+        r"\bsale\b", r"istanbul", r"stock", r"kelvin|οδοσ", r"[a-k]elvin", r"(\w)\1",
+    ])
+    def test_same_results_as_ignorecase_on_match_text(self, pattern):
+        texts = ["Big SALE today", "İSTANBUL", "ſtock market", "Kelvin", "ΟΔΟΣ", "LLama"]
+        folded = [match_text(t) for t in texts]
+        loose = re.compile(pattern, re.IGNORECASE)
+        assert ([bool(compile_pattern(pattern).search(t)) for t in folded]
+                == [bool(loose.search(t)) for t in texts])
+
+
+class TestFtsQuery:
+    @pytest.mark.parametrize("pattern,target,expected", [
+        (r"\b(giveaway|sponsored|news)\b", "both",
+         '(("awa" AND "eaw" AND "giv" AND "ive" AND "vea" AND "way") OR ("ews" AND "new") OR '
+         '("nso" AND "ons" AND "ore" AND "pon" AND "red" AND "sor" AND "spo"))'),
+        (r"\bDeals?\b", "title", '(("dea" AND "eal"))'),
+        (r"\bai news\b", "summary", '((" ne" AND "ai " AND "ews" AND "i n" AND "new"))'),
+        (r'say "hi"', "both", '((" ""h" AND """hi" AND "ay " AND "hi""" AND "say" AND "y """))'),
+        (r"abc", "title", '("abc")'),
+    ])
+    def test_literal_patterns(self, pattern, target, expected):
+        assert fts_query(compile_pattern(pattern), target) == expected
+
+    @pytest.mark.parametrize("pattern,target", [
+        (r"^\d+$", "both"),
+        (r"\b(ai|ml)\b", "both"),
+        (r"\bdeal\b", "content"),
+        (r"\bdeal\b", "any"),
+    ])
+    def test_other_patterns_have_no_query(self, pattern, target):
+        assert fts_query(compile_pattern(pattern), target) is None
+
+
+class TestFilterEngine:
+    ARTICLES = [
+        (1, "Big SALE today", "Nothing here"),
+        (2, "Weekly news", "Deals of the week"),
+        (3, None, "İSTANBUL travel guide"),
+        (4, "ſtock market", None),
+        (5, "2024", "Kelvin scale"),
+        (6, "ΟΔΟΣ", "plain"),
+    ]
+
+    def test_matches_brute_force(self):
+        filters = [
+            _compiled(r"\bsale\b", "title", 1),
+            _compiled(r"deals?", "summary", 2),
+            _compiled(r"istanbul", "both", 3),
+            _compiled(r"stock", "title", 4),
+            _compiled(r"^\d+$", "title", 5),
+            _compiled(r"kelvin|οδοσ", "both", 6),
+            _compiled(r"(?-i:Weekly)", "both", 7),
+        ]
+        got = FilterEngine(filters).match(self.ARTICLES)
+        assert sorted(got) == sorted(_brute_force(filters, self.ARTICLES))
+        assert (3, 3) in got and (4, 4) in got and (5, 6) in got and (6, 6) in got
+
+    def test_target_is_respected(self):
+        filters = [_compiled("sale", "summary", 1)]
+        assert FilterEngine(filters).match(self.ARTICLES) == []
+
+    def test_content_targets(self):
+        articles = [(1, "Weekly news", "Short", "a long body about python"),
+                    (2, "Python", "", ""),
+                    (3, "x", "y", None)]
+        filters = [_compiled("python", "content", 1), _compiled("python", "any", 2),
+                   _compiled("python", "both", 3)]
+        engine = FilterEngine(filters)
+        assert engine.needs_content
+        assert sorted(engine.match(articles)) == [(1, 1), (1, 2), (2, 2), (2, 3)]
+        assert not FilterEngine(filters[2:]).needs_content
+
+    def test_with_contents_keeps_other_fields(self):
+        batch = ArticleBatch([(1, "Sale", "x"), (2, "y", "z")])
+        engine = FilterEngine([_compiled("sale", "any", 1), _compiled("deal", "content", 2)])
+        assert engine.match(batch.with_contents(["", "big deal"])) == [(1, 1), (2, 2)]
+        assert batch.contents == ["", ""]
+
+    def test_literal_does_not_span_articles(self):
+        filters = [_compiled("endstart", "both", 1)]
+        articles = [(1, "the end", "x"), (2, "start here", "y")]
+        assert FilterEngine(filters).match(articles) == []
+
+    def test_match_records_costs(self):
+        filters = [_compiled("sale", "title", 1), _compiled(r"^\d+$", "title", 2)]
+        costs = {}
+        engine = FilterEngine(filters)
+        engine.match(self.ARTICLES, costs)
+        engine.match(self.ARTICLES[:2], costs)
+        assert costs[1][:2] == [8, 2]
+        assert costs[2][:2] == [8, 1]
+        assert all(seconds >= 0 for _, _, seconds in costs.values())
+
+    def test_empty_engine(self):
+        engine = FilterEngine([])
+        assert not engine
+        assert engine.match(self.ARTICLES) == []
+
+    def test_count_matches_is_exact_without_deadline(self):
+        filters = [_compiled(r"\bsale\b", "title", 1), _compiled("deal|sale", "both", 2)]
+        batches = [ArticleBatch(self.ARTICLES[:3]), ArticleBatch(self.ARTICLES[3:])]
+        assert FilterEngine(filters).count_matches(batches) == (2, False)
+
+    def test_count_matches_extrapolates_after_deadline(self):
+        filters = [_compiled("sale", "title", 1)]
+        batches = [ArticleBatch([(1, "sale", ""), (2, "x", "")]),
+                   ArticleBatch([(3, "x", ""), (4, "x", "")])]
+        # A past deadline still counts one batch, then scales it up.
+        count, approximate = FilterEngine(filters).count_matches(batches, deadline=0)
+        assert approximate
+        assert count in (0, 2)
@@ -1,7 +1,12 @@
+import re
+
 import pytest
 
+from src.app import filter_worker
 from src.app.database import get_db
+from src.app.filter_engine import compile_pattern, fts_query
 from src.app.services import filter_service
+from src.app.textnorm import html_to_text, match_text
 
 
 @pytest.fixture
@@ -70,7 +75,7 @@ class TestCreateFilter:
             f, error = filter_service.create_filter("Name", "pattern", "invalid")
 
             assert f is None
-            assert error == "Target must be 'title', 'summary', or 'both'"
+            assert error == "Target must be 'title', 'summary', 'both', 'content', or 'any'"
 
     def test_create_filter_invalid_regex(self, app):
         with app.app_context():
@@ -79,6 +84,13 @@ class TestCreateFilter:
             assert f is None
             assert error == "Invalid regex pattern"
 
+    def test_create_filter_rejects_nested_quantifier(self, app):
+        with app.app_context():
+            f, error = filter_service.create_filter("Name", r"(\w+\s?)+$", "both")
+
+            assert f is None
+            assert error == filter_service.NESTED_QUANTIFIER_ERROR
+
 
 class TestFilterMatching:
     def test_filter_applies_to_existing_articles(self, app, sample_articles):
@@ -286,6 +298,54 @@ class TestGetFilteredArticles:
             assert len(python_entry[1]) == 2
             assert len(sports_entry[1]) == 1
 
+    def _add_python_articles(self, db, feed_id, count):
+        for i in range(count):
+            db.execute(
+                "INSERT INTO articles (feed_id, guid, title, published_at) VALUES (?, ?, ?, ?)",
+                (feed_id, f"py-{i}", f"Python {i}", 1000 + i)
+            )
+        db.commit()
+
+    def test_top_n_per_rule_with_total(self, app, sample_feed):
+        with app.app_context():
+            self._add_python_articles(get_db(), sample_feed, 5)
+            filter_service.create_filter("Python", r"python", "title")
+
+            [(f, articles, total, next_cursor)] = filter_service.get_filtered_articles_by_rule(per_rule=2)
+
+            assert f.name == "Python"
+            assert total == 5
+            assert [a.title for a in articles] == ["Python 4", "Python 3"]
+            assert articles[0].content is None
+            assert next_cursor == filter_service.filtered_cursor(articles[-1])
+
+    def test_cursor_pages_through_remaining_matches(self, app, sample_feed):
+        with app.app_context():
+            self._add_python_articles(get_db(), sample_feed, 5)
+            f, _ = filter_service.create_filter("Python", r"python", "title")
+            [(_, _, _, cursor)] = filter_service.get_filtered_articles_by_rule(per_rule=2)
+
+            titles = []
+            while cursor:
+                after = filter_service.parse_filtered_cursor(cursor)
+                page, cursor = filter_service.get_filtered_articles_page(f.id, after, limit=2)
+                titles.extend(a.title for a in page)
+
+            assert titles == ["Python 2", "Python 1", "Python 0"]
+
+    def test_undated_matches_sort_last(self, app, sample_articles):
+        with app.app_context():
+            get_db().execute("UPDATE articles SET published_at = 5000 WHERE id = ?",
+                             (sample_articles[3],))
+            get_db().commit()
+            f, _ = filter_service.create_filter("Python", r"python", "both")
+            [(_, first, _, cursor)] = filter_service.get_filtered_articles_by_rule(per_rule=1)
+            rest, end = filter_service.get_filtered_articles_page(
+                f.id, filter_service.parse_filtered_cursor(cursor))
+
+            assert [a.id for a in first + rest] == [sample_articles[3], sample_articles[0]]
+            assert end is None
+
     def test_get_total_filtered_count(self, app, sample_articles):
         with app.app_context():
             filter_service.create_filter("Python", r"python", "both")
@@ -295,6 +355,32 @@ class TestGetFilteredArticles:
 
             assert total == 3
 
+    def test_total_filtered_count_follows_changes(self, app, sample_feed, sample_articles):
+        with app.app_context():
+            filter_service.create_filter("Python", r"python", "both")
+            assert filter_service.get_total_filtered_count() == 2
+
+            db = get_db()
+            db.execute("UPDATE feeds SET hidden = 1 WHERE id = ?", (sample_feed,))
+            db.commit()
+            assert filter_service.get_total_filtered_count() == 0
+
+            db.execute("UPDATE feeds SET hidden = 0 WHERE id = ?", (sample_feed,))
+            db.execute("DELETE FROM articles WHERE id = ?", (sample_articles[0],))
+            db.commit()
+            assert filter_service.get_total_filtered_count() == 1
+
+    def test_grouped_match_counts(self, app, sample_articles):
+        with app.app_context():
+            python, _ = filter_service.create_filter("Python", r"python", "both")
+            sports, _ = filter_service.create_filter("Sports", r"sports|football", "both")
+            unmatched, _ = filter_service.create_filter("Cooking", r"recipe", "both")
+
+            counts = filter_service.get_filter_match_counts()
+
+            assert counts == {python.id: 2, sports.id: 1}
+            assert unmatched.id not in counts
+
 
 class TestReapplyFilters:
     def test_reapply_catches_unmarked_articles(self, app, sample_articles):
@@ -303,8 +389,9 @@ class TestReapplyFilters:
 
             db = get_db()
             db.execute("UPDATE articles SET is_read = 0")
-            db.execute("DELETE FROM filter_matches")
             db.commit()
+            for (article_id,) in db.execute("SELECT article_id FROM filter_matches").fetchall():
+                filter_service.remove_filter_match(article_id, f.id)
 
             count = filter_service.reapply_all_filters()
             assert count == 2
@@ -352,6 +439,113 @@ class TestReapplyFilters:
             assert count == 0
 
 
+class TestIncrementalReapply:
+    def _add_article(self, db, feed_id, guid, title, is_saved=0):
+        cursor = db.execute(
+            "INSERT INTO articles (feed_id, guid, title, summary, is_saved) VALUES (?, ?, ?, '', ?)",
+            (feed_id, guid, title, is_saved)
+        )
+        db.commit()
+        return cursor.lastrowid
+
+    def test_watermark_advances_to_newest_article(self, app, sample_articles):
+        with app.app_context():
+            f, _ = filter_service.create_filter("Python", r"python", "both")
+            db = get_db()
+            assert db.execute("SELECT evaluated_through FROM filters WHERE id = ?",
+                              (f.id,)).fetchone()[0] == max(sample_articles)
+
+            newer = self._add_article(db, 1, "guid-5", "Python again")
+            filter_service.reapply_all_filters()
+            assert db.execute("SELECT evaluated_through FROM filters WHERE id = ?",
+                              (f.id,)).fetchone()[0] == newer
+
+    def test_only_articles_above_watermark_are_evaluated(self, app, sample_articles, monkeypatch):
+        with app.app_context():
+            filter_service.create_filter("Python", r"python", "both")
+            db = get_db()
+            newer = self._add_article(db, 1, "guid-5", "More python news")
+
+            seen = []
+            original = filter_service._match_groups
+            monkeypatch.setattr(filter_service, "_match_groups",
+                                lambda groups, progress=None, parallel=False:
+                                seen.extend(r["id"] for _, rows in groups for r in rows)
+                                or original(groups, progress, parallel))
+
+            assert filter_service.reapply_all_filters() == 1
+            assert seen == [newer]
+
+            seen.clear()
+            assert filter_service.reapply_all_filters() == 0
+            assert seen == []
+
+    def test_article_unsaved_after_pass_is_rechecked(self, app, sample_feed):
+        with app.app_context():
+            db = get_db()
+            saved = self._add_article(db, sample_feed, "g", "Python news", is_saved=1)
+            filter_service.create_filter("Python", r"python", "title")
+            assert db.execute("SELECT COUNT(*) FROM filter_matches").fetchone()[0] == 0
+
+            db.execute("UPDATE articles SET is_saved = 0 WHERE id = ?", (saved,))
+            db.commit()
+            assert filter_service.reapply_all_filters() == 1
+            assert db.execute("SELECT COUNT(*) FROM filter_recheck").fetchone()[0] == 0
+
+    def test_removed_match_is_rechecked_alone(self, app, sample_articles, monkeypatch):
+        with app.app_context():
+            f, _ = filter_service.create_filter("Python", r"python", "both")
+            filter_service.create_filter("Sports", r"football", "title")
+            db = get_db()
+            assert filter_service.remove_filter_match(sample_articles[3], f.id)
+            assert not filter_service.remove_filter_match(sample_articles[3], f.id)
+            assert db.execute("SELECT evaluated_through FROM filters WHERE id = ?",
+                              (f.id,)).fetchone()[0] == max(sample_articles)
+
+            seen = []
+            original = filter_service._match_groups
+            monkeypatch.setattr(filter_service, "_match_groups",
+                                lambda groups, progress=None, parallel=False:
+                                seen.extend((rule.filter_id, r["id"]) for engine, rows in groups
+                                            for rule in engine.rules for r in rows)
+                                or original(groups, progress, parallel))
+
+            assert filter_service.reapply_all_filters() == 1
+            assert seen == [(f.id, sample_articles[3])]
+            assert db.execute("SELECT COUNT(*) FROM filter_recheck").fetchone()[0] == 0
+
+    def test_clearing_matches_queues_nothing(self, app, sample_articles):
+        with app.app_context():
+            f, _ = filter_service.create_filter("Python", r"python", "both")
+            filter_service.update_filter(f.id, pattern="python|football")
+            db = get_db()
+            assert db.execute("SELECT COUNT(*) FROM filter_recheck").fetchone()[0] == 0
+            assert filter_service.get_filter_match_count(f.id) == 3
+
+    def test_matches_full_evaluation(self, app, sample_feed):
+        with app.app_context():
+            db = get_db()
+            titles = ["python tips", "rust news", "python and rust", "gardening", "Rust belt"]
+            for i, title in enumerate(titles):
+                self._add_article(db, sample_feed, f"a{i}", title, is_saved=int(i == 2))
+            filter_service.create_filter("Python", r"python", "title")
+            filter_service.create_filter("Rust", r"\brust\b", "both")
+            for i, title in enumerate(titles):
+                self._add_article(db, sample_feed, f"b{i}", title)
+            db.execute("UPDATE articles SET is_saved = 0")
+            db.commit()
+
+            filter_service.reapply_all_filters()
+
+            got = set(map(tuple, db.execute(
+                "SELECT a.title, f.name FROM filter_matches m "
+                "JOIN articles a ON a.id = m.article_id JOIN filters f ON f.id = m.filter_id"
+            ).fetchall()))
+            expected = {(t, "Python") for t in titles if "python" in t.lower()}
+            expected |= {(t, "Rust") for t in titles if "rust" in t.lower()}
+            assert got == expected
+
+
 class TestRegexValidation:
     def test_valid_regex(self, app):
         with app.app_context():
@@ -404,3 +598,487 @@ class TestCountUnreadMatches:
             db.commit()
 
             assert filter_service.count_unread_matches("python", "both") == 0
+
+
+class TestUnreadCorpusPreview:
+    def test_preview_matches_exact_count(self, app, sample_articles):
+        with app.app_context():
+            assert filter_service.preview_unread_matches("python", "both") == (2, False)
+
+    def test_snapshot_follows_article_changes(self, app, sample_feed, sample_articles):
+        with app.app_context():
+            assert filter_service.count_unread_matches("python", "both") == 2
+
+            db = get_db()
+            db.execute("UPDATE articles SET is_read = 1 WHERE id = ?", (sample_articles[0],))
+            db.execute(
+                "INSERT INTO articles (feed_id, guid, title, summary) VALUES (?, ?, ?, ?)",
+                (sample_feed, "guid-5", "Python packaging", "")
+            )
+            db.commit()
+            assert filter_service.count_unread_matches("python", "both") == 2
+
+            db.execute("UPDATE articles SET is_saved = 1 WHERE guid = 'guid-5'")
+            db.commit()
+            assert filter_service.count_unread_matches("python", "both") == 1
+
+    def test_unchanged_buckets_are_reused(self, app, sample_articles, monkeypatch):
+        monkeypatch.setattr(filter_service, "UNREAD_CORPUS_BUCKET", 1)
+        with app.app_context():
+            first = filter_service._unread_corpus.get()
+            assert filter_service._unread_corpus.get() is first
+
+            db = get_db()
+            db.execute("UPDATE articles SET is_read = 1 WHERE id = ?", (sample_articles[0],))
+            db.commit()
+            second = filter_service._unread_corpus.get()
+            assert second is not first
+            assert sample_articles[0] not in second
+            assert second[sample_articles[1]] is first[sample_articles[1]]
+
+    def test_budget_exhausted_returns_estimate(self, app, sample_articles, monkeypatch):
+        monkeypatch.setattr(filter_service, "UNREAD_CORPUS_BUCKET", 1)
+        with app.app_context():
+            count, approximate = filter_service.preview_unread_matches("python", "both", budget=-1)
+            assert approximate
+            assert count in (0, 4)
+
+
+class TestFilterTimeBudget:
+    # Adjacent unbounded quantifiers pass the nested-quantifier check but
+    # still backtrack polynomially on a long run of a's that doesn't end the
+    # text: seconds for forty of them.
+    SLOW_PATTERN = "^a*a*a*a*a*a*a*a*$"
+    SLOW_TITLE = "a" * 40 + "! python"
+    # Long enough to overrun the budget in-process, short enough to finish.
+    SLUGGISH_TITLE = "a" * 24 + "!"
+
+    @pytest.fixture
+    def budget_app(self, app, monkeypatch):
+        app.config["FILTER_TIME_BUDGET_SECONDS"] = 0.05
+        monkeypatch.setattr(filter_service, "_slow_patterns", set())
+        return app
+
+    def _ingest(self, feed_id, guid, title):
+        cursor = get_db().execute(
+            "INSERT INTO articles (feed_id, guid, title) VALUES (?, ?, ?)", (feed_id, guid, title)
+        )
+        get_db().commit()
+        return filter_service.apply_filters_to_articles([(cursor.lastrowid, title, "")])
+
+    def test_matches_in_process_by_default(self, budget_app, sample_feed, monkeypatch):
+        worker = filter_worker.FilterWorker()
+        monkeypatch.setattr(filter_service, "_worker", worker)
+        with budget_app.app_context():
+            filter_service.create_filter("Python", "python", "title")
+
+            assert self._ingest(sample_feed, "g", "python news") == 1
+            assert worker._process is None
+
+    def test_slow_filter_deactivated_on_ingest(self, budget_app, sample_feed):
+        with budget_app.app_context():
+            db = get_db()
+            db.executemany(
+                "INSERT INTO filters (name, pattern, target) VALUES (?, ?, 'title')",
+                [("Slow", self.SLOW_PATTERN), ("Python", "python")]
+            )
+            db.commit()
+
+            # The first overrun runs to completion in-process and is noted...
+            assert self._ingest(sample_feed, "g1", self.SLUGGISH_TITLE) == 0
+            assert all(f.is_active for f in filter_service.get_all_filters())
+
+            # ...so the next batch runs the filter in the worker, which cuts it off.
+            assert self._ingest(sample_feed, "g2", self.SLOW_TITLE) == 1
+            slow, python = filter_service.get_all_filters()[::-1]
+            assert slow.name == "Slow" and not slow.is_active
+            assert "took longer than 0.05s" in slow.disabled_reason
+            assert python.is_active and python.disabled_reason is None
+            assert [f.name for f, _ in filter_service.get_compiled_active_filters()] == ["Python"]
+
+    def test_slow_preview_times_out(self, budget_app, sample_feed, monkeypatch):
+        monkeypatch.setattr(filter_service, "PREVIEW_BATCH_TIMEOUT_SECONDS", 0.2)
+        with budget_app.app_context():
+            db = get_db()
+            db.execute("INSERT INTO articles (feed_id, guid, title) VALUES (?, 'g', ?)",
+                       (sample_feed, self.SLOW_TITLE))
+            db.commit()
+
+            with pytest.raises(filter_worker.FilterTimeout):
+                filter_service.preview_unread_matches(self.SLOW_PATTERN, "title")
+            with pytest.raises(filter_worker.FilterTimeout):
+                filter_service.profile_pattern(self.SLOW_PATTERN, "title")
+            # The killed worker is replaced for the next preview.
+            assert filter_service.preview_unread_matches("python", "title") == (1, False)
+            assert filter_service.profile_pattern("python", "title")["matches"] == 1
+
+    def test_reactivating_clears_reason(self, budget_app, sample_feed):
+        with budget_app.app_context():
+            db = get_db()
+            db.execute("INSERT INTO articles (feed_id, guid, title) VALUES (?, 'g1', ?)",
+                       (sample_feed, self.SLUGGISH_TITLE))
+            db.commit()
+
+            created, error = filter_service.create_filter("Slow", self.SLOW_PATTERN, "title")
+            assert error is None
+            self._ingest(sample_feed, "g2", self.SLOW_TITLE)
+            slow = filter_service.get_filter_by_id(created.id)
+            assert not slow.is_active and slow.disabled_reason
+
+            updated, _ = filter_service.update_filter(created.id, pattern="a{40}!", is_active=True)
+            assert updated.is_active and updated.disabled_reason is None
+            assert filter_service.get_filter_match_count(created.id) == 1
+
+
+class TestMatchText:
+    def test_markup_is_not_matched(self, app, sample_feed):
+        with app.app_context():
+            db = get_db()
+            summary = '<a href="https://python.org" title="Python">Read more</a> &amp; more'
+            db.execute(
+                "INSERT INTO articles (feed_id, guid, title, summary, match_title, match_summary) "
+                "VALUES (?, 'g', 'Weekly links', ?, ?, ?)",
+                (sample_feed, summary, match_text("Weekly links"), match_text(summary))
+            )
+            db.commit()
+
+            python, _ = filter_service.create_filter("Python", r"python", "both")
+            entity, _ = filter_service.create_filter("Amp", r"read more & more", "summary")
+
+            assert filter_service.get_filter_match_count(python.id) == 0
+            assert filter_service.get_filter_match_count(entity.id) == 1
+
+    def test_rows_without_match_text_still_match(self, app, sample_articles):
+        with app.app_context():
+            assert filter_service.count_unread_matches(r"basics", "summary") == 1
+
+            created, _ = filter_service.create_filter("Python", r"\bPython\b", "both")
+
+            assert filter_service.get_filter_match_count(created.id) == 2
+
+    def test_backfill_match_text(self, app, sample_articles):
+        with app.app_context():
+            assert filter_service.backfill_match_text(batch_size=3) == 4
+            assert filter_service.backfill_match_text() == 0
+
+            row = get_db().execute(
+                "SELECT match_title, match_summary FROM articles WHERE id = ?",
+                (sample_articles[3],)
+            ).fetchone()
+            assert tuple(row) == ("python tutorial for beginners", "learn python basics")
+
+
+    def test_bounded_conversion_is_a_prefix(self):
+        html = "<p>Caf&eacute; <b>news</b></p><script>var x = '<p>';</script>" * 500
+        full = html_to_text(html)
+        for max_chars in (0, 1, 7, 100, 4097):
+            assert html_to_text(html, max_chars) == full[:max_chars].rstrip()
+
+
+class TestContentFilters:
+    @pytest.fixture
+    def inline_app(self, app):
+        app.config["FILTER_TIME_BUDGET_SECONDS"] = 0
+        return app
+
+    def _insert(self, feed_id, guid, content):
+        db = get_db()
+        article_id = db.execute(
+            "INSERT INTO articles (feed_id, guid, title, summary, content) VALUES (?, ?, 'Links', '', ?)",
+            (feed_id, guid, content)
+        ).lastrowid
+        db.commit()
+        return article_id
+
+    def test_body_only_match(self, inline_app, sample_feed, sample_articles):
+        with inline_app.app_context():
+            body_only = self._insert(sample_feed, "body", "<p>All about <b>Python</b></p>")
+            assert filter_service.count_unread_matches(r"\bpython\b", "content") == 1
+            assert filter_service.count_unread_matches(r"\bpython\b", "any") == 3
+
+            created, _ = filter_service.create_filter("Python", r"\bpython\b", "content")
+
+            assert filter_service.get_filter_match_count(created.id) == 1
+            row = get_db().execute("SELECT article_id FROM filter_matches").fetchone()
+            assert row["article_id"] == body_only
+
+    def test_scan_is_capped(self, inline_app, sample_feed):
+        with inline_app.app_context():
+            inline_app.config["FILTER_CONTENT_SCAN_CHARS"] = 100
+            self._insert(sample_feed, "early", "<p>python</p>" + "x " * 1000)
+            self._insert(sample_feed, "late", "x " * 1000 + "<p>python</p>")
+
+            created, _ = filter_service.create_filter("Python", r"python", "content")
+
+            assert filter_service.get_filter_match_count(created.id) == 1
+
+    def test_ingest_charges_content_conversion(self, inline_app, sample_feed):
+        with inline_app.app_context():
+            content, _ = filter_service.create_filter("Body", r"python", "content")
+            title, _ = filter_service.create_filter("Title", r"python", "title")
+            article_id = self._insert(sample_feed, "new", "<p>Python</p>" * 2000)
+
+            filter_service.apply_filters_to_articles(
+                [(article_id, "links", "", "<p>Python</p>" * 2000)]
+            )
+
+            stats = filter_service.get_filter_stats()
+            assert stats[content.id].matches == 1
+            assert stats[title.id].matches == 0
+            assert stats[content.id].seconds > stats[title.id].seconds
+
+
+class TestMatchIndex:
+    TEXTS = [
+        ("Giveaway: win a phone", "Deal of the day"),
+        ("Giveaways galore", "deal-of-the-day &amp; more"),
+        ("foo_giveaway", "mydeal of the day"),
+        ("Straße deals", "<b>DEAL</b> of <i>the</i> day"),
+        ("Café giveaway", "e\u0301deal of the day"),
+        ("ﬁnance giveaway", "deal\u00a0of the day"),
+        ("Sponsored", "deal of the daydream"),
+        ("\ue000giveaway", "deal_of the day"),
+        ("ſtock tips", "Stocks &amp; bonds"),
+    ]
+    PATTERNS = [
+        r"\b(giveaway|sponsored|deal of the day)\b",
+        r"(giveaway|sponsored)",
+        r"\bGiveaways?",
+        r"deal\W+of the day",
+        r"^(deal|sponsored)\b",
+        r"\bfinance\b",
+        r"Straße|café",
+        r"\bstock(?!s)",
+    ]
+
+    def _populate(self, db, feed_id):
+        for i, (title, summary) in enumerate(self.TEXTS):
+            db.execute(
+                "INSERT INTO articles (feed_id, guid, title, summary, match_title, match_summary) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (feed_id, f"k{i}", title, summary, match_text(title), match_text(summary))
+            )
+        # Stored before match text existed, so not in the index yet.
+        db.execute("INSERT INTO articles (feed_id, guid, title, summary) "
+                   "VALUES (?, 'old', 'Old giveaway', 'deal of the day')", (feed_id,))
+        db.commit()
+
+    def _expected(self, db, pattern, target):
+        compiled = re.compile(pattern, re.IGNORECASE)
+        return {
+            row["id"] for row in db.execute("SELECT id, title, summary FROM articles")
+            if filter_service.article_matches_filter(
+                match_text(row["title"]), match_text(row["summary"]), compiled, target)
+        }
+
+    @pytest.mark.parametrize("target", ["title", "summary", "both"])
+    def test_index_and_regex_agree(self, app, sample_feed, target):
+        with app.app_context():
+            db = get_db()
+            self._populate(db, sample_feed)
+            for pattern in self.PATTERNS:
+                assert fts_query(compile_pattern(pattern), target) is not None
+                expected = self._expected(db, pattern, target)
+
+                assert filter_service.count_unread_matches(pattern, target) == len(expected)
+
+                created, _ = filter_service.create_filter(pattern, pattern, target)
+                matched = {row[0] for row in db.execute(
+                    "SELECT article_id FROM filter_matches WHERE filter_id = ?", (created.id,))}
+                assert matched == expected, pattern
+                filter_service.delete_filter(created.id)
+                db.execute("UPDATE articles SET is_read = 0")
+                db.commit()
+
+    def test_reapply_reads_index_candidates(self, app, sample_feed):
+        app.config["FILTER_TIME_BUDGET_SECONDS"] = 0
+        with app.app_context():
+            db = get_db()
+            self._populate(db, sample_feed)
+            giveaway, _ = filter_service.create_filter("Giveaway", r"\bgiveaway\b", "title")
+            finance, _ = filter_service.create_filter("Finance", r"finance", "title")
+            for guid, title in (("new-1", "Giveaway 2"), ("new-2", "Weekly links")):
+                db.execute(
+                    "INSERT INTO articles (feed_id, guid, title, match_title, match_summary) "
+                    "VALUES (?, ?, ?, ?, '')", (sample_feed, guid, title, match_text(title))
+                )
+            db.commit()
+            before = filter_service.get_filter_stats()
+
+            assert filter_service.reapply_all_filters() == 1
+
+            after = filter_service.get_filter_stats()
+            assert after[giveaway.id].evaluations - before[giveaway.id].evaluations == 1
+            assert after[finance.id].evaluations - before[finance.id].evaluations == 1
+
+    def test_index_follows_backfill_and_deletes(self, app, sample_feed):
+        with app.app_context():
+            db = get_db()
+            self._populate(db, sample_feed)
+            filter_service.backfill_match_text()
+            db.execute("DELETE FROM articles WHERE guid = 'k0'")
+            db.commit()
+
+            hits = db.execute(
+                "SELECT COUNT(*) FROM filter_fts WHERE filter_fts MATCH 'old'"
+            ).fetchone()[0]
+            assert hits == 1
+            db.execute("INSERT INTO filter_fts (filter_fts) VALUES ('integrity-check')")
+
+
+class TestFilterStats:
+    @pytest.fixture
+    def inline_app(self, app):
+        app.config["FILTER_TIME_BUDGET_SECONDS"] = 0
+        return app
+
+    def _ingest(self, feed_id, title):
+        db = get_db()
+        article_id = db.execute("INSERT INTO articles (feed_id, guid, title) VALUES (?, 'new', ?)",
+                                (feed_id, title)).lastrowid
+        db.commit()
+        filter_service.apply_filters_to_articles([(article_id, match_text(title), "")])
+
+    def test_costs_accumulate_per_filter(self, inline_app, sample_feed, sample_articles):
+        with inline_app.app_context():
+            python, _ = filter_service.create_filter("Python", r"python", "both")
+            sports, _ = filter_service.create_filter("Sports", r"football", "title")
+            self._ingest(sample_feed, "Python again")
+
+            stats = filter_service.get_filter_stats()
+
+            assert (stats[python.id].evaluations, stats[python.id].matches) == (5, 3)
+            assert (stats[sports.id].evaluations, stats[sports.id].matches) == (5, 1)
+            assert stats[python.id].seconds > 0
+            assert stats[python.id].share + stats[sports.id].share == pytest.approx(1.0)
+
+    def test_flush_is_throttled(self, inline_app, sample_feed, sample_articles):
+        with inline_app.app_context():
+            created, _ = filter_service.create_filter("Python", r"python", "both")
+            filter_service.flush_filter_stats(force=True)
+            self._ingest(sample_feed, "Python again")
+
+            row = get_db().execute(
+                "SELECT evaluations FROM filter_stats WHERE filter_id = ?", (created.id,)
+            ).fetchone()
+            assert row["evaluations"] == 4
+            assert filter_service.get_filter_stats()[created.id].evaluations == 5
+
+    def test_dominant_filter_is_hot(self, inline_app, sample_feed):
+        with inline_app.app_context():
+            db = get_db()
+            for name in ("Cheap", "Costly"):
+                db.execute("INSERT INTO filters (name, pattern, target) VALUES (?, 'x', 'both')",
+                           (name,))
+            db.execute("INSERT INTO filter_stats (filter_id, evaluations, seconds) "
+                       "SELECT id, 100, CASE name WHEN 'Costly' THEN 9.0 ELSE 1.0 END FROM filters")
+            db.commit()
+
+            stats = {filter_service.get_filter_by_id(fid).name: s
+                     for fid, s in filter_service.get_filter_stats().items()}
+
+            assert stats["Costly"].hot and not stats["Cheap"].hot
+            assert stats["Costly"].share == pytest.approx(0.9)
+            assert stats["Costly"].micros_per_article == pytest.approx(90000)
+
+    def test_pattern_change_resets_stats(self, inline_app, sample_articles):
+        with inline_app.app_context():
+            created, _ = filter_service.create_filter("Python", r"python", "both")
+            filter_service.update_filter(created.id, name="Renamed")
+            assert filter_service.get_filter_stats()[created.id].evaluations == 4
+
+            filter_service.update_filter(created.id, pattern="football")
+            assert filter_service.get_filter_stats()[created.id].evaluations == 4
+            assert filter_service.get_filter_stats()[created.id].matches == 1
+
+    def test_profile_pattern(self, app, sample_articles):
+        with app.app_context():
+            profile = filter_service.profile_pattern(r"\bpython\b", "both")
+
+            assert profile["articles"] == profile["corpus_articles"] == 4
+            assert profile["matches"] == 2
+            assert profile["prefilter"] == ["python"]
+            assert filter_service.profile_pattern(r"^\w+", "title")["prefilter"] is None
+            assert filter_service.get_filter_stats() == {}
+
+
+class TestParallelMatching:
+    @pytest.fixture
+    def pool_app(self, app, monkeypatch):
+        app.config["FILTER_WORKERS"] = 2
+        monkeypatch.setattr(filter_service, "PARALLEL_MATCH_MIN_ARTICLES", 1)
+        monkeypatch.setattr(filter_service, "FILTER_BATCH_SIZE", 2)
+        return app
+
+    def test_pool_matches_and_reports_progress(self, pool_app, sample_articles):
+        with pool_app.app_context():
+            filter_service.create_filter("Python", r"python", "both")
+            filter_service.create_filter("Sports", r"football", "title")
+            db = get_db()
+            db.execute("DELETE FROM filter_matches")
+            db.execute("UPDATE filters SET evaluated_through = 0")
+            db.commit()
+
+            checked = []
+            assert filter_service.reapply_all_filters(progress=checked.append, parallel=True) == 3
+            assert checked == [2, 4]
+            rows = db.execute(
+                "SELECT article_id, filter_id FROM filter_matches ORDER BY article_id"
+            ).fetchall()
+            assert [tuple(r) for r in rows] == [(1, 1), (2, 2), (4, 1)]
+
+    def test_pool_only_when_asked(self, pool_app, sample_articles, monkeypatch):
+        def no_pool(*args):
+            raise AssertionError("pool used")
+
+        monkeypatch.setattr(filter_service, "iter_pool_matches", no_pool)
+        with pool_app.app_context():
+            filter_service.create_filter("Python", r"python", "both")
+            assert filter_service.get_filter_match_count(1) == 2
+            get_db().execute("UPDATE filters SET evaluated_through = 0")
+            get_db().commit()
+            checked = []
+            filter_service.reapply_all_filters(progress=checked.append)
+            assert checked == [2, 4]
+
+    def test_overrun_finishes_serially(self, pool_app, sample_feed, monkeypatch):
+        pool_app.config["FILTER_TIME_BUDGET_SECONDS"] = 0.2
+        monkeypatch.setattr(filter_worker, "STARTUP_TIMEOUT_SECONDS", 2)
+        with pool_app.app_context():
+            db = get_db()
+            db.executemany(
+                "INSERT INTO articles (feed_id, guid, title) VALUES (?, ?, ?)",
+                [(sample_feed, f"g{i}", TestFilterTimeBudget.SLOW_TITLE) for i in range(4)]
+            )
+            db.executemany(
+                "INSERT INTO filters (name, pattern, target) VALUES (?, ?, 'title')",
+                [("Slow", TestFilterTimeBudget.SLOW_PATTERN), ("Python", "python")]
+            )
+            db.commit()
+
+            assert filter_service.reapply_all_filters(parallel=True) == 4
+            python, slow = filter_service.get_all_filters()
+            assert python.is_active and not slow.is_active and slow.disabled_reason
+
+
+class TestActiveFilterCache:
+    def test_engine_reused_until_filters_change(self, app):
+        with app.app_context():
+            filter_service.create_filter("Python", "python", "title")
+            first = filter_service.get_active_filter_engine()
+            assert filter_service.get_active_filter_engine() is first
+
+            filter_service.create_filter("Sports", "football", "both")
+            second = filter_service.get_active_filter_engine()
+            assert second is not first
+            assert [f.name for f, _ in second.compiled_filters] == ["Python", "Sports"]
+
+    def test_direct_sql_change_invalidates(self, app):
+        with app.app_context():
+            created, _ = filter_service.create_filter("Python", "python", "title")
+            assert filter_service.get_active_filter_engine()
+
+            db = get_db()
+            db.execute("UPDATE filters SET is_active = 0 WHERE id = ?", (created.id,))
+            db.commit()
+            assert not filter_service.get_active_filter_engine()
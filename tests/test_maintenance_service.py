@@ -0,0 +1,121 @@
+import os
+
+import pytest
+
+from src.app.database import get_db
+from src.app.services import maintenance_service
+
+
+@pytest.fixture
+def bulky_feed(app):
+    with app.app_context():
+        db = get_db()
+        feed_id = db.execute(
+            "INSERT INTO feeds (url, title) VALUES (?, ?)",
+            ("https://example.com/feed.xml", "Test Feed")
+        ).lastrowid
+        db.executemany(
+            "INSERT INTO articles (feed_id, guid, title, content) VALUES (?, ?, ?, ?)",
+            [(feed_id, f"g{i}", f"t{i}", "x" * 4000) for i in range(300)]
+        )
+        db.commit()
+        return feed_id
+
+
+def test_new_database_uses_incremental_auto_vacuum(app):
+    with app.app_context():
+        mode = get_db().execute("PRAGMA auto_vacuum").fetchone()[0]
+        assert mode == maintenance_service.AUTO_VACUUM_INCREMENTAL
+
+
+def test_incremental_vacuum_releases_free_pages(app, bulky_feed):
+    with app.app_context():
+        db = get_db()
+        db.execute("DELETE FROM articles")
+        db.commit()
+        assert db.execute("PRAGMA freelist_count").fetchone()[0] > 0
+
+        released = maintenance_service.incremental_vacuum(budget_seconds=5, step_pages=16)
+
+        assert released > 0
+        assert db.execute("PRAGMA freelist_count").fetchone()[0] == 0
+
+
+def test_incremental_vacuum_stops_at_budget(app, bulky_feed):
+    with app.app_context():
+        db = get_db()
+        db.execute("DELETE FROM articles")
+        db.commit()
+
+        assert maintenance_service.incremental_vacuum(budget_seconds=0) == 0
+        assert db.execute("PRAGMA freelist_count").fetchone()[0] > 0
+
+
+def test_existing_database_is_converted_when_small(app, bulky_feed):
+    with app.app_context():
+        db = get_db()
+        db.execute("PRAGMA auto_vacuum = NONE")
+        db.execute("VACUUM")
+        assert db.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+
+        assert maintenance_service.ensure_incremental_auto_vacuum(budget_seconds=2)
+        assert db.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
+def test_large_database_is_not_converted(app, bulky_feed):
+    with app.app_context():
+        db = get_db()
+        db.execute("PRAGMA auto_vacuum = NONE")
+        db.execute("VACUUM")
+
+        assert not maintenance_service.ensure_incremental_auto_vacuum(budget_seconds=0)
+        assert db.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+
+        assert maintenance_service.convert_to_incremental_auto_vacuum()
+        assert db.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
+def test_checkpoint_respects_threshold(app, bulky_feed):
+    with app.app_context():
+        db = get_db()
+        db.execute("DELETE FROM articles")
+        db.commit()
+        wal_path = app.config["DATABASE"] + "-wal"
+        assert os.path.getsize(wal_path) > 0
+
+        assert maintenance_service.checkpoint_wal(threshold_bytes=1 << 40) is False
+        assert os.path.getsize(wal_path) > 0
+
+        assert maintenance_service.checkpoint_wal(threshold_bytes=0) is True
+        assert os.path.getsize(wal_path) == 0
+
+
+def test_run_maintenance_reports_sizes_and_analyzes(app, bulky_feed):
+    with app.app_context():
+        db = get_db()
+        db.execute("DELETE FROM articles")
+        db.commit()
+
+        stats = maintenance_service.run_maintenance(budget_seconds=5)
+
+        assert stats["pages_released"] > 0
+        assert stats["optimized"]
+        assert 0 < stats["remaining_seconds"] <= 5
+        assert stats["after"][0] < stats["before"][0]
+        assert db.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+        ).fetchone() is not None
+
+
+def test_run_maintenance_shares_one_deadline(app, bulky_feed):
+    with app.app_context():
+        db = get_db()
+        db.execute("DELETE FROM articles")
+        db.commit()
+
+        stats = maintenance_service.run_maintenance(budget_seconds=0)
+
+        assert stats["pages_released"] == 0
+        assert not stats["optimized"]
+        assert stats["remaining_seconds"] == 0
+        assert db.execute("PRAGMA freelist_count").fetchone()[0] > 0
@@ -0,0 +1,106 @@
+import socket
+import threading
+
+from src.app import refresh_signal
+from src.app.services import settings_service
+
+
+def _listen(app):
+    received = threading.Event()
+    calls = []
+
+    def on_request(message):
+        calls.append(message)
+        received.set()
+
+    listener = refresh_signal.RefreshListener(app.config["REFRESH_SOCKET_PATH"], on_request)
+    listener.start()
+    return listener, received, calls
+
+
+class TestRequestRefresh:
+    def test_signals_listener_without_writing(self, app):
+        listener, received, calls = _listen(app)
+        try:
+            with app.app_context():
+                assert refresh_signal.request_refresh()
+                assert received.wait(2)
+                assert settings_service.get_setting("refresh_requested") is None
+        finally:
+            listener.stop()
+        assert calls == [b"refresh"]
+
+    def test_deduplicates_within_window(self, app):
+        listener, received, calls = _listen(app)
+        try:
+            with app.app_context():
+                assert refresh_signal.request_refresh()
+                assert not refresh_signal.request_refresh()
+                assert received.wait(2)
+        finally:
+            listener.stop()
+        assert calls == [b"refresh"]
+
+    def test_listener_coalesces_a_burst(self, app):
+        gate = threading.Event()
+        calls = []
+
+        def on_request(message):
+            calls.append(message)
+            gate.wait(2)
+
+        listener = refresh_signal.RefreshListener(app.config["REFRESH_SOCKET_PATH"], on_request)
+        listener.start()
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+                for _ in range(5):
+                    sock.sendto(b"refresh", listener.path)
+        finally:
+            gate.set()
+            listener.stop()
+        assert 1 <= len(calls) <= 2
+
+    def test_falls_back_to_setting_without_listener(self, app):
+        with app.app_context():
+            assert refresh_signal.request_refresh()
+            assert settings_service.get_setting("refresh_requested") == "1"
+
+
+class TestRequestReapply:
+    def test_signals_listener_every_time(self, app):
+        listener, received, calls = _listen(app)
+        try:
+            with app.app_context():
+                refresh_signal.request_reapply()
+                assert received.wait(2)
+                received.clear()
+                refresh_signal.request_reapply()
+                assert received.wait(2)
+                assert settings_service.get_setting("reapply_requested") is None
+        finally:
+            listener.stop()
+        assert calls == [b"reapply", b"reapply"]
+
+    def test_burst_calls_each_kind_once(self, app):
+        gate = threading.Event()
+        calls = []
+
+        def on_request(message):
+            gate.wait(2)
+            calls.append(message)
+
+        listener = refresh_signal.RefreshListener(app.config["REFRESH_SOCKET_PATH"], on_request)
+        listener.start()
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+                for message in (b"reapply", b"refresh", b"reapply", b"refresh"):
+                    sock.sendto(message, listener.path)
+            gate.set()
+        finally:
+            listener.stop()
+        assert set(calls) == {b"reapply", b"refresh"}
+
+    def test_falls_back_to_setting_without_listener(self, app):
+        with app.app_context():
+            refresh_signal.request_reapply()
+            assert settings_service.get_setting("reapply_requested") == "1"
@@ -3,6 +3,7 @@ from unittest.mock import patch, MagicMock
 import pytest
 
 from src.app.database import get_db
+from src.app.services import filter_service, settings_service, sync_service
 
 
 class MockFeedParserDict(dict):
@@ -264,6 +265,42 @@ class TestArticleRoutes:
         assert response.json["count"] == 1
 
 
+class TestBatchRoute:
+    @pytest.fixture
+    def article_ids(self, client, app, mock_feed_fetch):
+        client.post("/feeds/add", data={"url": "https://example.com/feed.xml"})
+        with app.app_context():
+            return [row["id"] for row in get_db().execute("SELECT id FROM articles ORDER BY id")]
+
+    def test_applies_actions(self, client, app, article_ids):
+        response = client.post("/api/batch", json={"actions": [
+            {"op": "read", "id": article_ids[0]},
+            {"op": "save", "id": article_ids[0]},
+        ]})
+
+        assert response.status_code == 200
+        assert response.json["applied"] == 2
+        assert response.json["saved"] == 1
+        assert response.json["unread"] == len(article_ids) - 1
+        with app.app_context():
+            row = get_db().execute("SELECT is_read, is_saved FROM articles WHERE id = ?",
+                                   (article_ids[0],)).fetchone()
+            assert tuple(row) == (1, 1)
+
+    @pytest.mark.parametrize("body", [
+        None,
+        {"actions": "read"},
+        {"actions": [{"op": "delete", "id": 1}]},
+        {"actions": [{"op": "read", "id": "1"}]},
+        {"actions": [{"op": "read", "id": True}]},
+        {"actions": [{"op": "read", "id": 1}] * 501},
+    ])
+    def test_rejects_bad_batches(self, client, body):
+        response = client.post("/api/batch", json=body)
+        assert response.status_code == 400
+        assert "error" in response.json
+
+
 class TestApiRoutes:
     def test_api_feeds(self, client, mock_feed_fetch):
         client.post("/feeds/add", data={"url": "https://example.com/feed.xml"})
@@ -285,6 +322,75 @@ class TestApiRoutes:
         assert len(data) == 1
         assert data[0]["title"] == "Test Article"
 
+    def test_api_articles_field_projection(self, client, mock_feed_fetch):
+        client.post("/feeds/add", data={"url": "https://example.com/feed.xml"})
+
+        response = client.get("/api/articles?fields=id,title,is_read")
+        assert response.status_code == 200
+        assert response.json == [{"id": 1, "title": "Test Article", "is_read": False}]
+
+    def test_api_unknown_field_rejected(self, client):
+        for url in ("/api/articles", "/api/feeds", "/api/filters"):
+            response = client.get(url + "?fields=id,password")
+            assert response.status_code == 400
+            assert response.json["error"] == "Unknown field: password"
+
+    def test_api_articles_streams_in_chunks(self, client, db, monkeypatch):
+        monkeypatch.setattr("src.app.routes.STREAM_CHUNK_ROWS", 2)
+        db.execute("INSERT INTO feeds (url, title) VALUES ('https://e.com/f', 'F')")
+        for i in range(5):
+            db.execute(
+                "INSERT INTO articles (feed_id, guid, title, published_at) VALUES (1, ?, ?, ?)",
+                (f"g{i}", f"t{i}", 1000 + i)
+            )
+        db.commit()
+
+        response = client.get("/api/articles?fields=title&limit=4&offset=1")
+        assert response.is_streamed
+        assert response.json == [{"title": "t3"}, {"title": "t2"}, {"title": "t1"}, {"title": "t0"}]
+
+    def test_api_filters_match_count(self, client, db):
+        create = client.post("/api/filters", json={"name": "F", "pattern": "x", "target": "title"})
+        db.execute("INSERT INTO feeds (url, title) VALUES ('https://e.com/f', 'F')")
+        db.execute("INSERT INTO articles (feed_id, guid, title) VALUES (1, 'g', 't')")
+        db.execute("INSERT INTO filter_matches (article_id, filter_id) VALUES (1, ?)",
+                   (create.json["id"],))
+        db.commit()
+
+        response = client.get("/api/filters?fields=name,match_count")
+        assert response.json == [{"name": "F", "match_count": 1}]
+
+    def test_api_search(self, client, mock_feed_fetch):
+        client.post("/feeds/add", data={"url": "https://example.com/feed.xml"})
+
+        response = client.get("/api/search?q=summary")
+        assert response.status_code == 200
+
+        data = response.json
+        assert len(data) == 1
+        assert data[0]["title"] == "Test Article"
+        assert "<mark>summary</mark>" in data[0]["snippet"]
+
+    def test_api_search_to_max_date(self, client, mock_feed_fetch):
+        client.post("/feeds/add", data={"url": "https://example.com/feed.xml"})
+
+        response = client.get("/api/search?q=summary&to=9999-12-31")
+        assert response.status_code == 200
+        assert len(response.json) == 1
+        assert client.get("/search?q=summary&to=9999-12-31").status_code == 200
+
+    def test_api_search_empty_query(self, client):
+        response = client.get("/api/search?q=")
+        assert response.status_code == 200
+        assert response.json == []
+
+    def test_search_page(self, client, mock_feed_fetch):
+        client.post("/feeds/add", data={"url": "https://example.com/feed.xml"})
+
+        response = client.get("/search?q=test&from=not-a-date")
+        assert response.status_code == 200
+        assert b"Test Article" in response.data
+
     def test_api_filters_list(self, client):
         response = client.get("/api/filters")
         assert response.status_code == 200
@@ -370,7 +476,106 @@ class TestApiRoutes:
         response = client.post("/api/filters/match-count",
                                json={"pattern": "python", "target": "both"})
         assert response.status_code == 200
-        assert response.json["count"] == 2
+        assert response.json == {"count": 2, "approximate": False}
+
+    def test_api_profile_filter(self, client, app):
+        self._seed_articles(app)
+        response = client.post("/api/filters/profile",
+                               json={"pattern": "python", "target": "title"})
+        assert response.status_code == 200
+        assert response.json["articles"] == 3
+        assert response.json["matches"] == 2
+        assert response.json["prefilter"] == ["python"]
+
+        response = client.post("/api/filters/profile", json={"pattern": "(a+)+"})
+        assert response.status_code == 400
+
+    def test_api_filters_reports_costs(self, client, app):
+        self._seed_articles(app)
+        client.post("/api/filters", json={"name": "Py", "pattern": "python"})
+        response = client.get("/api/filters")
+        item = response.json[0]
+        assert item["evaluations"] == 4
+        assert item["eval_matches"] == 3
+        assert item["cost_share"] == 1.0
+        assert item["hot"] is False
+
+        response = client.get("/filters")
+        assert b"s/article" in response.data
+
+    def test_reapply_is_handed_to_scheduler(self, client, app):
+        with patch.object(filter_service, "reapply_all_filters") as reapply:
+            response = client.post("/filters/reapply")
+        assert response.status_code == 302
+        reapply.assert_not_called()
+
+        with app.app_context():
+            # No scheduler listening here, so the request waits in settings.
+            assert settings_service.get_setting("reapply_requested") == "1"
+            filter_service.set_reapply_status(state="running", checked=4000,
+                                              started_at="2026-01-01T00:00:00+00:00")
+        assert b"Re-applying: 4000 articles checked" in client.get("/filters").data
+
+    def test_filters_page_query_count_independent_of_filters(self, app):
+        from src.app import routes
+
+        def statements_for(filter_count):
+            with app.test_request_context("/filters"):
+                db = get_db()
+                db.execute("DELETE FROM filters")
+                for i in range(filter_count):
+                    db.execute("INSERT INTO filters (name, pattern, target) VALUES (?, ?, 'both')",
+                               (f"f{i}", f"p{i}"))
+                db.commit()
+                routes.filters_page()
+                statements = []
+                db.set_trace_callback(statements.append)
+                routes.filters_page()
+                db.set_trace_callback(None)
+                return len(statements)
+
+        assert statements_for(2) == statements_for(12)
+
+    def test_filtered_show_more(self, client, app):
+        self._seed_articles(app)
+        with app.app_context():
+            f, _ = filter_service.create_filter("Python", "python", "both")
+
+        response = client.get(f"/filtered/{f.id}/more?cursor={2**40}:0")
+        assert response.status_code == 200
+        assert response.data.count(b'class="article-item') == 3
+        assert b"btn-show-more" not in response.data
+
+    def test_filtered_show_more_bad_cursor(self, client):
+        assert client.get("/filtered/1/more?cursor=nope").status_code == 400
+
+    def test_api_match_count_rejects_nested_quantifier(self, client):
+        response = client.post("/api/filters/match-count",
+                               json={"pattern": "(a+)+$", "target": "both"})
+        assert response.status_code == 400
+        assert "exponential" in response.json["error"]
+
+    def test_overlapping_alternatives_rejected(self, client):
+        for url in ("/api/filters/match-count", "/api/filters/profile"):
+            response = client.post(url, json={"pattern": "(a|aa)+$", "target": "both"})
+            assert response.status_code == 400
+            assert response.json["error"] == filter_service.NESTED_QUANTIFIER_ERROR
+
+    def test_slow_pattern_reported_not_run_in_process(self, client, app, monkeypatch):
+        app.config["FILTER_TIME_BUDGET_SECONDS"] = 0.2
+        monkeypatch.setattr(filter_service, "PREVIEW_BATCH_TIMEOUT_SECONDS", 0.2)
+        monkeypatch.setattr(filter_service, "has_nested_quantifier", lambda pattern: False)
+        with app.app_context():
+            db = get_db()
+            db.execute("INSERT INTO feeds (url, title) VALUES ('https://example.com/f', 'F')")
+            db.execute("INSERT INTO articles (feed_id, guid, title) VALUES (1, 'g', ?)",
+                       ("a" * 40 + "!",))
+            db.commit()
+
+        for url in ("/api/filters/match-count", "/api/filters/profile"):
+            response = client.post(url, json={"pattern": "(a|aa)+$", "target": "title"})
+            assert response.status_code == 400
+            assert response.json["error"] == filter_service.PREVIEW_TIMEOUT_ERROR
 
     def test_api_match_count_bad_regex(self, client):
         response = client.post("/api/filters/match-count",
@@ -382,3 +587,70 @@ class TestApiRoutes:
         response = client.post("/api/filters/match-count",
                                json={"pattern": "", "target": "both"})
         assert response.status_code == 400
+
+
+class TestSyncRoute:
+    def test_returns_changes_since_seq(self, client, app, mock_feed_fetch):
+        client.post("/feeds/add", data={"url": "https://example.com/feed.xml"})
+        page = client.get("/")
+        with app.app_context():
+            seq = sync_service.current_seq()
+            article_id = get_db().execute("SELECT MIN(id) FROM articles").fetchone()[0]
+        assert f'data-sync-seq="{seq}"'.encode() in page.data
+
+        client.post("/api/batch", json={"actions": [{"op": "read", "id": article_id}]})
+        response = client.get(f"/api/sync?since={seq}&client=tab")
+
+        assert response.status_code == 200
+        assert response.json["seq"] == seq + 1
+        assert response.json["updated"] == [
+            {"id": article_id, "feed_id": 1, "is_read": True, "is_saved": False}
+        ]
+
+    @pytest.mark.parametrize("query", ["", "?since=x", "?since=-1", "?since=0&client=" + "c" * 65])
+    def test_rejects_bad_requests(self, client, query):
+        response = client.get("/api/sync" + query)
+        assert response.status_code == 400
+        assert "error" in response.json
+
+
+class TestConditionalGet:
+    @pytest.fixture
+    def article_id(self, client, app, mock_feed_fetch):
+        client.post("/feeds/add", data={"url": "https://example.com/feed.xml"})
+        client.get("/")  # consumes the "Added" flash
+        with app.app_context():
+            return get_db().execute("SELECT MIN(id) FROM articles").fetchone()[0]
+
+    @pytest.mark.parametrize("path", ["/", "/saved", "/filtered", "/api/articles", "/api/feeds"])
+    def test_unchanged_view_is_not_modified(self, client, article_id, path):
+        first = client.get(path)
+        assert first.status_code == 200
+        assert first.headers["Cache-Control"] == "private, no-cache"
+
+        again = client.get(path, headers={"If-None-Match": first.headers["ETag"]})
+        assert again.status_code == 304
+        assert again.data == b""
+        assert again.headers["ETag"] == first.headers["ETag"]
+
+    def test_writes_and_parameters_change_the_etag(self, client, app, article_id):
+        etag = client.get("/api/articles").headers["ETag"]
+        assert client.get("/api/articles?unread=1").headers["ETag"] != etag
+
+        client.post("/api/batch", json={"actions": [{"op": "read", "id": article_id}]})
+        response = client.get("/api/articles", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_feed_errors_change_the_feeds_etag(self, client, app, article_id):
+        etag = client.get("/api/feeds").headers["ETag"]
+        with app.app_context():
+            db = get_db()
+            db.execute("UPDATE feeds SET fetch_error_count = 1, last_error = 'timeout'")
+            db.commit()
+        assert client.get("/api/feeds", headers={"If-None-Match": etag}).status_code == 200
+
+    def test_flashes_and_errors_are_not_validated(self, client, mock_feed_fetch):
+        client.post("/feeds/add", data={"url": "https://example.com/feed.xml"})
+        assert "ETag" not in client.get("/").headers
+        assert "ETag" not in client.get("/api/articles?fields=nope").headers
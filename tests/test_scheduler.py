@@ -78,3 +78,76 @@ def test_on_demand_refresh_runs_after_cooldown_expires(app):
             mock_refresh.assert_called_once()
     finally:
         _clear_app()
+
+
+def test_on_demand_refresh_runs_when_signalled(app):
+    _set_app(app)
+    try:
+        scheduler_module._refresh_requested.set()
+        with patch("src.app.services.feed_service.refresh_all_feeds", return_value={}) as mock_refresh:
+            scheduler_module.check_on_demand_refresh_job()
+            scheduler_module.check_on_demand_refresh_job()
+            mock_refresh.assert_called_once()
+
+        # A signal inside the cooldown is dropped, not deferred.
+        scheduler_module._refresh_requested.set()
+        with patch("src.app.services.feed_service.refresh_all_feeds") as mock_refresh:
+            scheduler_module.check_on_demand_refresh_job()
+            mock_refresh.assert_not_called()
+        assert not scheduler_module._refresh_requested.is_set()
+    finally:
+        scheduler_module._refresh_requested.clear()
+        _clear_app()
+
+
+def test_reapply_noop_when_not_requested(app):
+    _set_app(app)
+    try:
+        with patch("src.app.services.filter_service.reapply_all_filters") as mock_reapply:
+            scheduler_module.reapply_filters_job()
+            mock_reapply.assert_not_called()
+    finally:
+        _clear_app()
+
+
+def test_reapply_runs_in_parallel_when_requested(app):
+    _set_app(app)
+    try:
+        with app.app_context():
+            settings_service.set_setting("reapply_requested", "1")
+
+        with patch("src.app.services.filter_service.reapply_all_filters",
+                   return_value=3) as mock_reapply:
+            scheduler_module.reapply_filters_job()
+            scheduler_module.reapply_filters_job()
+            mock_reapply.assert_called_once()
+            assert mock_reapply.call_args.kwargs["parallel"] is True
+
+        with app.app_context():
+            from src.app.services import filter_service
+            assert settings_service.get_setting("reapply_requested") == "0"
+            status = filter_service.get_reapply_status()
+            assert status["state"] == "done" and status["matches"] == 3
+    finally:
+        _clear_app()
+
+
+def test_reapply_runs_when_signalled(app):
+    from src.app.refresh_signal import REAPPLY_MESSAGE
+
+    _set_app(app)
+    try:
+        scheduler_module._on_refresh_signal(REAPPLY_MESSAGE)
+        assert not scheduler_module._refresh_requested.is_set()
+        with patch("src.app.services.filter_service.reapply_all_filters",
+                   side_effect=RuntimeError("boom")) as mock_reapply:
+            scheduler_module.reapply_filters_job()
+            mock_reapply.assert_called_once()
+        assert not scheduler_module._reapply_requested.is_set()
+
+        with app.app_context():
+            from src.app.services import filter_service
+            assert filter_service.get_reapply_status()["state"] == "failed"
+    finally:
+        scheduler_module._reapply_requested.clear()
+        _clear_app()
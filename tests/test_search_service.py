@@ -0,0 +1,185 @@
+from datetime import date, datetime, timezone
+
+import pytest
+
+from src.app.compression import compress_text
+from src.app.database import _create_search_index, get_db
+from src.app.services import search_service
+from src.app.textnorm import match_text
+
+
+@pytest.fixture
+def sample_feed(app):
+    with app.app_context():
+        db = get_db()
+        cursor = db.execute(
+            "INSERT INTO feeds (url, title) VALUES (?, ?)",
+            ("https://example.com/feed.xml", "Test Feed")
+        )
+        db.commit()
+        return cursor.lastrowid
+
+
+def _ts(year, month, day):
+    return int(datetime(year, month, day, 8, tzinfo=timezone.utc).timestamp())
+
+
+@pytest.fixture
+def indexed_articles(app, sample_feed):
+    with app.app_context():
+        db = get_db()
+        rows = [
+            ("g1", "Python 4.0 released", "<p>The <b>Python</b> team shipped a release.</p>",
+             "", _ts(2024, 1, 10)),
+            ("g2", "Football results", "<p>Python mentioned once in passing.</p>",
+             "", _ts(2024, 2, 1)),
+            ("g3", "Gardening tips", "Tomatoes &amp; basil", "<div>Deep body about compost</div>",
+             _ts(2024, 3, 1)),
+        ]
+        for guid, title, summary, content, published in rows:
+            db.execute(
+                "INSERT INTO articles (feed_id, guid, title, summary, content, published_at, "
+                "match_title, match_summary) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (sample_feed, guid, title, summary, content, published,
+                 match_text(title), match_text(summary))
+            )
+        db.commit()
+
+
+class TestBuildMatchQuery:
+    def test_words_are_quoted_and_last_is_prefix(self):
+        assert search_service.build_match_query("python rel") == '"python" "rel"*'
+
+    def test_phrases_are_kept_together(self):
+        assert search_service.build_match_query('"deal of the day"') == '"deal of the day"'
+
+    def test_operators_cannot_break_the_query(self):
+        assert search_service.build_match_query('NEAR( "x" OR -') == '"NEAR(" "x" "OR" "-"*'
+
+    def test_empty_query(self):
+        assert search_service.build_match_query("   ") is None
+
+
+class TestSearchArticles:
+    def test_title_hits_rank_above_summary_hits(self, app, indexed_articles):
+        with app.app_context():
+            results = search_service.search_articles("python")
+            assert [a.guid for a, _ in results] == ["g1", "g2"]
+
+    def test_snippet_is_highlighted_and_escaped(self, app, indexed_articles):
+        with app.app_context():
+            results = search_service.search_articles("tomatoes")
+            _, snippet = results[0]
+            assert "<mark>Tomatoes</mark>" in snippet
+            assert "&amp;" in snippet
+
+    def test_summary_snippet_keeps_original_case(self, app, indexed_articles):
+        with app.app_context():
+            _, snippet = search_service.search_articles("team")[0]
+            assert "The Python <mark>team</mark> shipped" in snippet
+
+    def test_bodies_behind_a_summary_are_not_indexed(self, app, indexed_articles):
+        with app.app_context():
+            assert search_service.search_articles("compost") == []
+
+    def test_summary_less_article_is_found_by_content(self, app, sample_feed):
+        with app.app_context():
+            db = get_db()
+            body = "<p>Long read about <b>Sourdough</b> starters</p>"
+            db.execute(
+                "INSERT INTO articles (feed_id, guid, title, summary, content, "
+                "match_title, match_summary, search_content) VALUES (?, 'g', 'Bread', '', ?, "
+                "'bread', '', ?)",
+                (sample_feed, body, search_service.search_content("", body))
+            )
+            db.commit()
+
+            results = search_service.search_articles("sourdough")
+            assert [a.guid for a, _ in results] == ["g"]
+            assert "<mark>sourdough</mark>" in results[0][1]
+
+    def test_backfill_indexes_content_of_summary_less_articles(self, app, sample_feed):
+        with app.app_context():
+            db = get_db()
+            db.executemany(
+                "INSERT INTO articles (feed_id, guid, title, summary, content, "
+                "match_title, match_summary) VALUES (?, ?, 't', ?, ?, 't', ?)",
+                [(sample_feed, "empty", "", compress_text("<p>Kombucha brewing</p>"), ""),
+                 (sample_feed, "teaser", "Teaser", "<p>Kefir grains</p>", "teaser")]
+            )
+            db.commit()
+
+            assert search_service.backfill_search_content() == 1
+            assert search_service.backfill_search_content() == 0
+            assert len(search_service.search_articles("kombucha")) == 1
+            assert search_service.search_articles("kefir") == []
+
+    def test_backfilled_match_text_is_indexed(self, app, indexed_articles):
+        with app.app_context():
+            db = get_db()
+            db.execute("UPDATE articles SET match_summary = NULL WHERE guid = 'g3'")
+            db.commit()
+            assert search_service.search_articles("basil") == []
+            db.execute("UPDATE articles SET match_summary = 'tomatoes & basil' WHERE guid = 'g3'")
+            db.commit()
+            assert [a.guid for a, _ in search_service.search_articles("basil")] == ["g3"]
+
+    def test_date_to_max_is_unbounded(self, app, indexed_articles):
+        with app.app_context():
+            results = search_service.search_articles("python", date_to=date.max)
+            assert len(results) == 2
+
+    def test_date_scope(self, app, indexed_articles):
+        with app.app_context():
+            results = search_service.search_articles(
+                "python", date_from=date(2024, 1, 15), date_to=date(2024, 2, 1)
+            )
+            assert [a.guid for a, _ in results] == ["g2"]
+
+    def test_feed_scope(self, app, indexed_articles, sample_feed):
+        with app.app_context():
+            assert search_service.search_articles("python", feed_id=sample_feed + 1) == []
+            assert len(search_service.search_articles("python", feed_id=sample_feed)) == 2
+
+    def test_deleted_articles_leave_the_index(self, app, indexed_articles):
+        with app.app_context():
+            db = get_db()
+            db.execute("DELETE FROM articles WHERE guid = 'g1'")
+            db.commit()
+            results = search_service.search_articles("python")
+            assert [a.guid for a, _ in results] == ["g2"]
+            assert db.execute("SELECT COUNT(*) FROM articles_fts").fetchone()[0] == 2
+
+    def test_title_fallback_matches_wildcards_literally(self, app, sample_feed, monkeypatch):
+        monkeypatch.setattr(search_service, "is_search_available", lambda: False)
+        with app.app_context():
+            db = get_db()
+            for guid, title in (("a", "Save 50% today"), ("b", "Save 500 today"),
+                                ("c", "snake_case names"), ("d", "snakeXcase names")):
+                db.execute("INSERT INTO articles (feed_id, guid, title) VALUES (?, ?, ?)",
+                           (sample_feed, guid, title))
+            db.commit()
+            assert [a.guid for a, _ in search_service.search_articles("50%")] == ["a"]
+            assert [a.guid for a, _ in search_service.search_articles("snake_case")] == ["c"]
+
+
+class TestSearchIndexMigration:
+    def test_replaces_standalone_index(self, app, sample_feed):
+        with app.app_context():
+            db = get_db()
+            db.executescript("""
+                DROP TRIGGER articles_fts_insert;
+                DROP TRIGGER articles_fts_update;
+                DROP TRIGGER articles_fts_delete;
+                DROP TABLE articles_fts;
+                CREATE VIRTUAL TABLE articles_fts USING fts5(title, summary, content);
+            """)
+            db.execute("INSERT INTO articles (feed_id, guid, title, match_summary) "
+                       "VALUES (?, 'g', 'Kept title', 'kept summary')", (sample_feed,))
+            db.commit()
+
+            _create_search_index(db)
+
+            sql = db.execute("SELECT sql FROM sqlite_master WHERE name = 'articles_fts'").fetchone()[0]
+            assert "content_rowid" in sql
+            assert len(search_service.search_articles("kept summary")) == 1
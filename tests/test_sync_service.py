@@ -0,0 +1,157 @@
+import time
+
+import pytest
+
+from src.app.database import get_db
+from src.app.services import article_service, sync_service
+
+
+@pytest.fixture
+def feed_id(app):
+    with app.app_context():
+        db = get_db()
+        feed_id = db.execute("INSERT INTO feeds (url, title) VALUES ('u', 'Feed')").lastrowid
+        db.commit()
+        return feed_id
+
+
+def _add_article(feed_id, guid):
+    db = get_db()
+    article_id = db.execute(
+        "INSERT INTO articles (feed_id, guid, title, summary) VALUES (?, ?, 't', 's')",
+        (feed_id, guid)
+    ).lastrowid
+    db.commit()
+    return article_id
+
+
+class TestGetChanges:
+    def test_nothing_changed(self, app, feed_id):
+        with app.app_context():
+            _add_article(feed_id, "a")
+            seq = sync_service.current_seq()
+            changes = sync_service.get_changes(seq)
+
+            assert changes["seq"] == seq
+            assert not changes["reset"]
+            assert changes["inserted"] == changes["updated"] == changes["deleted"] == []
+            assert changes["counts"] == {"unread": 1, "saved": 0, "feeds": {feed_id: 1}}
+
+    def test_changes_coalesce_per_article(self, app, feed_id):
+        with app.app_context():
+            kept = _add_article(feed_id, "kept")
+            gone = _add_article(feed_id, "gone")
+            seq = sync_service.current_seq()
+
+            new = _add_article(feed_id, "new")
+            transient = _add_article(feed_id, "transient")
+            article_service.mark_article_read(kept)
+            article_service.toggle_saved(kept)
+            article_service.mark_article_read(new)
+            db = get_db()
+            db.execute("DELETE FROM articles WHERE id IN (?, ?)", (gone, transient))
+            db.commit()
+
+            changes = sync_service.get_changes(seq)
+
+            assert changes["seq"] == sync_service.current_seq() > seq
+            assert [a["id"] for a in changes["inserted"]] == [new]
+            assert changes["inserted"][0]["is_read"] is True
+            assert changes["inserted"][0]["feed_title"] == "Feed"
+            assert changes["updated"] == [
+                {"id": kept, "feed_id": feed_id, "is_read": True, "is_saved": True}
+            ]
+            assert changes["deleted"] == [gone]
+
+    def test_unchanged_flag_writes_are_not_logged(self, app, feed_id):
+        with app.app_context():
+            article_id = _add_article(feed_id, "a")
+            seq = sync_service.current_seq()
+            db = get_db()
+            db.execute("UPDATE articles SET is_read = 0, match_title = 't' WHERE id = ?",
+                       (article_id,))
+            db.commit()
+
+            assert sync_service.current_seq() == seq
+
+    def test_reset_when_ahead_or_too_far_behind(self, app, feed_id, monkeypatch):
+        with app.app_context():
+            for i in range(3):
+                _add_article(feed_id, f"a{i}")
+            seq = sync_service.current_seq()
+
+            assert sync_service.get_changes(seq + 1)["reset"]
+            monkeypatch.setattr(sync_service, "MAX_SYNC_CHANGES", 2)
+            changes = sync_service.get_changes(0)
+            assert changes["reset"]
+            assert changes["inserted"] == []
+            assert not sync_service.get_changes(seq - 2)["reset"]
+
+    def test_records_client_cursor(self, app, feed_id):
+        with app.app_context():
+            _add_article(feed_id, "a")
+            sync_service.get_changes(0, "phone")
+            sync_service.get_changes(1, "phone")
+
+            rows = get_db().execute("SELECT client_id, seq FROM sync_cursors").fetchall()
+            assert [tuple(row) for row in rows] == [("phone", 1)]
+
+    def test_repeated_polls_do_not_write(self, app, feed_id):
+        with app.app_context():
+            _add_article(feed_id, "a")
+            sync_service.get_changes(1, "phone")
+            db = get_db()
+            writes = db.total_changes
+
+            sync_service.get_changes(1, "phone")
+            sync_service.get_changes(0, "phone")
+            assert db.total_changes == writes
+
+            db.execute("UPDATE sync_cursors SET seen_at = seen_at - ?",
+                       (sync_service.SYNC_CURSOR_TOUCH_SECONDS + 1,))
+            db.commit()
+            sync_service.get_changes(0, "phone")
+            row = db.execute("SELECT seq, seen_at FROM sync_cursors").fetchone()
+            assert row["seq"] == 1
+            assert row["seen_at"] >= int(time.time()) - 5
+
+
+class TestCompactChanges:
+    def _age_log(self, seconds):
+        db = get_db()
+        db.execute("UPDATE article_changes SET changed_at = changed_at - ?", (seconds,))
+        db.commit()
+
+    def test_keeps_recent_changes(self, app, feed_id):
+        with app.app_context():
+            _add_article(feed_id, "a")
+            assert sync_service.compact_changes() == 0
+
+    def test_compacts_up_to_slowest_live_cursor(self, app, feed_id):
+        with app.app_context():
+            for i in range(4):
+                _add_article(feed_id, f"a{i}")
+            sync_service.get_changes(2, "laptop")
+            sync_service.get_changes(4, "phone")
+            self._age_log(2 * 86400)
+
+            assert sync_service.compact_changes() == 2
+            assert not sync_service.get_changes(2)["reset"]
+            assert sync_service.get_changes(1)["reset"]
+
+    def test_stale_cursors_stop_holding_the_log(self, app, feed_id):
+        with app.app_context():
+            for i in range(3):
+                _add_article(feed_id, f"a{i}")
+            sync_service.get_changes(0, "old")
+            db = get_db()
+            db.execute("UPDATE sync_cursors SET seen_at = ?", (int(time.time()) - 40 * 86400,))
+            db.commit()
+            self._age_log(2 * 86400)
+
+            assert sync_service.compact_changes() == 3
+            assert get_db().execute("SELECT COUNT(*) FROM sync_cursors").fetchone()[0] == 0
+            # Compaction never rewinds the sequence.
+            assert sync_service.current_seq() == 3
+            assert not sync_service.get_changes(3)["reset"]
+            assert sync_service.get_changes(2)["reset"]
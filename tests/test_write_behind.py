@@ -0,0 +1,119 @@
+import sqlite3
+import time
+
+import pytest
+
+from src.app import write_behind
+from src.app.database import get_db
+from src.app.services import article_service
+
+
+@pytest.fixture
+def buffered_app(app):
+    app.config["READ_STATE_FLUSH_SECONDS"] = 30
+    app.config["READ_STATE_MAX_PENDING"] = 500
+    yield app
+    with app.app_context():
+        write_behind.flush()
+
+
+@pytest.fixture
+def article_ids(buffered_app):
+    with buffered_app.app_context():
+        db = get_db()
+        feed_id = db.execute("INSERT INTO feeds (url) VALUES ('u')").lastrowid
+        ids = [
+            db.execute("INSERT INTO articles (feed_id, guid, title) VALUES (?, ?, 't')",
+                       (feed_id, f"g{i}")).lastrowid
+            for i in range(3)
+        ]
+        db.commit()
+        return ids
+
+
+def _flags(article_id):
+    row = get_db().execute("SELECT is_read, is_saved FROM articles WHERE id = ?",
+                           (article_id,)).fetchone()
+    return tuple(row)
+
+
+class TestWriteBehind:
+    def test_batch_is_acknowledged_before_it_is_written(self, buffered_app, article_ids):
+        with buffered_app.app_context():
+            counts = article_service.apply_batch(
+                [("read", article_ids[0]), ("save", article_ids[1]), ("read", article_ids[1])]
+            )
+
+            assert counts["unread"] == 1
+            assert counts["saved"] == 1
+            assert list(counts["feeds"].values()) == [1]
+            assert _flags(article_ids[0]) == (0, 0)
+
+            assert write_behind.flush() == 2
+            assert _flags(article_ids[0]) == (1, 0)
+            assert _flags(article_ids[1]) == (1, 1)
+
+    def test_last_write_wins(self, buffered_app, article_ids):
+        with buffered_app.app_context():
+            article_service.apply_batch([("read", article_ids[0])])
+            counts = article_service.apply_batch([("unread", article_ids[0])])
+
+            assert counts["unread"] == 3
+            write_behind.flush()
+            assert _flags(article_ids[0]) == (0, 0)
+
+    def test_flushes_at_size_bound(self, buffered_app, article_ids):
+        buffered_app.config["READ_STATE_MAX_PENDING"] = 2
+        with buffered_app.app_context():
+            write_behind.flush()
+            write_behind._buffers.pop(buffered_app.config["DATABASE"], None)
+            article_service.apply_batch([("read", article_ids[0])])
+            assert _flags(article_ids[0]) == (0, 0)
+
+            article_service.apply_batch([("read", article_ids[1])])
+            assert _flags(article_ids[0]) == (1, 0)
+            assert write_behind.get_buffer().pending() == {}
+
+    def test_flushes_after_interval(self, buffered_app, article_ids):
+        buffered_app.config["READ_STATE_FLUSH_SECONDS"] = 0.05
+        with buffered_app.app_context():
+            write_behind._buffers.pop(buffered_app.config["DATABASE"], None)
+            article_service.apply_batch([("read", article_ids[0])])
+
+            deadline = time.monotonic() + 5
+            while _flags(article_ids[0]) != (1, 0) and time.monotonic() < deadline:
+                time.sleep(0.02)
+            assert _flags(article_ids[0]) == (1, 0)
+
+    def test_direct_writes_land_after_queued_ones(self, buffered_app, article_ids):
+        with buffered_app.app_context():
+            article_service.apply_batch([("read", article_ids[0])])
+            article_service.mark_article_read(article_ids[0], is_read=False)
+
+            write_behind.flush()
+            assert _flags(article_ids[0]) == (0, 0)
+
+    def test_page_views_flush(self, buffered_app, article_ids):
+        client = buffered_app.test_client()
+        client.post("/api/batch", json={"actions": [{"op": "read", "id": article_ids[0]}]})
+
+        client.get("/api/feeds")
+
+        with buffered_app.app_context():
+            assert _flags(article_ids[0]) == (1, 0)
+
+    def test_failed_write_is_retried(self, buffered_app, article_ids, monkeypatch):
+        with buffered_app.app_context():
+            article_service.apply_batch([("read", article_ids[0])])
+            real_write = write_behind._write
+
+            def locked(path, pending):
+                raise sqlite3.OperationalError("database is locked")
+
+            monkeypatch.setattr(write_behind, "_write", locked)
+            assert write_behind.flush() == 0
+            article_service.apply_batch([("save", article_ids[0])])
+
+            monkeypatch.setattr(write_behind, "_write", real_write)
+            assert write_behind.flush() == 1
+            assert _flags(article_ids[0]) == (1, 1)